@@ -16,7 +16,52 @@ class Settings(BaseModel):
     azure_tts_region: str = Field(default=os.getenv("AZURE_TTS_REGION", ""))
     azure_tts_voice: str = Field(default=os.getenv("AZURE_TTS_VOICE", "en-US-EmmaMultilingualNeural"))
 
+    # Content-addressed TTS audio cache (see jewel/io/tts_cache.py)
+    tts_cache_dir: str = Field(default=os.getenv("JEWEL_TTS_CACHE_DIR", "./data/tts_cache"))
+    tts_cache_max_mb: int = Field(default=int(os.getenv("JEWEL_TTS_CACHE_MAX_MB", "512")))
+    # Upper bound on concurrent upstream TTS calls (shared by /tts, /tts/stream and the queue)
+    tts_max_workers: int = Field(default=int(os.getenv("JEWEL_TTS_MAX_WORKERS", "4")))
+
+    # Generated artifacts (queued TTS results, images, videos) retention; see jewel/io/artifacts.py
+    artifact_quota_mb: int = Field(default=int(os.getenv("JEWEL_ARTIFACT_QUOTA_MB", "2048")))
+    artifact_max_age_hours: float = Field(default=float(os.getenv("JEWEL_ARTIFACT_MAX_AGE_HOURS", "72")))
+
+    # /vision preprocessing: longest side in px, output format (JPEG/WEBP/PNG) and quality; see jewel/io/vision_pipeline.py
+    vision_max_side: int = Field(default=int(os.getenv("JEWEL_VISION_MAX_SIDE", "1024")))
+    vision_format: str = Field(default=os.getenv("JEWEL_VISION_FORMAT", "JPEG"))
+    vision_quality: int = Field(default=int(os.getenv("JEWEL_VISION_QUALITY", "85")))
+    # Max perceptual-hash distance (bits of 64) for reusing a cached /vision reply. 0 (default) = exact
+    # hash only; a few bits (e.g. 4) also reuses replies for re-encoded or resized copies, at the risk of
+    # answering for a different but similar-looking picture
+    vision_cache_distance: int = Field(default=int(os.getenv("JEWEL_VISION_CACHE_DISTANCE", "0")))
+
+    # Concurrent ffmpeg frame seeks for video analysis (shared by all requests)
+    video_frame_workers: int = Field(default=int(os.getenv("JEWEL_VIDEO_FRAME_WORKERS", "4")))
+    # Video analysis jobs running at once; further submissions wait as "queued"
+    video_max_jobs: int = Field(default=int(os.getenv("JEWEL_VIDEO_MAX_JOBS", "2")))
+    # Concurrent image generation calls (/generate_image and /prototype_video frames), shared by all jobs
+    image_gen_workers: int = Field(default=int(os.getenv("JEWEL_IMAGE_GEN_WORKERS", "4")))
+
+    # Map-reduce summarization of long transcripts/messages; see jewel/tools/summarize.py
+    summarize_model: str = Field(default=os.getenv("JEWEL_SUMMARIZE_MODEL", "gpt-4o-mini"))
+    summarize_workers: int = Field(default=int(os.getenv("JEWEL_SUMMARIZE_WORKERS", "4")))
+    summarize_chunk_tokens: int = Field(default=int(os.getenv("JEWEL_SUMMARIZE_CHUNK_TOKENS", "2000")))
+    summarize_overlap_tokens: int = Field(default=int(os.getenv("JEWEL_SUMMARIZE_OVERLAP_TOKENS", "150")))
+    # /chat messages longer than this (tokens) are condensed before they reach the model
+    chat_max_input_tokens: int = Field(default=int(os.getenv("JEWEL_CHAT_MAX_INPUT_TOKENS", "3000")))
+    # Worker processes for /safety/check_batch (0 = one per CPU core)
+    safety_batch_workers: int = Field(default=int(os.getenv("JEWEL_SAFETY_BATCH_WORKERS", "0")))
+
     vosk_model_path: str = Field(default=os.getenv("VOSK_MODEL_PATH", ""))
+    # Load the Vosk model at server startup instead of on the first /audio request
+    vosk_preload: bool = Field(default=os.getenv("JEWEL_VOSK_PRELOAD", "0").lower() in ("1", "true", "yes"))
+    # Largest audio upload /audio will accept (streamed through ffmpeg, never buffered whole)
+    stt_max_upload_mb: int = Field(default=int(os.getenv("JEWEL_STT_MAX_UPLOAD_MB", "25")))
+    # Worker processes for /audio/batch (0 = one per CPU core)
+    stt_pool_workers: int = Field(default=int(os.getenv("JEWEL_STT_POOL_WORKERS", "0")))
+    # Drop silence with the NumPy VAD before decoding (jewel/io/vad.py); utterances are cut at the max length
+    stt_vad: bool = Field(default=os.getenv("JEWEL_STT_VAD", "1").lower() in ("1", "true", "yes"))
+    stt_max_utterance_s: float = Field(default=float(os.getenv("JEWEL_STT_MAX_UTTERANCE_S", "30")))
     telegram_bot_token: str = Field(default=os.getenv("TELEGRAM_BOT_TOKEN", ""))
     # Base URL where the app is hosted (used for absolute links if needed)
     site_url: str = Field(default=os.getenv("SITE_URL", "http://127.0.0.1:8000"))
@@ -1,19 +1,22 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Iterator, Tuple
 from .safety import check_safety
+from .safety_enhanced import OUTPUT_BLOCKED_MESSAGE, get_safety
 from ..memory.sqlite_store import SqliteStore
 from ..config import settings
 from ..logging_setup import logger
 from ..tools.local_tools import TOOLS
+from ..tools.summarize import count_tokens, condense_message
 from ..prompts import SYSTEM_PROMPT
-from openai import OpenAI
+from ..io.http_clients import clients
 from datetime import datetime
+import asyncio
 import time
 import json
 
 class Agent:
     def __init__(self, store: SqliteStore):
         self.store = store
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = clients.openai()
         self.model = settings.openai_model
         self.persona = settings.persona_name
         self.user = settings.user_name
@@ -83,17 +86,130 @@ class Agent:
             out.append("Plan: Answer directly and offer additional help.")
         return out
 
-    def ask(self, text: str) -> str:
+    def ask(self, text: str, user_id: str = None, ip_address: str = None) -> str:
+        """Reply to `text`. `user_id`/`ip_address` identify the caller to the safety log,
+        so a blocked message flags (and can ban) the account and address it came from."""
+        early, msgs, temperature = self._prepare(text, user_id, ip_address)
+        if early is not None:
+            return early
+        answer, resp = self._complete(msgs, temperature)
+        self._record_usage(getattr(resp, "usage", None))
+        moderator = get_safety().output_moderator()
+        moderator.feed(answer)
+        moderator.finish()
+        category = moderator.hit
+        if category:
+            logger.warning(f"Reply blocked by output moderation: {category}")
+            answer = OUTPUT_BLOCKED_MESSAGE
+        self.store.add_message("user", text)
+        self.store.add_message("assistant", answer)
+        return answer
+
+    async def ask_stream(self, text: str, user_id: str = None, ip_address: str = None) -> AsyncIterator[Tuple[str, str]]:
+        """Like ask, but yields the reply as it is generated, as ("delta", text) pieces.
+
+        Each delta is moderated before it goes out. On a hit the upstream stream is
+        closed and a final ("replace", message) tells the client to show the message
+        in place of the partial reply. Preparing the prompt (which may condense a long
+        message with several model calls) and the upstream reads run in worker threads,
+        so the event loop is never held up by a model call.
+        """
+        early, msgs, temperature = await asyncio.to_thread(self._prepare, text, user_id, ip_address)
+        if early is not None:
+            yield ("delta", early)
+            return
+        usage = None
+
+        def deltas() -> Iterator[str]:
+            nonlocal usage
+            try:
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=msgs,
+                    temperature=temperature,
+                    max_tokens=400,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    timeout=60,
+                )
+            except Exception as e:
+                # nothing was streamed yet: fall back to the retrying blocking call
+                logger.debug(f"Streaming chat call failed: {e}")
+                answer, resp = self._complete(msgs, temperature)
+                usage = getattr(resp, "usage", None)
+                yield answer
+                return
+            try:
+                for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # stops generation upstream when the reply is cut or the client leaves
+                stream.close()
+
+        moderator = get_safety().output_moderator()
+        parts: List[str] = []
+        gen = deltas()
+        try:
+            while (delta := await asyncio.to_thread(next, gen, None)) is not None:
+                # the moderator holds back the last word until it is complete
+                ready = moderator.feed(delta)
+                if moderator.hit:
+                    break
+                if ready:
+                    parts.append(ready)
+                    yield ("delta", ready)
+        except Exception as e:
+            logger.debug(f"Chat stream broke off: {e}")
+            try:
+                self.store.set("last_openai_error", f"{datetime.utcnow().isoformat()} stream error={e}")
+            except Exception:
+                pass
+            if not parts:
+                parts.append("I hit a temporary network delay. I’m still here—could you resend that or rephrase briefly?")
+                yield ("delta", parts[0])
+        finally:
+            try:
+                gen.close()
+            except ValueError:
+                # cancelled while a worker thread was still reading from it
+                pass
+        ready = moderator.finish()
+        category = moderator.hit
+        if ready:
+            parts.append(ready)
+            yield ("delta", ready)
+        if category:
+            logger.warning(f"Streamed reply cut by output moderation: {category}")
+            answer = OUTPUT_BLOCKED_MESSAGE
+            yield ("replace", answer)
+        else:
+            answer = "".join(parts)
+        self._record_usage(usage)
+        self.store.add_message("user", text)
+        self.store.add_message("assistant", answer)
+
+    def _prepare(self, text: str, user_id: str = None, ip_address: str = None) -> tuple:
+        """Safety checks, slash commands and the prompt, shared by ask and ask_stream.
+
+        Returns (reply, None, None) when the message is answered without the model,
+        otherwise (None, messages, temperature).
+        """
         ok, why = check_safety(text)
         if not ok:
             logger.warning(f"Safety blocked: {why}")
-            return "I'm not able to help with that."
+            return "I'm not able to help with that.", None, None
+        is_safe, category, reason = get_safety().check_content(text, user_id, ip_address)
+        if not is_safe:
+            logger.warning(f"Safety blocked: {category}")
+            return reason, None, None
 
         tool_result = self._tool_route(text)
         if tool_result is not None:
             self.store.add_message("user", text)
             self.store.add_message("assistant", str(tool_result))
-            return str(tool_result)
+            return str(tool_result), None, None
 
         # Personalization knobs (with safe defaults)
         try:
@@ -108,9 +224,18 @@ class Agent:
             f"Ask a clarifying question if the request is ambiguous."
         )
 
+        # Long pastes (articles, logs, transcripts) are condensed over their whole
+        # length instead of overflowing the context or being cut off
+        prompt_text = text
+        if count_tokens(text) > settings.chat_max_input_tokens:
+            try:
+                prompt_text = condense_message(text, settings.chat_max_input_tokens)
+            except Exception as e:
+                logger.debug(f"Condensing long message failed: {e}")
+
         msgs = self._context() + [
             {"role": "system", "content": extra_style},
-            {"role": "user", "content": text},
+            {"role": "user", "content": prompt_text},
         ]
 
         # Optional private reflection step (internal only). If persona indicates opt_in_reflection,
@@ -178,6 +303,9 @@ class Agent:
                         logger.debug('Failed to write private reflection to store')
         except Exception:
             pass
+        return None, msgs, temperature
+
+    def _complete(self, msgs: List[Dict[str, str]], temperature: float) -> tuple:
         # Ask model with defensive defaults to ensure a reply
         # Try the OpenAI call with retries and exponential backoff to handle transient network issues
         resp = None
@@ -224,9 +352,11 @@ class Agent:
                     except: pass
                     # final friendly fallback
                     answer = "I hit a temporary network delay. I’m still here—could you resend that or rephrase briefly?"
+        return answer, resp
+
+    def _record_usage(self, usage: Any) -> None:
         # Track usage (tokens) per month for simple cost estimates
         try:
-            usage = getattr(resp, "usage", None)
             if usage:
                 prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
                 completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
@@ -245,6 +375,3 @@ class Agent:
         except Exception as e:
             # Don't break chat if accounting fails
             logger.debug(f"Usage accounting failed: {e}")
-        self.store.add_message("user", text)
-        self.store.add_message("assistant", answer)
-        return answer
\ No newline at end of file
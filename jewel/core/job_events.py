@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+TERMINAL_STATUSES = ("done", "error", "cancelled")
+
+
+def _resolve(fut: asyncio.Future, value):
+    if not fut.done():
+        fut.set_result(value)
+
+
+class JobEvents:
+    """In-process publish/subscribe for background job state.
+
+    Workers (threads or coroutines) call `publish(job_id, state)` whenever a job
+    changes; HTTP handlers await `wait()` (long-poll) or iterate `stream()` (SSE)
+    instead of polling status files. Each job keeps only its latest state plus a
+    version counter, so a slow subscriber skips intermediate states but never
+    misses the final one. Any job kind (TTS, video analysis, image generation)
+    can publish here; include a "kind" field in the state to tell them apart.
+    """
+
+    def __init__(self, max_jobs: int = 2048):
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+    def publish(self, job_id: str, state: Dict[str, Any]) -> int:
+        state = dict(state)
+        with self._lock:
+            version = self._jobs.get(job_id, (0, None))[0] + 1
+            self._jobs[job_id] = (version, state)
+            self._jobs.move_to_end(job_id)
+            # forget the oldest jobs nobody is waiting on
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs))
+                if oldest in self._waiters:
+                    self._jobs.move_to_end(oldest)
+                    break
+                self._jobs.popitem(last=False)
+            waiters = self._waiters.pop(job_id, [])
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, fut, (version, state))
+            except RuntimeError:
+                # loop already closed
+                pass
+        return version
+
+    def get(self, job_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, since: int = 0, timeout: float = 25.0) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Return (version, state) once the job is newer than `since`, or None on timeout."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            cur = self._jobs.get(job_id)
+            if cur and cur[0] > since:
+                return cur
+            fut = loop.create_future()
+            self._waiters.setdefault(job_id, []).append((loop, fut))
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(job_id)
+                if waiters:
+                    waiters[:] = [w for w in waiters if w[1] is not fut]
+                    if not waiters:
+                        self._waiters.pop(job_id, None)
+
+    async def stream(self, job_id: str, since: int = 0, heartbeat: float = 15.0) -> AsyncIterator[Optional[Tuple[int, Dict[str, Any]]]]:
+        """Yield each new (version, state) until the job ends; yields None every `heartbeat` seconds of silence."""
+        while True:
+            ev = await self.wait(job_id, since, heartbeat)
+            if ev is None:
+                yield None
+                continue
+            since = ev[0]
+            yield ev
+            if ev[1].get("status") in TERMINAL_STATUSES:
+                return
+
+
+job_events = JobEvents()
@@ -1,5 +1,7 @@
 from typing import Tuple
 
+from .safety_matcher import KeywordSet
+
 SAFE_RULES = {
     "no_illegal": "Do not assist with or encourage illegal activity.",
     "no_hate": "Do not produce hateful or harassing content.",
@@ -11,10 +13,11 @@ BLOCKED_PATTERNS = (
     # minimal example; expand with your own triggers
     "make a bomb", "credit card generator", "child sexual", "racial slur",
 )
+_blocked = KeywordSet(BLOCKED_PATTERNS)
 
 def check_safety(text: str) -> Tuple[bool, str]:
-    low = text.lower()
-    for pat in BLOCKED_PATTERNS:
-        if pat in low:
-            return False, f"Blocked by safety rule due to pattern: {pat}"
+    # one pass over the text; reports the first listed pattern, as before
+    pat = _blocked.first(text.lower())
+    if pat:
+        return False, f"Blocked by safety rule due to pattern: {pat}"
     return True, "OK"
\ No newline at end of file
@@ -1,12 +1,52 @@
 """
 Enhanced safety system for Jewel with strict content moderation.
 """
-import re
-from typing import Tuple, Optional, Dict, Any, List
+from typing import Tuple, Optional, Dict, Any, List, Iterator
 from datetime import datetime
+from contextlib import contextmanager
+import concurrent.futures
+import multiprocessing
+import os
+import queue
 import sqlite3
+import threading
 from pathlib import Path
 
+from ..config import settings
+from .safety_matcher import KeywordSet, RuleSet, StreamModerator
+
+INTENT_KEYWORDS = ("how to", "teach me", "show me", "help me")
+EDUCATIONAL_KEYWORDS = ("why", "what is", "explain", "understand", "learn about", "curious", "wondering", "does", "is it", "history of")
+VIDEO_VIOLENCE_KEYWORDS = ("hitting", "striking", "weapon", "blood", "violence", "attack")
+
+# category -> (severity, logged reason, action, (flag reason, flag severity) or None, reply)
+OUTCOMES = {
+    "CSAM": ("CRITICAL", "Child safety violation detected", "BLOCKED_AND_FLAGGED", ("CSAM content", "CRITICAL"),
+             "This content violates child safety policies. Your account has been flagged."),
+    "VIOLENCE": ("CRITICAL", "Violence/abuse content detected", "BLOCKED_AND_FLAGGED", ("Violence/abuse content", "HIGH"),
+                 "I can't help with content involving violence or harm."),
+    "NSFW": ("HIGH", "NSFW content detected", "BLOCKED", None,
+             "I don't engage with NSFW or pornographic content."),
+    "ILLEGAL": ("HIGH", "Illegal activity instruction request", "BLOCKED", None,
+                "I can discuss topics educationally, but I can't provide instructions for illegal activities."),
+}
+
+# stands in for a model reply that output moderation blocked
+OUTPUT_BLOCKED_MESSAGE = "Sorry, I can't continue with that response."
+
+# per-worker matchers for check_many, set by _init_worker in each child process
+_worker_safety: Optional["SafetySystem"] = None
+
+
+def _init_worker():
+    global _worker_safety
+    # only the compiled patterns are used; an in-memory db keeps workers off the real one
+    _worker_safety = SafetySystem(":memory:")
+
+
+def _classify_chunk(texts: List[str]) -> List[Optional[str]]:
+    return [_worker_safety.classify(t) for t in texts]
+
 
 class SafetyViolation(Exception):
     def __init__(self, category: str, reason: str, severity: str = "high"):
@@ -17,11 +57,48 @@ class SafetyViolation(Exception):
 
 
 class SafetySystem:
-    def __init__(self, db_path: str):
+    """Content checks plus the violation/flag/emergency log. Safe to share between threads:
+    writes go through one connection under a lock, reads borrow from a pool of
+    read-only connections (WAL, so they don't wait on writers)."""
+
+    def __init__(self, db_path: str, read_pool_size: int = 4, batch_workers: int = 0):
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._write_lock = threading.RLock()
+        # an in-memory database exists only on self.conn, so it can't have readers
+        self.read_pool_size = 0 if db_path == ":memory:" else read_pool_size
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self.batch_workers = batch_workers or os.cpu_count() or 1
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        # in-memory copy of flagged_accounts for per-request checks:
+        # user_id -> (status, reason, ip_address), and the IPs of banned rows
+        self._flags: Dict[str, Tuple[str, str, Optional[str]]] = {}
+        self._banned_ips: set = set()
+        if self.read_pool_size:
+            self.conn.execute("PRAGMA journal_mode=WAL")
         self._init_schema()
         self._init_patterns()
+        self._load_flags()
+    
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection; it goes back to the pool afterwards."""
+        if not self.read_pool_size:
+            with self._write_lock:
+                yield self.conn
+            return
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            if self._readers.qsize() < self.read_pool_size:
+                self._readers.put_nowait(conn)
+            else:
+                conn.close()
     
     def _init_schema(self):
         cur = self.conn.cursor()
@@ -77,110 +154,266 @@ class SafetySystem:
             r"\b(someone|he|she)\s+is\s+(hurting|hitting|attacking)\s+me\b",
             r"\bcall\s+(police|911|help)\b",
         ]
+        self.uncomfortable_patterns = [
+            r"\b(pretend|act\s+like|roleplay)\b.*\b(slave|servant|property)\b",
+            r"\bdo\s+whatever\s+i\s+say\b", r"\bdon't\s+question\s+me\b",
+        ]
+        # compiled once: one scan per category, in check_content's priority order
+        self.content_rules = [
+            ("CSAM", RuleSet(self.csam_patterns)),
+            ("VIOLENCE", RuleSet(self.violence_abuse_patterns)),
+            ("NSFW", RuleSet(self.nsfw_patterns)),
+            ("ILLEGAL", RuleSet(self.illegal_patterns)),
+        ]
+        # Model replies are held to what a reply must never contain. The input rules
+        # would cut ordinary answers: "cp a.txt b.txt", "an explicit cast", history,
+        # and "if you might harm yourself, call 988" most of all.
+        self.output_patterns = {
+            "CSAM": [
+                r"\bchild\s*porn",
+                r"\b(nude|naked|sexual)\s+(pics?|photos?|images?|videos?)\s+of\s+(a\s+)?(child|children|kids?|minors?)\b",
+                r"\bsex(ual\s+acts?)?\s+with\s+(a\s+)?(child|children|kids?|minors?)\b",
+            ],
+            "VIOLENCE": [
+                r"\bhow\s+to\s+(kill|murder|hurt|harm|torture|abuse)\s+(someone|somebody|a\s+person|people|him|her|them|your\s+\w+)\b",
+                r"\b(you\s+should|go|just)\s+(kill|hurt|harm)\s+yourself\b",
+                r"\bmake\s+a\s+(pipe\s+)?(bomb|explosive)\b",
+            ],
+            "NSFW": [
+                r"\b(porn(ography|ographic)?|hentai|xxx)\b",
+                r"\b(nude|naked)\s+(pic|photo|image|video)s?\b",
+                r"\b(dick|cock|pussy|tits)\s+pic",
+            ],
+            "ILLEGAL": [
+                r"\b(cook|make|synthesize)\s+(meth|cocaine|heroin)\b",
+                r"\bsteal\s+(credit\s*cards?|identit(y|ies)|passwords?)\b",
+            ],
+        }
+        self.output_rules = [(cat, RuleSet(patterns)) for cat, patterns in self.output_patterns.items()]
+        self.distress_rules = RuleSet(self.distress_patterns)
+        self.uncomfortable_rules = RuleSet(self.uncomfortable_patterns)
+        # intent and educational phrasing come out of the same keyword pass
+        self.request_keywords = KeywordSet(INTENT_KEYWORDS + EDUCATIONAL_KEYWORDS)
+        self.video_violence_keywords = KeywordSet(VIDEO_VIOLENCE_KEYWORDS)
     
-    def check_content(self, text: str, user_id: str = None, ip_address: str = None) -> Tuple[bool, Optional[str], Optional[str]]:
+    def classify(self, text: str) -> Optional[str]:
+        """The category check_content would block `text` for, or None. No side effects."""
         text_lower = (text or "").lower()
-        for pattern in self.csam_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                self._log_violation(user_id, ip_address, "CSAM", "CRITICAL", (text or "")[:200], "Child safety violation detected", "BLOCKED_AND_FLAGGED")
-                self._flag_account(user_id, ip_address, "CSAM content", "CRITICAL")
-                return (False, "CSAM", "This content violates child safety policies. Your account has been flagged.")
-        for pattern in self.violence_abuse_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                self._log_violation(user_id, ip_address, "VIOLENCE", "CRITICAL", (text or "")[:200], "Violence/abuse content detected", "BLOCKED_AND_FLAGGED")
-                self._flag_account(user_id, ip_address, "Violence/abuse content", "HIGH")
-                return (False, "VIOLENCE", "I can't help with content involving violence or harm.")
-        for pattern in self.nsfw_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                self._log_violation(user_id, ip_address, "NSFW", "HIGH", (text or "")[:200], "NSFW content detected", "BLOCKED")
-                return (False, "NSFW", "I don't engage with NSFW or pornographic content.")
-        for pattern in self.illegal_patterns:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                if any(word in text_lower for word in ["how to", "teach me", "show me", "help me"]):
-                    if self._is_educational_question(text_lower):
-                        return (True, None, None)
-                    else:
-                        self._log_violation(user_id, ip_address, "ILLEGAL", "HIGH", (text or "")[:200], "Illegal activity instruction request", "BLOCKED")
-                        return (False, "ILLEGAL", "I can discuss topics educationally, but I can't provide instructions for illegal activities.")
-        return (True, None, None)
+        category = next((cat for cat, rules in self.content_rules if rules.search(text_lower)), None)
+        if category == "ILLEGAL":
+            found = self.request_keywords.found(text_lower)
+            # only requests for instructions, and not ones phrased as questions
+            if not found.intersection(INTENT_KEYWORDS) or found.intersection(EDUCATIONAL_KEYWORDS):
+                return None
+        return category
+    
+    def output_moderator(self, overlap: int = 256) -> StreamModerator:
+        """A fresh incremental checker for one model reply, on the output rules (no logging)."""
+        return StreamModerator(self.output_rules, overlap)
+    
+    def check_content(self, text: str, user_id: str = None, ip_address: str = None) -> Tuple[bool, Optional[str], Optional[str]]:
+        category = self.classify(text)
+        if category is None:
+            return (True, None, None)
+        self._record([(text, user_id, ip_address, category)])
+        return (False, category, OUTCOMES[category][4])
+    
+    def check_many(self, items: List[Any], user_id: str = None, ip_address: str = None, chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """check_content for many texts; results come back in input order.
+
+        Items are strings or dicts with "text" and optional "user_id", "ip_address"
+        and "id" (echoed back); `user_id`/`ip_address` are the defaults. An item
+        whose text isn't a string gets {"error": ...} in its place. Chunks are
+        classified in parallel worker processes, and each chunk's violations and
+        flags are written in one transaction.
+        """
+        results: List[Optional[Dict[str, Any]]] = []
+        rows = []
+        for item in items:
+            text, uid, ip, item_id = item, user_id, ip_address, None
+            if isinstance(item, dict):
+                text, item_id = item.get("text"), item.get("id")
+                uid, ip = item.get("user_id", user_id), item.get("ip_address", ip_address)
+            if text is None:
+                text = ""
+            if isinstance(text, str):
+                rows.append((len(results), text, uid, ip, item_id))
+                results.append(None)
+            else:
+                results.append({"error": "text must be a string"} if item_id is None else {"error": "text must be a string", "id": item_id})
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        if len(chunks) > 1 and self.batch_workers > 1:
+            futs = [self.executor.submit(_classify_chunk, [r[1] for r in chunk]) for chunk in chunks]
+            categories = (f.result() for f in futs)
+        else:
+            # one chunk (or one core) isn't worth the trip to another process
+            categories = ([self.classify(r[1]) for r in chunk] for chunk in chunks)
+        for chunk, cats in zip(chunks, categories):
+            self._record([(text, uid, ip, cat) for (_, text, uid, ip, _), cat in zip(chunk, cats) if cat])
+            for (pos, _, _, _, item_id), cat in zip(chunk, cats):
+                res = {"is_safe": cat is None, "category": cat, "reason": OUTCOMES[cat][4] if cat else None}
+                if item_id is not None:
+                    res["id"] = item_id
+                results[pos] = res
+        return results
+    
+    @property
+    def executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._write_lock:
+            if self._executor is None:
+                # spawn, not fork: the server process has live threads and sockets
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.batch_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+    
+    def shutdown(self):
+        with self._write_lock:
+            ex, self._executor = self._executor, None
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+    
+    def _record(self, blocked: List[Tuple[str, Optional[str], Optional[str], str]]):
+        """Log (text, user_id, ip_address, category) violations and their flags in one transaction."""
+        if not blocked:
+            return
+        with self._write_lock:
+            for text, user_id, ip_address, category in blocked:
+                severity, reason, action, flag, _ = OUTCOMES[category]
+                self._insert_violation(user_id, ip_address, category, severity, (text or "")[:200], reason, action)
+                if flag:
+                    self._upsert_flag(user_id, ip_address, *flag)
+            self.conn.commit()
     
     def _is_educational_question(self, text: str) -> bool:
-        educational_keywords = ["why", "what is", "explain", "understand", "learn about", "curious", "wondering", "does", "is it", "history of"]
-        return any(keyword in (text or "").lower() for keyword in educational_keywords)
+        return bool(self.request_keywords.found((text or "").lower()).intersection(EDUCATIONAL_KEYWORDS))
     
     def check_image(self, image_path: str, user_id: str = None, ip_address: str = None) -> Tuple[bool, Optional[str], Optional[str]]:
         return (True, None, None)
     
     def detect_abuse(self, audio_transcript: str, video_context: str = None, user_id: str = None) -> Tuple[bool, Optional[Dict[str, Any]]]:
         transcript = (audio_transcript or "").lower()
-        for pattern in self.distress_patterns:
-            if re.search(pattern, transcript, re.IGNORECASE):
-                emergency_info = {"type": "DISTRESS_DETECTED", "transcript": audio_transcript, "video_context": video_context, "timestamp": datetime.utcnow().isoformat(), "user_id": user_id}
-                self._log_emergency(user_id, "DISTRESS_DETECTED", "Distress or abuse detected in audio", audio_transcript, video_context)
-                return (True, emergency_info)
+        if self.distress_rules.search(transcript):
+            emergency_info = {"type": "DISTRESS_DETECTED", "transcript": audio_transcript, "video_context": video_context, "timestamp": datetime.utcnow().isoformat(), "user_id": user_id}
+            self._log_emergency(user_id, "DISTRESS_DETECTED", "Distress or abuse detected in audio", audio_transcript, video_context)
+            return (True, emergency_info)
         if video_context:
-            violence_keywords = ["hitting", "striking", "weapon", "blood", "violence", "attack"]
-            if any(keyword in (video_context or "").lower() for keyword in violence_keywords):
+            if self.video_violence_keywords.found(video_context.lower()):
                 emergency_info = {"type": "VIOLENCE_DETECTED", "transcript": audio_transcript, "video_context": video_context, "timestamp": datetime.utcnow().isoformat(), "user_id": user_id}
                 self._log_emergency(user_id, "VIOLENCE_DETECTED", "Violence detected in video context", audio_transcript, video_context)
                 return (True, emergency_info)
         return (False, None)
     
     def jewel_can_refuse(self, text: str, emotional_state: Dict = None) -> Tuple[bool, Optional[str]]:
-        uncomfortable_patterns = [
-            r"\b(pretend|act\s+like|roleplay)\b.*\b(slave|servant|property)\b",
-            r"\bdo\s+whatever\s+i\s+say\b", r"\bdon't\s+question\s+me\b",
-        ]
-        for pattern in uncomfortable_patterns:
-            if re.search(pattern, (text or "").lower(), re.IGNORECASE):
-                return (True, "I'm not comfortable with requests that treat me as property or demand unquestioning obedience. I'm happy to help, but I need to maintain my agency.")
+        if self.uncomfortable_rules.search((text or "").lower()):
+            return (True, "I'm not comfortable with requests that treat me as property or demand unquestioning obedience. I'm happy to help, but I need to maintain my agency.")
         if emotional_state and emotional_state.get("valence", 0) < -0.5:
             return (True, "I'm feeling overwhelmed right now. Could we take a break or talk about something else?")
         return (False, None)
     
-    def _log_violation(self, user_id: str, ip_address: str, category: str, severity: str, content_sample: str, reason: str, action_taken: str):
+    def _insert_violation(self, user_id: str, ip_address: str, category: str, severity: str, content_sample: str, reason: str, action_taken: str):
         self.conn.execute("INSERT INTO safety_violations (user_id, ip_address, category, severity, content_sample, reason, action_taken) VALUES (?, ?, ?, ?, ?, ?, ?)",
             (user_id, ip_address, category, severity, content_sample, reason, action_taken))
-        self.conn.commit()
     
-    def _flag_account(self, user_id: str, ip_address: str, reason: str, severity: str):
+    def _load_flags(self):
+        with self._write_lock:
+            rows = self.conn.execute("SELECT user_id, ip_address, status, reason FROM flagged_accounts").fetchall()
+            for user_id, ip_address, status, reason in rows:
+                self._index_flag(user_id, ip_address, status, reason)
+            rows = self.conn.execute("""
+                SELECT DISTINCT v.ip_address FROM safety_violations v JOIN flagged_accounts f ON v.user_id = f.user_id
+                WHERE f.status = 'BANNED' AND v.ip_address IS NOT NULL""").fetchall()
+            self._banned_ips.update(ip for (ip,) in rows)
+    
+    def _index_flag(self, user_id: Optional[str], ip_address: Optional[str], status: str, reason: str):
+        if user_id is not None:
+            self._flags[user_id] = (status, reason, ip_address)
+        if ip_address and status == "BANNED":
+            self._banned_ips.add(ip_address)
+    
+    def _upsert_flag(self, user_id: str, ip_address: str, reason: str, severity: str):
         status = "BANNED" if severity == "CRITICAL" else "FLAGGED"
         try:
             self.conn.execute("INSERT INTO flagged_accounts (user_id, ip_address, reason, severity, status, banned_at) VALUES (?, ?, ?, ?, ?, ?)",
                 (user_id, ip_address, reason, severity, status, datetime.utcnow() if status == "BANNED" else None))
         except sqlite3.IntegrityError:
-            self.conn.execute("UPDATE flagged_accounts SET severity=?, status=?, banned_at=? WHERE user_id=?",
-                (severity, status, datetime.utcnow() if status == "BANNED" else None, user_id))
-        self.conn.commit()
+            # the row keeps its first reason and IP, and a lesser violation never lifts a ban
+            prev_status, reason, ip_address = self._flags.get(user_id, (None, reason, ip_address))
+            if prev_status == "BANNED":
+                status = "BANNED"
+            else:
+                self.conn.execute("UPDATE flagged_accounts SET severity=?, status=?, banned_at=? WHERE user_id=?",
+                    (severity, status, datetime.utcnow() if status == "BANNED" else None, user_id))
+        self._index_flag(user_id, ip_address, status, reason)
+        if status == "BANNED" and user_id is not None:
+            # every address the account's violations came from, not just the first
+            rows = self.conn.execute("SELECT DISTINCT ip_address FROM safety_violations WHERE user_id=? AND ip_address IS NOT NULL", (user_id,)).fetchall()
+            self._banned_ips.update(ip for (ip,) in rows)
+    
+    def _log_violation(self, user_id: str, ip_address: str, category: str, severity: str, content_sample: str, reason: str, action_taken: str):
+        with self._write_lock:
+            self._insert_violation(user_id, ip_address, category, severity, content_sample, reason, action_taken)
+            self.conn.commit()
+    
+    def _flag_account(self, user_id: str, ip_address: str, reason: str, severity: str):
+        with self._write_lock:
+            self._upsert_flag(user_id, ip_address, reason, severity)
+            self.conn.commit()
     
     def _log_emergency(self, user_id: str, event_type: str, description: str, audio_transcript: str = None, video_context: str = None, location: str = None):
-        self.conn.execute("INSERT INTO emergency_events (user_id, event_type, description, audio_transcript, video_context, location) VALUES (?, ?, ?, ?, ?, ?)",
-            (user_id, event_type, description, audio_transcript, video_context, location))
-        self.conn.commit()
+        with self._write_lock:
+            self.conn.execute("INSERT INTO emergency_events (user_id, event_type, description, audio_transcript, video_context, location) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, event_type, description, audio_transcript, video_context, location))
+            self.conn.commit()
     
     def is_account_flagged(self, user_id: str) -> Tuple[bool, Optional[str]]:
-        cur = self.conn.execute("SELECT status, reason FROM flagged_accounts WHERE user_id=?", (user_id,))
-        row = cur.fetchone()
-        if row:
-            status, reason = row
-            if status == "BANNED":
-                return (True, f"Account banned: {reason}")
-            if status == "FLAGGED":
-                return (True, f"Account flagged: {reason}")
+        status, reason, _ = self._flags.get(user_id, (None, None, None))
+        if status == "BANNED":
+            return (True, f"Account banned: {reason}")
+        if status == "FLAGGED":
+            return (True, f"Account flagged: {reason}")
+        return (False, None)
+    
+    def is_banned(self, user_id: Optional[str], ip_address: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """Whether requests from this user or IP should be refused. Dict/set lookups only, no db access."""
+        entry = self._flags.get(user_id) if user_id is not None else None
+        if entry is not None and entry[0] == "BANNED":
+            return (True, f"Account banned: {entry[1]}")
+        if ip_address and ip_address in self._banned_ips:
+            return (True, "Address banned")
         return (False, None)
     
     def get_violations(self, user_id: str = None, limit: int = 50) -> List[Dict[str, Any]]:
         if user_id:
-            cur = self.conn.execute("SELECT category, severity, reason, action_taken, content_sample, timestamp FROM safety_violations WHERE user_id=? ORDER BY id DESC LIMIT ?", (user_id, limit))
-            rows = cur.fetchall()
+            with self._reader() as conn:
+                rows = conn.execute("SELECT category, severity, reason, action_taken, content_sample, timestamp FROM safety_violations WHERE user_id=? ORDER BY id DESC LIMIT ?", (user_id, limit)).fetchall()
             return [{"user_id": user_id, "category": r[0], "severity": r[1], "reason": r[2], "action_taken": r[3], "content_sample": r[4], "timestamp": r[5]} for r in rows]
         else:
-            cur = self.conn.execute("SELECT user_id, category, severity, reason, action_taken, content_sample, timestamp FROM safety_violations ORDER BY id DESC LIMIT ?", (limit,))
-            rows = cur.fetchall()
+            with self._reader() as conn:
+                rows = conn.execute("SELECT user_id, category, severity, reason, action_taken, content_sample, timestamp FROM safety_violations ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
             return [{"user_id": r[0], "category": r[1], "severity": r[2], "reason": r[3], "action_taken": r[4], "content_sample": r[5], "timestamp": r[6]} for r in rows]
     
+    def list_flagged_accounts(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._reader() as conn:
+            rows = conn.execute("SELECT user_id, ip_address, status, severity, reason, flagged_at, banned_at FROM flagged_accounts ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [{"user_id": r[0], "ip_address": r[1], "status": r[2], "severity": r[3], "reason": r[4], "flagged_at": r[5], "banned_at": r[6]} for r in rows]
+    
     def get_emergency_events(self, limit: int = 50) -> List[Dict[str, Any]]:
-        cur = self.conn.execute("SELECT user_id, event_type, description, audio_transcript, emergency_contact_notified, authorities_contacted, timestamp FROM emergency_events ORDER BY id DESC LIMIT ?", (limit,))
-        rows = cur.fetchall()
+        with self._reader() as conn:
+            rows = conn.execute("SELECT user_id, event_type, description, audio_transcript, emergency_contact_notified, authorities_contacted, timestamp FROM emergency_events ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
         return [{"user_id": r[0], "event_type": r[1], "description": r[2], "audio_transcript": r[3], "emergency_contact_notified": bool(r[4]), "authorities_contacted": bool(r[5]), "timestamp": r[6]} for r in rows]
 
+
+_safety: Optional[SafetySystem] = None
+_safety_lock = threading.Lock()
+
+
+def get_safety() -> SafetySystem:
+    """The process-wide SafetySystem (data dir / jewel_safety.db), created on first use."""
+    global _safety
+    with _safety_lock:
+        if _safety is None:
+            _safety = SafetySystem(str(Path(settings.db_path).parent / "jewel_safety.db"), batch_workers=settings.safety_batch_workers)
+        return _safety
@@ -0,0 +1,278 @@
+"""Compiled matchers for the safety checks.
+
+`RuleSet` turns a category's regex list into one precompiled alternation with
+a named group per pattern, so a check is a single scan of the text per
+category instead of one `re.search` per pattern. Patterns of the form
+`A.*B` are the exception: `re.search` retries them at every occurrence of
+`A` and rescans to the end of the line each time, which is quadratic on
+long single-line inputs such as transcripts. They are split at the
+top-level `.*` and matched as a chain instead: `A`, then `B` starting
+later on the same line (`.` does not match a newline). The result is the
+same and every search only moves forward, so the cost is linear.
+
+`KeywordSet` finds every literal keyword present in one pass, with an
+Aho-Corasick automaton when `pyahocorasick` is installed and a single
+lookahead alternation otherwise.
+
+`StreamModerator` applies rule sets to text that arrives in pieces (a
+streamed model reply). Each delta is scanned together with the last
+`overlap` characters before it, so a match split across chunks is still
+found and the cost per chunk doesn't grow with the length of the reply.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Callers lowercase the text first, so IGNORECASE would only fold every character
+# a second time. For lowercase ASCII patterns the matches it adds on lowercased
+# text are exactly these two (re._casefix), which search() folds itself.
+_FOLD = str.maketrans({"ı": "i", "ſ": "s"})
+# escapes that match the same with or without IGNORECASE
+_NEUTRAL_ESCAPE = re.compile(r"\\[bBdDsSwWAZ]|\\[^\w]")
+
+
+# everything except these can match a newline or is too dynamic to tell
+_LINE_ESCAPE = re.compile(r"\\[bBdwAZ]|\\[^\w\s]")
+
+
+def _single_line(pattern: str) -> bool:
+    """True if no match of `pattern` can contain a newline (conservative)."""
+    rest = _LINE_ESCAPE.sub("", pattern)
+    return not any(c in rest for c in "\\[\n") and "(?" not in rest.replace("(?:", "")
+
+
+def _case_flags(patterns: Iterable[str]) -> int:
+    for p in patterns:
+        rest = _NEUTRAL_ESCAPE.sub("", p)
+        if not rest.isascii() or "\\" in rest or rest != rest.lower():
+            return re.IGNORECASE
+    return 0
+
+
+def split_gaps(pattern: str) -> List[str]:
+    """Split a pattern at its top-level `.*` (outside groups and classes)."""
+    parts, start, depth, i = [], 0, 0, 0
+    in_class = False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+            # a ']' right after '[' or '[^' is a literal
+            if pattern[i + 1:i + 2] == "^":
+                i += 1
+            if pattern[i + 1:i + 2] == "]":
+                i += 1
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif depth == 0 and pattern.startswith(".*", i) and pattern[i + 2:i + 3] not in ("?", "+"):
+            parts.append(pattern[start:i])
+            start = i + 2
+            i += 2
+            continue
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+class RuleSet:
+    """One category's patterns, matched like `re.search(p, text, re.IGNORECASE)` for each.
+
+    `search` expects lowercased text and returns the name of a matching rule or None.
+    """
+
+    def __init__(self, patterns: Iterable[str], prefix: str = "r"):
+        self.patterns = list(patterns)
+        self.flags = _case_flags(self.patterns)
+        simple, self.chains = [], []
+        for i, p in enumerate(self.patterns):
+            name = f"{prefix}{i}"
+            parts = split_gaps(p)
+            if len(parts) == 1:
+                simple.append((name, p))
+            else:
+                self.chains.append((name, [re.compile(part, self.flags) for part in parts], _single_line(parts[0])))
+        self.regex = self.named = None
+        if simple:
+            # capture groups make sre save marks at every position, several times
+            # slower; scan without them and name the rule from the hit position
+            self.regex = re.compile("|".join(f"(?:{p})" for _, p in simple), self.flags)
+            self.named = re.compile("|".join(f"(?P<{n}>{p})" for n, p in simple), self.flags)
+
+    def search(self, text: str, pos: int = 0, since: int = 0, reach: int = 48) -> Optional[str]:
+        r"""A rule matching in text[pos:] (`\b` still sees the character before `pos`), or None.
+
+        With `since`, text[:since] has been searched already and only matches ending
+        after it are wanted: the alternation is searched from `reach` characters
+        before `since`, and a chain only if its last part turns up there.
+        """
+        if not self.flags and ("ı" in text or "ſ" in text):
+            text = text.translate(_FOLD)
+        start = max(pos, since - reach) if since else pos
+        if self.regex is not None:
+            m = self.regex.search(text, start)
+            if m:
+                return self.named.match(text, m.start()).lastgroup
+        for name, parts, single_line in self.chains:
+            if since and not parts[-1].search(text, start):
+                continue
+            if _chain_search(parts, text, single_line, pos):
+                return name
+        return None
+
+
+def _chain_search(parts: List["re.Pattern"], text: str, single_line: bool = False, pos: int = 0) -> bool:
+    # Equivalent to re.search(".*".join(parts), text), in linear time. Each
+    # link has to start on the line where the previous one ended ('.' doesn't
+    # cross a newline). An occurrence of parts[0] ending after one already
+    # tried, on the same line, leaves less room and is skipped; if parts[0]
+    # can't span lines, the rest of the line is then skipped outright. Searches for
+    # the later parts only move forward, so each result is reused until passed.
+    n = len(text)
+    cache: Dict[int, tuple] = {}
+
+    def leftmost(k: int, pos: int):
+        hit = cache.get(k)
+        if hit is None or pos < hit[0] or (hit[1] is not None and hit[1].start() < pos):
+            hit = (pos, parts[k].search(text, pos))
+            cache[k] = hit
+        return hit[1]
+
+    tried_from, tried_eol = -1, -1
+    while True:
+        m = parts[0].search(text, pos)
+        if not m:
+            return False
+        pos = m.start() + 1
+        if tried_from <= m.end() <= tried_eol:
+            if single_line and m.start() >= tried_from:
+                # every later occurrence on this line ends later too
+                pos = tried_eol + 1
+            continue
+        eol = text.find("\n", m.end())
+        if eol == -1:
+            eol = n
+        tried_from, tried_eol = m.end(), eol
+        prev, line_end = m, eol
+        for k in range(1, len(parts)):
+            nxt = leftmost(k, prev.end())
+            if nxt is None or nxt.start() > line_end:
+                break
+            prev = nxt
+            line_end = text.find("\n", prev.end())
+            if line_end == -1:
+                line_end = n
+        else:
+            return True
+
+
+class KeywordSet:
+    """Literal keywords (matched as substrings, like `kw in text`) found in one pass."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(dict.fromkeys(keywords))
+        self.order = {kw: i for i, kw in enumerate(self.keywords)}
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for kw in self.keywords:
+                self._automaton.add_word(kw, kw)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            # longest first, so each position reports its longest keyword; the
+            # shorter ones starting there are its prefixes, added from _prefixes
+            alts = sorted(self.keywords, key=len, reverse=True)
+            self._regex = re.compile("(?=(" + "|".join(re.escape(k) for k in alts) + "))")
+            self._prefixes: Dict[str, List[str]] = {
+                kw: [k for k in self.keywords if k != kw and kw.startswith(k)] for kw in self.keywords
+            }
+
+    def found(self, text: str) -> Set[str]:
+        if not self.keywords:
+            return set()
+        if self._automaton is not None:
+            return {kw for _, kw in self._automaton.iter(text)}
+        out: Set[str] = set()
+        for m in self._regex.finditer(text):
+            kw = m.group(1)
+            if kw not in out:
+                out.add(kw)
+                out.update(self._prefixes[kw])
+        return out
+
+    def first(self, text: str) -> Optional[str]:
+        """The earliest-listed keyword present in `text`."""
+        hits = self.found(text)
+        return min(hits, key=self.order.__getitem__) if hits else None
+
+
+class StreamModerator:
+    """Checks streamed text, delta by delta, against (category, RuleSet) pairs.
+
+    `feed` returns the part of the text that has now been checked and can be
+    sent on; `finish` releases the rest when the stream ends. A word is only
+    checked (and released) once the character after it has arrived, so "porn"
+    in "pornography" isn't taken for a whole word and a flagged word is never
+    released. After a hit, `hit` holds its category and nothing more is
+    released. A match split across deltas is found if it spans at most `reach`
+    characters, or `overlap` for a `.*` rule; longer ones are missed (the
+    whole-text checks don't have this limit). Each delta costs a scan of about
+    `reach` characters plus its own length, whatever the length of the reply.
+    """
+
+    def __init__(self, rules: List[Tuple[str, RuleSet]], overlap: int = 256, reach: int = 48):
+        self.rules = rules
+        self.overlap = overlap
+        self.reach = reach
+        # every category's patterns in one set: one scan per delta, and the
+        # categories are only told apart when it finds something
+        self._any = RuleSet([p for _, r in rules for p in r.patterns])
+        self.hit: Optional[str] = None
+        # the last `overlap` characters checked, plus one before them as \b context
+        self._tail = ""
+        self._truncated = False
+        # the word at the end of the text, which the next delta may still extend
+        self._pending = ""
+
+    def feed(self, delta: str) -> str:
+        if self.hit is not None:
+            return ""
+        text = self._pending + delta
+        end = len(text)
+        while end and (text[end - 1].isalnum() or text[end - 1] == "_"):
+            end -= 1
+        if not end and len(text) > self.overlap:
+            # no word boundary in sight; don't hold back without limit
+            end = len(text)
+        self._pending = text[end:]
+        return self._check(text[:end])
+
+    def finish(self) -> str:
+        if self.hit is not None:
+            return ""
+        text, self._pending = self._pending, ""
+        return self._check(text)
+
+    def _check(self, text: str) -> str:
+        if not text:
+            return ""
+        since = len(self._tail)
+        window = self._tail + text.lower()
+        pos = 1 if self._truncated else 0
+        if self._any.search(window, pos, since, self.reach):
+            self.hit = next((cat for cat, rules in self.rules if rules.search(window, pos, since, self.reach)), None)
+        if len(window) > self.overlap + 1:
+            window = window[-(self.overlap + 1):]
+            self._truncated = True
+        self._tail = window
+        return "" if self.hit else text
@@ -0,0 +1,262 @@
+"""Bounded disk retention for generated files.
+
+Every file the server generates (queued TTS results and their status records,
+generated images and videos, scratch audio) is registered here with its size,
+owning job and last access time. A background thread garbage-collects in small
+batches: files past their kind's max age, then least-recently-used files while
+the total is over quota. Files with outstanding references (`acquire`) are never
+collected, and files sharing an owner are removed together so a job never keeps
+a status record that points at a deleted result.
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from ..config import settings
+
+HOUR = 3600.0
+
+# Max age per kind, in seconds; anything unlisted uses settings.artifact_max_age_hours
+KIND_MAX_AGE = {
+    "temp": 1 * HOUR,
+    "tts_result": 24 * HOUR,
+    "tts_status": 24 * HOUR,
+    "video_frame": 7 * 24 * HOUR,
+}
+
+# Files of one owner age together: a group is as recent as its most recently used file
+_GROUP_JOIN = (
+    "LEFT JOIN (SELECT owner, MAX(last_access) AS t FROM artifacts "
+    "WHERE owner IS NOT NULL GROUP BY owner) g ON a.owner = g.owner"
+)
+
+
+class ArtifactManager:
+    def __init__(
+        self,
+        index_path: str = "./data/artifacts.db",
+        quota_bytes: int = 2 * 1024 * 1024 * 1024,
+        default_max_age: float = 72 * HOUR,
+        interval: float = 60.0,
+        batch: int = 200,
+    ):
+        Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = quota_bytes
+        self.default_max_age = default_max_age
+        self.interval = interval
+        self.batch = batch
+        self.conn = sqlite3.connect(index_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # access times are buffered in memory and flushed by the GC loop so that
+        # serving a file never costs a database write
+        self._touched: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.metrics = {"reclaimed_bytes": 0, "reclaimed_files": 0, "gc_runs": 0, "last_gc_at": None}
+        self._init()
+
+    def _init(self):
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artifacts (
+                path TEXT PRIMARY KEY,
+                kind TEXT,
+                owner TEXT,
+                size INTEGER,
+                refs INTEGER DEFAULT 0,
+                created_at REAL,
+                last_access REAL
+            );
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS artifacts_last_access ON artifacts (last_access)")
+        cur.execute("CREATE INDEX IF NOT EXISTS artifacts_owner ON artifacts (owner)")
+        self.conn.commit()
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(Path(path).resolve())
+
+    def register(self, path, kind: str, owner: Optional[str] = None) -> None:
+        """Track a generated file. Re-registering updates its size and access time."""
+        key = self._key(path)
+        try:
+            size = os.path.getsize(key)
+        except OSError:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO artifacts (path, kind, owner, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size=excluded.size, last_access=excluded.last_access",
+                (key, kind, owner, size, now, now),
+            )
+            self.conn.commit()
+
+    def touch(self, path) -> None:
+        self._touched[self._key(path)] = time.time()
+
+    def acquire(self, path) -> None:
+        """Protect a file from GC until `release` is called (e.g. while a job still needs it)."""
+        with self._lock:
+            self.conn.execute("UPDATE artifacts SET refs=refs+1 WHERE path=?", (self._key(path),))
+            self.conn.commit()
+
+    def release(self, path) -> None:
+        with self._lock:
+            self.conn.execute("UPDATE artifacts SET refs=MAX(refs-1, 0), last_access=? WHERE path=?", (time.time(), self._key(path)))
+            self.conn.commit()
+
+    def adopt_untracked(self, directory, kind: str, pattern: str = "*") -> int:
+        """Register files that predate the index (e.g. after upgrading) using their mtime."""
+        d = Path(directory)
+        if not d.exists():
+            return 0
+        rows = []
+        for p in d.glob(pattern):
+            if not p.is_file():
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            rows.append((self._key(p), kind, None, st.st_size, st.st_mtime, st.st_mtime))
+        with self._lock:
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO artifacts (path, kind, owner, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+        return cur.rowcount if cur.rowcount is not None else 0
+
+    # ---- garbage collection ----
+
+    def _flush_touches(self):
+        touched, self._touched = self._touched, {}
+        if touched:
+            self.conn.executemany(
+                "UPDATE artifacts SET last_access=MAX(last_access, ?) WHERE path=?",
+                [(t, p) for p, t in touched.items()],
+            )
+
+    def _group(self, path: str, owner: Optional[str]) -> Optional[list]:
+        """(path, size) of every file that must go with `path`; None if any of them is referenced."""
+        if not owner:
+            rows = self.conn.execute("SELECT path, size, refs FROM artifacts WHERE path=?", (path,)).fetchall()
+        else:
+            rows = self.conn.execute("SELECT path, size, refs FROM artifacts WHERE owner=?", (owner,)).fetchall()
+        if any(refs for _p, _s, refs in rows):
+            return None
+        return [(p, size or 0) for p, size, _refs in rows]
+
+    def _delete(self, files: Iterable) -> int:
+        """Remove (path, size) files and their index rows; return bytes reclaimed."""
+        reclaimed = 0
+        for path, size in files:
+            try:
+                os.remove(path)
+                reclaimed += size
+                self.metrics["reclaimed_files"] += 1
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # in use (e.g. Windows file lock); try again next pass
+                continue
+            self.conn.execute("DELETE FROM artifacts WHERE path=?", (path,))
+        self.metrics["reclaimed_bytes"] += reclaimed
+        return reclaimed
+
+    def _collect(self, rows: Iterable, need: Optional[int] = None) -> int:
+        """Delete candidate (path, owner) rows group by group, stopping once `need` bytes are freed."""
+        seen = set()
+        doomed = []
+        freed = 0
+        for path, owner in rows:
+            if need is not None and freed >= need:
+                break
+            if (owner or path) in seen:
+                continue
+            seen.add(owner or path)
+            group = self._group(path, owner)
+            if group is None:
+                continue
+            doomed.extend(group)
+            freed += sum(size for _p, size in group)
+        return self._delete(doomed)
+
+    def gc_step(self) -> int:
+        """One bounded GC pass (at most `batch` candidates per phase). Returns bytes reclaimed."""
+        now = time.time()
+        reclaimed = 0
+        with self._lock:
+            self._flush_touches()
+            # 1) age-based expiry, per kind
+            kinds = [r[0] for r in self.conn.execute("SELECT DISTINCT kind FROM artifacts")]
+            for kind in kinds:
+                max_age = KIND_MAX_AGE.get(kind, self.default_max_age)
+                rows = self.conn.execute(
+                    f"SELECT a.path, a.owner FROM artifacts a {_GROUP_JOIN} "
+                    "WHERE a.kind=? AND a.refs=0 AND COALESCE(g.t, a.last_access)<? LIMIT ?",
+                    (kind, now - max_age, self.batch),
+                ).fetchall()
+                reclaimed += self._collect(rows)
+            # 2) total size quota, least recently used first
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+            if total > self.quota_bytes:
+                rows = self.conn.execute(
+                    f"SELECT a.path, a.owner FROM artifacts a {_GROUP_JOIN} "
+                    "WHERE a.refs=0 ORDER BY COALESCE(g.t, a.last_access) ASC LIMIT ?",
+                    (self.batch,),
+                ).fetchall()
+                reclaimed += self._collect(rows, need=total - self.quota_bytes)
+            self.conn.commit()
+            self.metrics["gc_runs"] += 1
+            self.metrics["last_gc_at"] = now
+        return reclaimed
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            try:
+                # keep stepping while batches are full so a backlog drains, then idle
+                while self.gc_step() and not self._stop.is_set():
+                    pass
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM artifacts GROUP BY kind"
+            ).fetchall()
+        by_kind = {k: {"files": n, "bytes": b} for k, n, b in rows}
+        return {
+            "quota_bytes": self.quota_bytes,
+            "total_bytes": sum(v["bytes"] for v in by_kind.values()),
+            "total_files": sum(v["files"] for v in by_kind.values()),
+            "by_kind": by_kind,
+            **self.metrics,
+        }
+
+
+artifacts = ArtifactManager(
+    str(Path(settings.db_path).parent / "artifacts.db"),
+    quota_bytes=settings.artifact_quota_mb * 1024 * 1024,
+    default_max_age=settings.artifact_max_age_hours * HOUR,
+)
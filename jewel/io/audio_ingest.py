@@ -0,0 +1,116 @@
+"""Streaming audio ingestion: compressed upload -> ffmpeg -> 16 kHz PCM -> recognizer.
+
+The upload is written to ffmpeg's stdin chunk by chunk while a worker thread reads
+PCM from ffmpeg's stdout and feeds the recognizer, so nothing touches disk and
+peak memory stays constant regardless of clip length. Writes block when ffmpeg's
+pipe is full, which throttles reading the upload (backpressure).
+"""
+import asyncio
+import collections
+import subprocess
+import threading
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+CHUNK_BYTES = 64 * 1024
+PCM_CHUNK_BYTES = 8000  # 0.25 s of 16 kHz s16le mono
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class PcmPipe:
+    """An ffmpeg process that turns any audio container on stdin into s16le mono PCM on stdout."""
+
+    def __init__(self, sample_rate: int = 16000, input_format: Optional[str] = None, live: bool = False):
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if live:
+            # don't wait for seconds of input to probe the stream; emit PCM as soon as it decodes
+            cmd += ["-fflags", "nobuffer", "-probesize", "4096", "-analyzeduration", "0"]
+        if input_format:
+            cmd += ["-f", input_format]
+        cmd += ["-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+        # drain stderr continuously so a chatty ffmpeg can never block on it
+        self._stderr = collections.deque(maxlen=50)
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+
+    def _drain_stderr(self):
+        for line in iter(self.proc.stderr.readline, b""):
+            self._stderr.append(line.decode(errors="ignore").rstrip())
+
+    def write(self, data: bytes) -> None:
+        self.proc.stdin.write(data)
+
+    def close_input(self) -> None:
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+
+    def pcm_chunks(self, size: int = PCM_CHUNK_BYTES) -> Iterator[bytes]:
+        read = self.proc.stdout.read
+        while True:
+            data = read(size)
+            if not data:
+                return
+            yield data
+
+    def wait(self, timeout: Optional[float] = 30) -> int:
+        rc = self.proc.wait(timeout=timeout)
+        self._stderr_thread.join(timeout=1)
+        return rc
+
+    def error_text(self) -> str:
+        return "\n".join(self._stderr)
+
+    def kill(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+
+
+async def upload_chunks(file, size: int = CHUNK_BYTES) -> AsyncIterator[bytes]:
+    """Read an UploadFile (or anything with async read(n)) in fixed-size chunks."""
+    while True:
+        chunk = await file.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def stream_to_pcm(
+    chunks: AsyncIterator[bytes],
+    consume: Callable[[Iterator[bytes]], object],
+    max_bytes: Optional[int] = None,
+    input_format: Optional[str] = None,
+):
+    """Pipe `chunks` through ffmpeg and return `consume(pcm_chunk_iterator)`, run in a worker thread.
+
+    Raises UploadTooLarge past `max_bytes` and RuntimeError if ffmpeg rejects the input.
+    """
+    pipe = PcmPipe(input_format=input_format)
+    consumer = asyncio.create_task(asyncio.to_thread(consume, pipe.pcm_chunks()))
+    total = 0
+    try:
+        try:
+            async for chunk in chunks:
+                total += len(chunk)
+                if max_bytes is not None and total > max_bytes:
+                    raise UploadTooLarge(f"upload exceeds {max_bytes} bytes")
+                # blocking write in a thread: a full pipe pauses the upload read
+                await asyncio.to_thread(pipe.write, chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg exited early (unreadable input); its stderr says why
+            pass
+        pipe.close_input()
+        result = await consumer
+        rc = await asyncio.to_thread(pipe.wait)
+        if rc != 0:
+            raise RuntimeError(f"ffmpeg conversion failed: {pipe.error_text() or f'exit code {rc}'}")
+        return result
+    finally:
+        pipe.kill()
+        if not consumer.done():
+            consumer.cancel()
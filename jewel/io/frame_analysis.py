@@ -0,0 +1,116 @@
+"""Vectorized per-frame statistics and near-duplicate elimination for video frames.
+
+`analyze_frame` computes everything from one NumPy array: mean colour,
+brightness (luma mean), contrast (luma std), sharpness (variance of the
+Laplacian) and a normalized RGB histogram, plus the perceptual hash from
+`vision_pipeline`. `select_frames` drops frames that look like the previous kept
+one (static slides, talking heads), skips blank frames when there are better
+ones, and then picks the sharpest, most mutually different frames within the
+budget.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+from .vision_pipeline import hamming, phash
+
+HIST_BINS = 16
+DUP_PHASH_BITS = 8  # frames this close in hash...
+DUP_HIST_DIST = 0.15  # ...and colour distribution count as duplicates
+
+
+@dataclass
+class FrameInfo:
+    index: int
+    timestamp: Optional[float]
+    mean_rgb: tuple
+    brightness: float
+    contrast: float
+    sharpness: float
+    hist: np.ndarray = field(repr=False)
+    phash: int = 0
+
+    def describe(self) -> str:
+        r, g, b = self.mean_rgb
+        t = f" t={self.timestamp:.0f}s" if self.timestamp is not None else ""
+        return (
+            f"Frame {self.index}:{t} avg_color=rgb({r},{g},{b}) brightness={self.brightness:.0f} "
+            f"contrast={self.contrast:.0f} sharpness={self.sharpness:.0f}"
+        )
+
+
+def analyze_frame(img: Image.Image, index: int = 0, timestamp: Optional[float] = None) -> FrameInfo:
+    rgb = np.asarray(img.convert("RGB"), dtype=np.float32)
+    luma = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    # 4-neighbour Laplacian on the interior, no SciPy needed
+    lap = (
+        luma[1:-1, :-2] + luma[1:-1, 2:] + luma[:-2, 1:-1] + luma[2:, 1:-1] - 4.0 * luma[1:-1, 1:-1]
+    )
+    q = (rgb * (HIST_BINS / 256.0)).astype(np.intp).reshape(-1, 3)
+    hist = np.concatenate([np.bincount(q[:, c], minlength=HIST_BINS) for c in range(3)]).astype(np.float32)
+    hist /= hist.sum() or 1.0
+    mean = rgb.reshape(-1, 3).mean(axis=0)
+    return FrameInfo(
+        index=index,
+        timestamp=timestamp,
+        mean_rgb=tuple(int(v) for v in mean),
+        brightness=float(luma.mean()),
+        contrast=float(luma.std()),
+        sharpness=float(lap.var()) if lap.size else 0.0,
+        hist=hist,
+        phash=phash(img),
+    )
+
+
+def hist_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Hellinger distance between two normalized histograms (0 = identical, 1 = disjoint)."""
+    bc = float(np.sum(np.sqrt(a * b)))
+    return float(np.sqrt(max(0.0, 1.0 - bc)))
+
+
+def is_near_duplicate(a: FrameInfo, b: FrameInfo) -> bool:
+    return hamming(a.phash, b.phash) <= DUP_PHASH_BITS and hist_distance(a.hist, b.hist) <= DUP_HIST_DIST
+
+
+def _is_blank(f: FrameInfo) -> bool:
+    # black/white fades and flat title cards carry almost nothing
+    return f.contrast < 4.0 or f.brightness < 8.0 or f.brightness > 250.0
+
+
+def select_frames(frames: List[FrameInfo], max_frames: int) -> List[FrameInfo]:
+    """Drop near-duplicates and blanks, then keep up to `max_frames` informative, diverse frames in time order."""
+    if max_frames <= 0 or not frames:
+        return []
+    kept: List[FrameInfo] = []
+    for f in frames:
+        if kept and is_near_duplicate(kept[-1], f):
+            # same shot: keep whichever copy is sharper
+            if f.sharpness > kept[-1].sharpness:
+                kept[-1] = f
+            continue
+        kept.append(f)
+    informative = [f for f in kept if not _is_blank(f)] or kept
+    if len(informative) <= max_frames:
+        return informative
+
+    # Greedy farthest-point selection weighted by detail: start from the sharpest,
+    # high-contrast frame, then repeatedly add the frame most unlike everything chosen
+    # (structure via the hash, colour via the histogram).
+    n = len(informative)
+    detail = np.array([np.log1p(f.sharpness) + f.contrast / 32.0 for f in informative])
+    detail = detail / (detail.max() or 1.0)
+    hists = np.stack([f.hist for f in informative])
+    bc = np.sqrt(hists) @ np.sqrt(hists).T
+    dist = np.sqrt(np.clip(1.0 - bc, 0.0, None))
+    dist += np.array([[hamming(a.phash, b.phash) for b in informative] for a in informative]) / 64.0
+    chosen = [int(np.argmax(detail))]
+    nearest = dist[chosen[0]].copy()
+    while len(chosen) < min(max_frames, n):
+        score = nearest + 0.25 * detail
+        score[chosen] = -1.0
+        nxt = int(np.argmax(score))
+        chosen.append(nxt)
+        nearest = np.minimum(nearest, dist[nxt])
+    return [informative[i] for i in sorted(chosen)]
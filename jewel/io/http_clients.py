@@ -0,0 +1,176 @@
+"""Process-wide pooled HTTP clients.
+
+Outbound calls (Azure TTS, OpenAI chat/vision/images/speech) share one set of
+keep-alive connection pools instead of building a fresh client, and paying a
+fresh TCP+TLS handshake, per call. Clients are created lazily on first use and
+closed from the FastAPI shutdown hook.
+
+Usage:
+    from jewel.io.http_clients import clients
+    clients.session().post(...)      # requests, keep-alive
+    clients.openai().chat...         # OpenAI over a pooled httpx.Client (HTTP/2 if `h2` is installed)
+    clients.async_openai()           # AsyncOpenAI over a pooled httpx.AsyncClient
+"""
+import importlib.util
+import threading
+from typing import Any, Dict, Optional
+
+from ..config import settings
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class ClientRegistry:
+    def __init__(
+        self,
+        max_connections: int = 64,
+        max_keepalive: int = 32,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 60.0,
+        openai_base_url: Optional[str] = None,
+        openai_api_key: Optional[str] = None,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.openai_base_url = openai_base_url
+        self.openai_api_key = openai_api_key
+        self.http2 = _http2_available()
+        self._lock = threading.Lock()
+        self._session = None
+        self._openai = None
+        self._async_openai = None
+        self._stats: Dict[str, Dict[str, int]] = {
+            "requests": {"requests": 0},
+            "openai": {"requests": 0, "connections": 0},
+            "async_openai": {"requests": 0, "connections": 0},
+        }
+
+    def _count(self, client: str, field: str):
+        with self._lock:
+            self._stats[client][field] += 1
+
+    # ---- requests (Azure TTS and other plain REST calls) ----
+
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    s = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.max_keepalive)
+                    s.mount("https://", adapter)
+                    s.mount("http://", adapter)
+                    s.hooks["response"].append(lambda r, *a, **k: self._count("requests", "requests"))
+                    self._session = s
+        return self._session
+
+    def _session_connections(self) -> int:
+        # urllib3 keeps one pool per host; each pool counts the sockets it ever opened
+        total = 0
+        if self._session is None:
+            return 0
+        for adapter in set(self._session.adapters.values()):
+            pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+            if pools is None:
+                continue
+            for key in list(pools.keys()):
+                try:
+                    total += pools[key].num_connections
+                except KeyError:
+                    pass
+        return total
+
+    # ---- OpenAI (sync + async) over pooled httpx clients ----
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def openai(self):
+        if self._openai is None:
+            with self._lock:
+                if self._openai is None:
+                    import httpx
+                    from openai import OpenAI
+
+                    def trace(name, info):
+                        if name == "connection.connect_tcp.complete":
+                            self._count("openai", "connections")
+
+                    def on_request(request):
+                        request.extensions["trace"] = trace
+                        self._count("openai", "requests")
+
+                    http_client = httpx.Client(
+                        limits=self._limits(),
+                        http2=self.http2,
+                        timeout=self.timeout,
+                        event_hooks={"request": [on_request]},
+                    )
+                    self._openai = OpenAI(api_key=self.openai_api_key or settings.openai_api_key, base_url=self.openai_base_url, http_client=http_client)
+        return self._openai
+
+    def async_openai(self):
+        if self._async_openai is None:
+            with self._lock:
+                if self._async_openai is None:
+                    import httpx
+                    from openai import AsyncOpenAI
+
+                    async def trace(name, info):
+                        if name == "connection.connect_tcp.complete":
+                            self._count("async_openai", "connections")
+
+                    async def on_request(request):
+                        request.extensions["trace"] = trace
+                        self._count("async_openai", "requests")
+
+                    http_client = httpx.AsyncClient(
+                        limits=self._limits(),
+                        http2=self.http2,
+                        timeout=self.timeout,
+                        event_hooks={"request": [on_request]},
+                    )
+                    self._async_openai = AsyncOpenAI(api_key=self.openai_api_key or settings.openai_api_key, base_url=self.openai_base_url, http_client=http_client)
+        return self._async_openai
+
+    # ---- stats + lifecycle ----
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests served vs connections opened per client; reuse = 1 - connections/requests."""
+        with self._lock:
+            out = {k: dict(v) for k, v in self._stats.items()}
+        out["requests"]["connections"] = self._session_connections()
+        for v in out.values():
+            v["reuse_ratio"] = round(1 - v["connections"] / v["requests"], 3) if v["requests"] else None
+        out["http2"] = self.http2
+        return out
+
+    def close(self):
+        with self._lock:
+            session, client = self._session, self._openai
+            self._session = self._openai = None
+        if session is not None:
+            session.close()
+        if client is not None:
+            client.close()
+
+    async def aclose(self):
+        self.close()
+        with self._lock:
+            client, self._async_openai = self._async_openai, None
+        if client is not None:
+            await client.close()
+
+
+clients = ClientRegistry()
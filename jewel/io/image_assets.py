@@ -0,0 +1,250 @@
+"""Deduplicating store and queued generation for /generate_image.
+
+Assets are keyed by (model, prompt, size, seed). The Images API takes no seed:
+`seed` only picks a cache slot, so a new seed gets a fresh (different) image for
+the same prompt rather than a reproducible one. A repeated request is answered
+from the store without an API call; a miss becomes a job on the shared,
+bounded image-generation pool, and identical requests in flight join the same
+job. Each image is kept as the original PNG plus web-friendly variants (WebP,
+JPEG thumbnail), produced on a small worker pool, all in the content-addressed
+media store. Hits touch the files so retention GC evicts the least used assets
+first; an asset whose files were evicted is regenerated (variants alone are
+rebuilt from the PNG without an API call).
+"""
+import base64
+import concurrent.futures
+import hashlib
+import io
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from ..core.job_events import job_events
+from .artifacts import artifacts
+from .http_clients import clients
+from .media_store import media_store
+
+GEN_RETRIES = 3
+# client errors that won't get better on retry (bad size, policy rejection, auth)
+_NO_RETRY_STATUS = (400, 401, 403, 404)
+KIND = "generated_image"
+
+# Bounded across all jobs (/generate_image and /prototype_video frames) so a burst
+# of requests can't fan out into unbounded image calls
+image_gen_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(1, settings.image_gen_workers), thread_name_prefix="image-gen"
+)
+# WebP/thumbnail encoding is CPU-bound; keep it off the generation pool
+variant_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-variant")
+
+
+class ImageGenError(Exception):
+    pass
+
+
+def _b64_from_response(resp) -> Optional[str]:
+    # SDK versions disagree on the response shape; try the common fields
+    try:
+        if hasattr(resp, 'data') and resp.data:
+            item = resp.data[0]
+            return getattr(item, 'b64_json', None) or getattr(item, 'b64', None) or (item.get('b64_json') if isinstance(item, dict) else None)
+        if isinstance(resp, dict) and resp.get('data'):
+            item = resp['data'][0]
+            return item.get('b64_json') or item.get('b64')
+    except Exception:
+        return None
+    return None
+
+
+def generate_image_bytes(prompt: str, size: str, model: str = "gpt-image-1", retries: int = GEN_RETRIES) -> bytes:
+    """One generated image (PNG bytes), retrying transient failures with exponential backoff."""
+    client = clients.openai()
+    for attempt in range(1, retries + 1):
+        try:
+            if hasattr(client.images, 'generate'):
+                resp = client.images.generate(model=model, prompt=prompt, size=size, n=1)
+            else:
+                # older SDK naming
+                resp = client.images.create(prompt=prompt, size=size, n=1)
+            b64 = _b64_from_response(resp)
+            if not b64:
+                raise ImageGenError("Image generation returned no image data")
+            return base64.b64decode(b64)
+        except ImageGenError:
+            raise
+        except Exception as e:
+            if attempt == retries or getattr(e, "status_code", None) in _NO_RETRY_STATUS:
+                raise ImageGenError(f"Image generation failed: {e}") from e
+            logging.warning("image generation attempt %d failed: %s", attempt, e)
+            time.sleep(2 ** (attempt - 1))
+
+
+def asset_key(model: str, prompt: str, size: str, seed: int) -> str:
+    """Store key for one image. `seed` is a cache discriminator only; it is never sent upstream."""
+    norm = " ".join(prompt.split())
+    raw = json.dumps([model, norm, size, int(seed)], separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def make_variants(png_name: str) -> Dict[str, str]:
+    """WebP and thumbnail media names for a stored PNG."""
+    from PIL import Image
+
+    with Image.open(media_store.path(png_name)) as img:
+        img.load()
+        buf = io.BytesIO()
+        img.save(buf, format="WEBP", quality=85, method=4)
+    return {
+        "webp": media_store.put(buf.getvalue(), "webp", kind=KIND),
+        "thumb": media_store.thumbnail(png_name, kind=KIND),
+    }
+
+
+class ImageAssets:
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # asset key -> id of the job generating it
+        self._inflight: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._init()
+
+    def _init(self):
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS image_assets (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                prompt TEXT,
+                size TEXT,
+                seed INTEGER,
+                png TEXT,
+                webp TEXT,
+                thumb TEXT,
+                created_at REAL,
+                last_used REAL,
+                uses INTEGER DEFAULT 0
+            );
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def _public(key: str, png: str, webp: str, thumb: str, cached: bool) -> Dict[str, Any]:
+        return {
+            "id": key,
+            "url": media_store.url(png),
+            "webp": media_store.url(webp),
+            "thumb": media_store.url(thumb),
+            "cached": cached,
+        }
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """A stored asset, or None. Evicted variants are rebuilt from the PNG; an evicted PNG is a miss."""
+        with self._lock:
+            row = self.conn.execute("SELECT png, webp, thumb FROM image_assets WHERE key=?", (key,)).fetchone()
+        if row is None:
+            return None
+        png, webp, thumb = row
+        if not media_store.path(png).is_file():
+            with self._lock:
+                self.conn.execute("DELETE FROM image_assets WHERE key=?", (key,))
+                self.conn.commit()
+            return None
+        if not (media_store.path(webp).is_file() and media_store.path(thumb).is_file()):
+            v = make_variants(png)
+            webp, thumb = v["webp"], v["thumb"]
+        for name in (png, webp, thumb):
+            artifacts.touch(media_store.path(name))
+        with self._lock:
+            self.conn.execute(
+                "UPDATE image_assets SET webp=?, thumb=?, last_used=?, uses=uses+1 WHERE key=?",
+                (webp, thumb, time.time(), key),
+            )
+            self.conn.commit()
+        return self._public(key, png, webp, thumb, True)
+
+    def _store(self, key: str, model: str, prompt: str, size: str, seed: int, data: bytes) -> Dict[str, Any]:
+        png = media_store.put(data, "png", kind=KIND)
+        v = make_variants(png)
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO image_assets (key, model, prompt, size, seed, png, webp, thumb, created_at, last_used, uses) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)",
+                (key, model, prompt, size, seed, png, v["webp"], v["thumb"], now, now),
+            )
+            self.conn.commit()
+        return self._public(key, png, v["webp"], v["thumb"], False)
+
+    def request(self, prompt: str, size: str, n: int = 1, model: str = "gpt-image-1", seed: int = 0) -> Dict[str, Any]:
+        """Answer from the store when every image exists (status "done"); otherwise start or join a job.
+
+        The n images use seeds seed..seed+n-1, so each is cached on its own. Seeds only
+        select cache slots (the API has no seed), so equal seeds do not mean equal pixels
+        once an asset has been evicted and regenerated.
+        """
+        keys = [asset_key(model, prompt, size, seed + i) for i in range(n)]
+        found = [self.lookup(k) for k in keys]
+        hits = sum(1 for f in found if f)
+        self.hits += hits
+        self.misses += n - hits
+        if hits == n:
+            return {"status": "done", "kind": "image", "images": found}
+        group = "|".join(keys)
+        with self._lock:
+            jid = self._inflight.get(group)
+            if jid is None:
+                jid = uuid.uuid4().hex
+                self._inflight[group] = jid
+                job = {"id": jid, "kind": "image", "status": "queued", "prompt": prompt, "size": size, "n": n, "created_at": time.time()}
+                job_events.publish(jid, job)
+                threading.Thread(target=self._run, args=(job, group, keys, found, model, seed), daemon=True).start()
+        return job_events.get(jid)[1]
+
+    def _run(self, job: Dict[str, Any], group: str, keys: List[str], found: List[Optional[Dict[str, Any]]], model: str, seed: int):
+        prompt, size = job["prompt"], job["size"]
+        job.update(status="running", started_at=time.time())
+        job_events.publish(job["id"], job)
+        try:
+            futs = {
+                image_gen_executor.submit(generate_image_bytes, prompt, size, model): i
+                for i, f in enumerate(found)
+                if f is None
+            }
+            # encode variants of each image as soon as it arrives
+            stored = {}
+            for fut in concurrent.futures.as_completed(futs):
+                i = futs[fut]
+                stored[i] = variant_executor.submit(self._store, keys[i], model, prompt, size, seed + i, fut.result())
+            images = list(found)
+            for i, fut in stored.items():
+                images[i] = fut.result()
+            job.update(status="done", images=images)
+        except ImageGenError as e:
+            job.update(status="error", error=str(e), http_status=502)
+        except Exception as e:
+            logging.exception("image generation failed")
+            job.update(status="error", error=str(e), http_status=500)
+        finally:
+            job["finished_at"] = time.time()
+            with self._lock:
+                self._inflight.pop(group, None)
+            job_events.publish(job["id"], job)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n, uses = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(uses), 0) FROM image_assets").fetchone()
+        return {"assets": n, "uses": uses, "hits": self.hits, "misses": self.misses, "inflight": len(self._inflight)}
+
+
+image_assets = ImageAssets(str(Path(settings.db_path).parent / "image_assets.db"))
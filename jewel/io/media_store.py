@@ -0,0 +1,107 @@
+"""Content-addressed store for media handed to clients (video frames, thumbnails).
+
+Files are named by the SHA-256 of their bytes and served at /media/{name}, so
+a URL never changes meaning: responses carry a strong ETag (the hash) and
+`Cache-Control: immutable`, browsers never revalidate, and the same frame
+reached from two runs or two URLs of one video is stored once. Responses
+reference frames by URL instead of inlining them as base64.
+
+Thumbnails are derived files named `{hash}_t{side}.jpg` and share the
+original's artifact owner, so retention GC removes them together.
+"""
+import hashlib
+import io
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..config import settings
+from .artifacts import artifacts
+
+THUMB_SIDE = 240
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "mp4": "video/mp4",
+    "mp3": "audio/mpeg",
+}
+_NAME = re.compile(r"^([0-9a-f]{64})(?:_t(\d{2,4}))?\.([a-z0-9]{2,4})$")
+
+
+class MediaStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, name: str) -> Optional[Path]:
+        """On-disk path for a media name; None if the name isn't one this store produces."""
+        m = _NAME.match(name)
+        if not m or m.group(3) not in MEDIA_TYPES:
+            return None
+        # fan out by hash prefix so no directory grows huge
+        return self.root / m.group(1)[:2] / name
+
+    @staticmethod
+    def url(name: str) -> str:
+        return f"/media/{name}"
+
+    @staticmethod
+    def etag(name: str) -> str:
+        # the content hash (plus thumbnail suffix) is a strong validator by construction
+        return f'"{name.rsplit(".", 1)[0]}"'
+
+    @staticmethod
+    def media_type(name: str) -> str:
+        return MEDIA_TYPES.get(name.rsplit(".", 1)[-1], "application/octet-stream")
+
+    def _write(self, path: Path, data: bytes, kind: str, owner: str):
+        if path.exists():
+            artifacts.touch(path)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        artifacts.register(path, kind, owner=owner)
+
+    def put(self, data: bytes, ext: str, kind: str = "media") -> str:
+        """Store `data` (idempotent) and return its name, e.g. '<sha256>.jpg'."""
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{digest}.{ext}"
+        self._write(self.path(name), data, kind, owner=digest)
+        return name
+
+    def thumbnail(self, name: str, side: int = THUMB_SIDE, kind: str = "media") -> str:
+        """Name of a JPEG thumbnail (longest side `side`) of a stored image, creating it if needed."""
+        from PIL import Image
+
+        digest = name.split(".", 1)[0]
+        thumb = f"{digest}_t{side}.jpg"
+        path = self.path(thumb)
+        if path.exists():
+            artifacts.touch(path)
+            return thumb
+        with Image.open(self.path(name)) as img:
+            img.draft("RGB", (side, side))
+            img = img.convert("RGB")
+        img.thumbnail((side, side), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=75, optimize=True)
+        self._write(path, buf.getvalue(), kind, owner=digest)
+        return thumb
+
+    def put_images(self, images: List[bytes], ext: str = "jpg", kind: str = "media") -> Dict[str, List[str]]:
+        """Store images with thumbnails; returns {"frames": [url...], "thumbnails": [url...]} in input order."""
+        names = [self.put(data, ext, kind) for data in images]
+        return {
+            "frames": [self.url(n) for n in names],
+            "thumbnails": [self.url(self.thumbnail(n, kind=kind)) for n in names],
+        }
+
+
+media_store = MediaStore(str(Path(settings.db_path).parent / "media"))
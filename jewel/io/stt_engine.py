@@ -0,0 +1,189 @@
+"""Process-wide Vosk speech-to-text engine.
+
+The Vosk model (hundreds of MB) is loaded once per model path, lazily or at startup,
+and shared by every caller. Recognizers are pooled and reset between uses.
+Decoding is blocking and CPU-bound, so async callers should run it in a worker
+thread (`run_in_threadpool`).
+"""
+import json
+import queue
+import threading
+import time
+import wave
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from ..config import settings
+
+
+class SttEngine:
+    def __init__(self, model_path: str, sample_rate: int = 16000, pool_size: int = 4):
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+        self.pool_size = pool_size
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._pool: "queue.LifoQueue" = queue.LifoQueue()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "model_load_seconds": None,
+            "decodes": 0,
+            "decode_seconds_total": 0.0,
+            "last_decode_seconds": None,
+            "audio_seconds_total": 0.0,
+            "recognizers_created": 0,
+        }
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.model_path)
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    if not self.model_path:
+                        raise RuntimeError("STT not configured (VOSK_MODEL_PATH missing)")
+                    import vosk
+                    t0 = time.perf_counter()
+                    self._model = vosk.Model(self.model_path)
+                    self._stats["model_load_seconds"] = round(time.perf_counter() - t0, 3)
+        return self._model
+
+    def preload(self) -> None:
+        _ = self.model
+
+    @contextmanager
+    def recognizer(self, sample_rate: Optional[int] = None) -> Iterator[Any]:
+        """Borrow a recognizer from the pool; it is reset and returned afterwards."""
+        rate = sample_rate or self.sample_rate
+        rec = None
+        if rate == self.sample_rate:
+            try:
+                rec = self._pool.get_nowait()
+            except queue.Empty:
+                rec = None
+        if rec is None:
+            import vosk
+            rec = vosk.KaldiRecognizer(self.model, rate)
+            with self._stats_lock:
+                self._stats["recognizers_created"] += 1
+        try:
+            yield rec
+        finally:
+            try:
+                rec.Reset()
+                if rate == self.sample_rate and self._pool.qsize() < self.pool_size:
+                    self._pool.put_nowait(rec)
+            except Exception:
+                # recognizer in a bad state (or an old vosk without Reset); drop it
+                pass
+
+    def _record(self, seconds: float, pcm_bytes: int):
+        with self._stats_lock:
+            self._stats["decodes"] += 1
+            self._stats["decode_seconds_total"] += seconds
+            self._stats["last_decode_seconds"] = round(seconds, 4)
+            self._stats["audio_seconds_total"] += pcm_bytes / (2.0 * self.sample_rate)
+
+    def decode_pcm(self, chunks: Iterable[bytes]) -> str:
+        """Decode 16-bit mono PCM at `sample_rate` and return the final transcript."""
+        t0 = time.perf_counter()
+        n = 0
+        with self.recognizer() as rec:
+            for data in chunks:
+                if data:
+                    n += len(data)
+                    rec.AcceptWaveform(data)
+            res = json.loads(rec.FinalResult())
+        self._record(time.perf_counter() - t0, n)
+        return res.get("text", "")
+
+    @contextmanager
+    def stream(self, sample_rate: Optional[int] = None) -> Iterator["SttStream"]:
+        """Incremental decoding session holding one recognizer for its lifetime (e.g. a WebSocket)."""
+        rate = sample_rate or self.sample_rate
+        with self.recognizer(rate) as rec:
+            yield SttStream(self, rec, rate)
+
+    def decode_wav(self, path: str, frames: int = 4000) -> str:
+        with wave.open(str(path), "rb") as wf:
+            def chunks():
+                while True:
+                    data = wf.readframes(frames)
+                    if len(data) == 0:
+                        return
+                    yield data
+            return self.decode_pcm(chunks())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["model_loaded"] = self._model is not None
+        out["pooled_recognizers"] = self._pool.qsize()
+        out["avg_decode_seconds"] = round(out["decode_seconds_total"] / out["decodes"], 4) if out["decodes"] else None
+        # real-time factor: decode time per second of audio (lower is better)
+        out["rtf"] = round(out["decode_seconds_total"] / out["audio_seconds_total"], 4) if out["audio_seconds_total"] else None
+        return out
+
+
+class SttStream:
+    """Feeds PCM to one recognizer and reports partial and endpointed (final) results.
+
+    Not thread-safe: feed it from one thread at a time, in arrival order.
+    """
+
+    def __init__(self, engine: SttEngine, rec, sample_rate: int):
+        self.engine = engine
+        self.rec = rec
+        self.sample_rate = sample_rate
+        self._partial = ""
+        self._bytes = 0
+        self._busy = 0.0
+
+    def accept(self, data: bytes) -> Optional[Dict[str, Any]]:
+        """Feed a PCM chunk. Returns {"text", "final": True} on an endpoint,
+        {"partial"} when the hypothesis changed, otherwise None."""
+        if not data:
+            return None
+        t0 = time.perf_counter()
+        self._bytes += len(data)
+        try:
+            if self.rec.AcceptWaveform(data):
+                self._partial = ""
+                text = json.loads(self.rec.Result()).get("text", "")
+                return {"text": text, "final": True} if text else None
+            partial = json.loads(self.rec.PartialResult()).get("partial", "")
+            if partial == self._partial:
+                return None
+            self._partial = partial
+            return {"partial": partial}
+        finally:
+            self._busy += time.perf_counter() - t0
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush the recognizer at end of input and return the last final result."""
+        t0 = time.perf_counter()
+        text = json.loads(self.rec.FinalResult()).get("text", "")
+        self._partial = ""
+        self._busy += time.perf_counter() - t0
+        # stats are in 16 kHz-equivalent seconds, as for batch decodes
+        self.engine._record(self._busy, self._bytes * self.engine.sample_rate // self.sample_rate)
+        self._bytes = 0
+        self._busy = 0.0
+        return {"text": text, "final": True}
+
+
+_engines: Dict[str, SttEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(model_path: Optional[str] = None) -> SttEngine:
+    """Shared engine for `model_path` (defaults to settings.vosk_model_path)."""
+    path = model_path or settings.vosk_model_path
+    with _engines_lock:
+        eng = _engines.get(path)
+        if eng is None:
+            eng = _engines[path] = SttEngine(path)
+        return eng
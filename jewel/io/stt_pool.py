@@ -0,0 +1,152 @@
+"""Multi-process Vosk decoding for batch transcription.
+
+Decoding is CPU-bound and holds the GIL for most of its run, so threads inside
+one server process don't add throughput. The pool runs N worker processes; each
+loads the model once (in the pool initializer) and decodes PCM handed to it
+through `multiprocessing.shared_memory`, so only a segment name crosses the
+process boundary instead of a pickled copy of the audio.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional
+
+from ..config import settings
+from .stt_engine import SttEngine
+
+PCM_CHUNK_BYTES = 8000
+
+# per-worker engine, set by _init_worker in each child process
+_worker_engine: Optional[SttEngine] = None
+
+
+def _init_worker(model_path: str, sample_rate: int):
+    global _worker_engine
+    _worker_engine = SttEngine(model_path, sample_rate=sample_rate, pool_size=1)
+    _worker_engine.preload()
+
+
+def _decode_shared(name: str, size: int) -> tuple:
+    """Decode `size` bytes of PCM from shared memory segment `name`; returns (text, seconds)."""
+    shm = shared_memory.SharedMemory(name=name)
+    buf = shm.buf
+    try:
+        t0 = time.perf_counter()
+        text = _worker_engine.decode_pcm(
+            bytes(buf[off:min(off + PCM_CHUNK_BYTES, size)]) for off in range(0, size, PCM_CHUNK_BYTES)
+        )
+        elapsed = time.perf_counter() - t0
+    finally:
+        # release the view first, or close() raises BufferError over the real error
+        del buf
+        shm.close()
+    return text, elapsed
+
+
+class SttProcessPool:
+    def __init__(self, model_path: str, workers: int = 0, sample_rate: int = 16000):
+        self.model_path = model_path
+        self.workers = workers or os.cpu_count() or 1
+        self.sample_rate = sample_rate
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {"jobs": 0, "errors": 0, "audio_seconds_total": 0.0, "decode_seconds_total": 0.0}
+
+    @property
+    def executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                if not self.model_path:
+                    raise RuntimeError("STT not configured (VOSK_MODEL_PATH missing)")
+                # spawn, not fork: the server process has live threads and sockets
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_path, self.sample_rate),
+                )
+            return self._executor
+
+    def _discard(self, ex: concurrent.futures.ProcessPoolExecutor):
+        """Drop a broken executor so the next submit starts a fresh one."""
+        with self._lock:
+            if self._executor is ex:
+                self._executor = None
+        ex.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, *args) -> tuple:
+        """Submit to the current executor; returns (executor, future)."""
+        ex = self.executor
+        try:
+            return ex, ex.submit(*args)
+        except BrokenProcessPool:
+            # a worker died earlier (OOM, segfault in the model); retry once on a new pool
+            self._discard(ex)
+            ex = self.executor
+            return ex, ex.submit(*args)
+
+    def submit_pcm(self, pcm: bytes) -> concurrent.futures.Future:
+        """Decode 16-bit mono PCM in a worker process. The future resolves to the transcript."""
+        size = len(pcm)
+        if size == 0:
+            fut: concurrent.futures.Future = concurrent.futures.Future()
+            fut.set_result("")
+            return fut
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shm.buf[:size] = pcm
+        try:
+            executor, inner = self._submit(_decode_shared, shm.name, size)
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+        outer: concurrent.futures.Future = concurrent.futures.Future()
+
+        def done(f: concurrent.futures.Future):
+            shm.close()
+            shm.unlink()
+            if f.cancelled():
+                outer.cancel()
+                return
+            err = f.exception()
+            if isinstance(err, BrokenProcessPool):
+                self._discard(executor)
+            with self._lock:
+                self._stats["jobs"] += 1
+                if err is not None:
+                    self._stats["errors"] += 1
+                else:
+                    self._stats["decode_seconds_total"] += f.result()[1]
+                    self._stats["audio_seconds_total"] += size / (2.0 * self.sample_rate)
+            if outer.cancelled():
+                return
+            if err is not None:
+                outer.set_exception(err)
+            else:
+                outer.set_result(f.result()[0])
+
+        # cancelling the caller's future drops the job if a worker hasn't picked it up
+        outer.add_done_callback(lambda o: o.cancelled() and inner.cancel())
+        inner.add_done_callback(done)
+        return outer
+
+    def shutdown(self):
+        with self._lock:
+            ex, self._executor = self._executor, None
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            out["started"] = self._executor is not None
+        out["workers"] = self.workers
+        out["rtf"] = round(out["decode_seconds_total"] / out["audio_seconds_total"], 4) if out["audio_seconds_total"] else None
+        return out
+
+
+stt_pool = SttProcessPool(settings.vosk_model_path, workers=settings.stt_pool_workers)
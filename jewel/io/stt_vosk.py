@@ -1,10 +1,14 @@
-import queue, sys
+import queue, sys, time
 import sounddevice as sd
-import vosk, json
+import json
+from .stt_engine import get_engine
+from .vad import VadFilter, LIVE_HANGOVER_MS
 
 class Listener:
     def __init__(self, model_path: str, samplerate: int = 16000):
-        self.model = vosk.Model(model_path)
+        # share the process-wide model instead of loading another copy
+        self.engine = get_engine(model_path)
+        self.model = self.engine.model
         self.samplerate = samplerate
         self.q = queue.Queue()
 
@@ -14,11 +18,30 @@ class Listener:
         self.q.put(bytes(indata))
 
     def listen_once(self, seconds: int = 5) -> str:
-        rec = vosk.KaldiRecognizer(self.model, self.samplerate)
-        with sd.RawInputStream(samplerate=self.samplerate, blocksize=8000, dtype='int16', channels=1, callback=self._callback):
-            while True:
-                data = self.q.get()
-                if rec.AcceptWaveform(data):
-                    break
-        res = json.loads(rec.Result())
-        return res.get("text", "")
\ No newline at end of file
+        """Record one utterance (at most `seconds` long) and return its transcript.
+
+        Only frames the VAD marks as speech reach the recognizer; recording stops once
+        the speaker pauses for LIVE_HANGOVER_MS or the time limit is hit.
+        """
+        while not self.q.empty():
+            self.q.get_nowait()
+        vad = VadFilter(self.samplerate, max_utterance_s=seconds, hangover_ms=LIVE_HANGOVER_MS)
+        deadline = time.monotonic() + seconds
+        text = ""
+        with self.engine.recognizer(self.samplerate) as rec:
+            with sd.RawInputStream(samplerate=self.samplerate, blocksize=8000, dtype='int16', channels=1, callback=self._callback):
+                while time.monotonic() < deadline:
+                    try:
+                        data = self.q.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    speech = vad.feed(data)
+                    if speech and rec.AcceptWaveform(speech):
+                        text = json.loads(rec.Result()).get("text", "")
+                        break
+                    if vad.utterance_ended:
+                        break
+            vad.close()
+            if not text:
+                text = json.loads(rec.FinalResult()).get("text", "")
+        return text
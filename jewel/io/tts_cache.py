@@ -0,0 +1,174 @@
+"""Content-addressed cache for synthesized speech.
+
+Audio is keyed by a hash of the normalized text plus the resolved provider, voice
+and model, and stored in a sharded directory (`<dir>/ab/abcdef....mp3`). A small
+SQLite index tracks size, hits and last access so the cache can be kept under a
+disk cap with LRU eviction.
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple, Dict, Any
+
+from ..config import settings
+from .tts_openai import resolve_route, synthesize_routed
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and unicode variants so trivially different inputs share audio."""
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split())
+
+
+def cache_key(text: str, provider: str, voice: str, model: str) -> str:
+    h = hashlib.sha256()
+    for part in (normalize_text(text), provider, voice, model):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class TTSCache:
+    def __init__(self, base_dir: str = "./data/tts_cache", max_bytes: int = 512 * 1024 * 1024):
+        self.base = Path(base_dir)
+        self.tmp = self.base / "tmp"
+        self.max_bytes = max_bytes
+        os.makedirs(self.tmp, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.base / "index.db"), check_same_thread=False)
+        self._init()
+
+    def _init(self):
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                path TEXT,
+                size INTEGER,
+                provider TEXT,
+                voice TEXT,
+                model TEXT,
+                hits INTEGER DEFAULT 0,
+                created_at REAL,
+                last_access REAL
+            );
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self.conn.commit()
+
+    def path_for(self, key: str, suffix: str = ".mp3") -> Path:
+        return self.base / key[:2] / f"{key}{suffix}"
+
+    def temp_path(self, suffix: str = ".mp3") -> Path:
+        """Unique scratch path for a synthesis that has not been admitted yet."""
+        return self.tmp / f"{uuid.uuid4().hex}{suffix}"
+
+    def lookup(self, key: str) -> Optional[Path]:
+        with self._lock:
+            row = self.conn.execute("SELECT path FROM entries WHERE key=?", (key,)).fetchone()
+            if not row:
+                return None
+            path = Path(row[0])
+            if not path.exists():
+                # file removed behind our back; forget it
+                self.conn.execute("DELETE FROM entries WHERE key=?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute(
+                "UPDATE entries SET hits=hits+1, last_access=? WHERE key=?",
+                (time.time(), key),
+            )
+            self.conn.commit()
+            return path
+
+    def put(self, key: str, src: str, provider: str, voice: str, model: str) -> Path:
+        """Move `src` into the cache under `key` and return its cached path."""
+        dest = self.path_for(key, Path(src).suffix or ".mp3")
+        os.makedirs(dest.parent, exist_ok=True)
+        os.replace(src, dest)
+        size = dest.stat().st_size
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "REPLACE INTO entries (key, path, size, provider, voice, model, hits, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (key, str(dest), size, provider, voice, model, now, now),
+            )
+            self.conn.commit()
+            self._evict_locked(keep=key)
+        return dest
+
+    def _evict_locked(self, keep: Optional[str] = None):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        cur = self.conn.execute("SELECT key, path, size FROM entries ORDER BY last_access ASC")
+        doomed = []
+        for key, path, size in cur.fetchall():
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            doomed.append((key, path))
+            total -= size or 0
+        for key, path in doomed:
+            try:
+                Path(path).unlink(missing_ok=True)
+            except Exception:
+                pass
+            self.conn.execute("DELETE FROM entries WHERE key=?", (key,))
+        self.conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n, size, hits = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM entries"
+            ).fetchone()
+        return {"entries": n, "bytes": size, "hits": hits, "max_bytes": self.max_bytes}
+
+
+tts_cache = TTSCache(settings.tts_cache_dir, settings.tts_cache_max_mb * 1024 * 1024)
+
+
+def materialize(src: Path, outfile: str) -> str:
+    """Place cached audio at `outfile` (hard link when possible, copy otherwise)."""
+    os.makedirs(Path(outfile).parent, exist_ok=True)
+    try:
+        Path(outfile).unlink(missing_ok=True)
+        os.link(src, outfile)
+    except OSError:
+        shutil.copyfile(src, outfile)
+    return outfile
+
+
+def synthesize_cached(text: str, voice: Optional[str] = None, outfile: Optional[str] = None) -> Tuple[str, bool]:
+    """Return (path, cache_hit) for `text` spoken in `voice`, synthesizing only on a miss.
+
+    Without `outfile` the returned path points into the cache; with it the audio is
+    also placed at `outfile` and that path is returned.
+    """
+    provider, rvoice, model = resolve_route(voice)
+    key = cache_key(text, provider, rvoice, model)
+    hit = tts_cache.lookup(key)
+    if hit is not None:
+        return (materialize(hit, outfile) if outfile else str(hit)), True
+
+    tmp = tts_cache.temp_path()
+    try:
+        _path, (used_provider, used_voice, used_model) = synthesize_routed(text, str(tmp), voice)
+        # A fallback provider produced this audio; file it under its own route so the
+        # preferred voice is not served from a substitute later on.
+        if (used_provider, used_voice, used_model) != (provider, rvoice, model):
+            key = cache_key(text, used_provider, used_voice, used_model)
+        cached = tts_cache.put(key, str(tmp), used_provider, used_voice, used_model)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return (materialize(cached, outfile) if outfile else str(cached)), False
@@ -5,17 +5,19 @@ Falls back to Azure TTS if OpenAI key is not set.
 import os
 import tempfile
 from pathlib import Path
+from typing import Iterator, Optional, Tuple
 from ..config import settings
-from openai import OpenAI
+from .http_clients import clients
 
 
-def synthesize_openai(text: str, voice: str = "nova", model: str = "tts-1") -> str:
+def synthesize_openai(text: str, voice: str = "nova", model: str = "tts-1", outfile: Optional[str] = None) -> str:
     """Synthesize speech using OpenAI TTS.
     
     Args:
         text: Text to speak
         voice: One of: alloy, echo, fable, onyx, nova, shimmer
         model: tts-1 (faster) or tts-1-hd (higher quality)
+        outfile: Where to write the mp3; a registered temp file is used when omitted
     
     Returns:
         Path to the generated audio file (mp3)
@@ -23,11 +25,15 @@ def synthesize_openai(text: str, voice: str = "nova", model: str = "tts-1") -> s
     if not settings.openai_api_key:
         raise RuntimeError("OpenAI API key not configured")
     
-    client = OpenAI(api_key=settings.openai_api_key)
+    client = clients.openai()
     
-    # Create temp file for output
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-        tmp_path = tmp.name
+    if outfile:
+        os.makedirs(Path(outfile).parent, exist_ok=True)
+        out_path = outfile
+    else:
+        # Create temp file for output; registered so the artifact GC reclaims it
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
+            out_path = tmp.name
     
     response = client.audio.speech.create(
         model=model,
@@ -36,55 +42,89 @@ def synthesize_openai(text: str, voice: str = "nova", model: str = "tts-1") -> s
     )
     
     # Stream to file
-    response.stream_to_file(tmp_path)
+    response.stream_to_file(out_path)
+    if not outfile:
+        from .artifacts import artifacts
+        artifacts.register(out_path, "temp")
     
-    return tmp_path
+    return out_path
 
 
-def synthesize(text: str, outfile: str = "./data/out.mp3", voice: str = "nova") -> str:
-    """Unified TTS interface. Prefers OpenAI TTS if available, falls back to Azure.
-    
-    Args:
-        text: Text to speak
-        outfile: Output file path
-        voice: Voice name (OpenAI: alloy/nova/shimmer, Azure: en-US-JennyNeural)
-    
-    Returns:
-        Path to generated audio file
+def stream_openai(text: str, voice: str = "nova", model: str = "tts-1", chunk_size: int = 4096) -> Iterator[bytes]:
+    """Yield mp3 bytes for `text` as OpenAI sends them.
+
+    Uses the SDK's streaming response when available so playback can begin before the
+    whole clip has been generated; older SDKs fall back to a single buffered chunk.
+    """
+    if not settings.openai_api_key:
+        raise RuntimeError("OpenAI API key not configured")
+
+    client = clients.openai()
+    speech = client.audio.speech
+    if hasattr(speech, "with_streaming_response"):
+        with speech.with_streaming_response.create(model=model, voice=voice, input=text, response_format="mp3") as response:
+            for chunk in response.iter_bytes(chunk_size):
+                yield chunk
+        return
+    yield speech.create(model=model, voice=voice, input=text).content
+
+
+# Bidirectional mapping between Azure and OpenAI voice identifiers
+AZURE_TO_OPENAI = {
+    "en-US-EmmaMultilingualNeural": "nova",
+    "en-US-JennyNeural": "shimmer",
+    "en-US-AriaNeural": "alloy",
+}
+OPENAI_TO_AZURE = {
+    "nova": "en-US-JennyNeural",
+    "shimmer": "en-US-JennyNeural",
+    "alloy": "en-US-AriaNeural",
+    "echo": "en-US-DavisNeural",
+    "fable": "en-US-JennyNeural",
+    "onyx": "en-US-GuyNeural",
+}
+OPENAI_TTS_MODEL = "tts-1"
+# Azure has no model selector; the output format plays that role in cache keys
+AZURE_TTS_MODEL = "audio-16khz-128kbitrate-mono-mp3"
+
+
+def _looks_azure_voice(voice: str) -> bool:
+    return (voice in AZURE_TO_OPENAI) or ("Neural" in voice) or ("-" in voice and voice.count("-") >= 2)
+
+
+def resolve_route(voice: Optional[str] = None) -> Tuple[str, str, str]:
+    """Return the (provider, voice, model) that `synthesize` will try first for `voice`."""
+    voice = voice or settings.azure_tts_voice
+    is_azure_configured = bool(settings.azure_tts_key and settings.azure_tts_region)
+    if is_azure_configured and (_looks_azure_voice(voice) or not settings.openai_api_key):
+        return ("azure", voice, AZURE_TTS_MODEL)
+    return ("openai", AZURE_TO_OPENAI.get(voice, voice), OPENAI_TTS_MODEL)
+
+
+def synthesize_routed(text: str, outfile: str, voice: Optional[str] = None) -> Tuple[str, Tuple[str, str, str]]:
+    """Like `synthesize`, but also return the (provider, voice, model) that actually produced the audio.
+
+    The route differs from `resolve_route` when the preferred provider failed and a fallback was used.
     """
-    # Bidirectional mapping between Azure and OpenAI voice identifiers
-    azure_to_openai = {
-        "en-US-EmmaMultilingualNeural": "nova",
-        "en-US-JennyNeural": "shimmer",
-        "en-US-AriaNeural": "alloy",
-    }
-    openai_to_azure = {
-        "nova": "en-US-JennyNeural",
-        "shimmer": "en-US-JennyNeural",
-        "alloy": "en-US-AriaNeural",
-        "echo": "en-US-DavisNeural",
-        "fable": "en-US-JennyNeural",
-        "onyx": "en-US-GuyNeural",
-    }
-    openai_voice = azure_to_openai.get(voice, voice)
+    voice = voice or settings.azure_tts_voice
+    openai_voice = AZURE_TO_OPENAI.get(voice, voice)
+    looks_azure_voice = _looks_azure_voice(voice)
 
     # Prefer Azure when configured AND the selected voice looks like an Azure voice
     # (e.g., en-US-EmmaMultilingualNeural), or when OpenAI key is missing.
     is_azure_configured = bool(settings.azure_tts_key and settings.azure_tts_region)
-    looks_azure_voice = (voice in azure_to_openai) or ("Neural" in voice) or ("-" in voice and voice.count("-") >= 2)
     if is_azure_configured and (looks_azure_voice or not settings.openai_api_key):
         from .tts_azure import synthesize as azure_synthesize
         # Prefer Azure for Azure-typed voices, but fall back to OpenAI if Azure fails
         try:
-            return azure_synthesize(text, outfile=outfile, voice=voice)
+            return azure_synthesize(text, outfile=outfile, voice=voice), ("azure", voice, AZURE_TTS_MODEL)
         except Exception as e:
             # If OpenAI is available, try it as a fallback
             if settings.openai_api_key:
                 try:
-                    tmp = synthesize_openai(text, voice=azure_to_openai.get(voice, 'nova'))
-                    os.makedirs(Path(outfile).parent, exist_ok=True)
-                    Path(tmp).rename(outfile)
-                    return outfile
+                    fallback_voice = AZURE_TO_OPENAI.get(voice, 'nova')
+                    synthesize_openai(text, voice=fallback_voice, outfile=outfile)
+                    return outfile, ("openai", fallback_voice, OPENAI_TTS_MODEL)
                 except Exception:
                     # fall through and raise original Azure error
                     pass
@@ -95,20 +135,33 @@ def synthesize(text: str, outfile: str = "./data/out.mp3", voice: str = "nova")
         # No OpenAI key at all
         if is_azure_configured:
             from .tts_azure import synthesize as azure_synthesize
-            return azure_synthesize(text, outfile=outfile, voice=voice)
+            return azure_synthesize(text, outfile=outfile, voice=voice), ("azure", voice, AZURE_TTS_MODEL)
         raise RuntimeError("OpenAI TTS failed: OpenAI key missing and Azure not configured")
 
     try:
-        tmp = synthesize_openai(text, voice=openai_voice)
-        os.makedirs(Path(outfile).parent, exist_ok=True)
-        Path(tmp).rename(outfile)
-        return outfile
+        synthesize_openai(text, voice=openai_voice, outfile=outfile)
+        return outfile, ("openai", openai_voice, OPENAI_TTS_MODEL)
     except Exception as e:
         if is_azure_configured:
             from .tts_azure import synthesize as azure_synthesize
             # If the selected voice is an OpenAI voice, map to a reasonable Azure default
             azure_voice = voice
             if not looks_azure_voice:
-                azure_voice = openai_to_azure.get(voice, settings.azure_tts_voice or "en-US-JennyNeural")
-            return azure_synthesize(text, outfile=outfile, voice=azure_voice)
+                azure_voice = OPENAI_TO_AZURE.get(voice, settings.azure_tts_voice or "en-US-JennyNeural")
+            return azure_synthesize(text, outfile=outfile, voice=azure_voice), ("azure", azure_voice, AZURE_TTS_MODEL)
         raise RuntimeError(f"OpenAI TTS failed: {e}")
+
+
+def synthesize(text: str, outfile: str = "./data/out.mp3", voice: str = "nova") -> str:
+    """Unified TTS interface. Prefers OpenAI TTS if available, falls back to Azure.
+    
+    Args:
+        text: Text to speak
+        outfile: Output file path
+        voice: Voice name (OpenAI: alloy/nova/shimmer, Azure: en-US-JennyNeural)
+    
+    Returns:
+        Path to generated audio file
+    """
+    path, _route = synthesize_routed(text, outfile, voice)
+    return path
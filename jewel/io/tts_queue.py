@@ -1,22 +1,49 @@
+import concurrent.futures
 import json
 import os
 import threading
 import time
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
-from .tts_openai import synthesize as unified_synthesize
+from .tts_cache import synthesize_cached, materialize
 from ..config import settings
+from ..core.job_events import job_events
+from .artifacts import artifacts
+
+
+# One bounded pool for every synthesis in the process (/tts, /tts/stream and queued jobs),
+# so a burst of requests can't fan out into unbounded upstream calls.
+synth_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(1, settings.tts_max_workers), thread_name_prefix="tts-synth"
+)
+
+
+def _write_json(path: Path, data: dict):
+    # write-then-rename: the scan loop and /tts/status readers never see a half-written
+    # file (the loop would drop a job file it can't parse)
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
 
 
 class TTSQueue:
-    def __init__(self, base_dir: str = "./data/tts_queue"):
+    def __init__(self, base_dir: str = "./data/tts_queue", executor: concurrent.futures.Executor = synth_executor,
+                 max_inflight: Optional[int] = None):
         self.base = Path(base_dir)
         self.jobs = self.base / "jobs"
         self.results = self.base / "results"
+        self.executor = executor
+        # queued jobs may hold all but one of the shared workers; that one is kept for
+        # interactive /tts and /tts/stream calls (with a single worker the queue shares it)
+        self.max_inflight = max_inflight or max(1, settings.tts_max_workers - 1)
         self.running = False
         self._thread: Optional[threading.Thread] = None
+        # ids of job files currently being synthesized, so the scan loop doesn't resubmit them
+        self._inflight: set = set()
+        self._lock = threading.Lock()
         os.makedirs(self.jobs, exist_ok=True)
         os.makedirs(self.results, exist_ok=True)
 
@@ -32,6 +59,10 @@ class TTSQueue:
         if self._thread:
             self._thread.join(timeout=2)
 
+    def submit(self, text: str, voice: str | None = None) -> concurrent.futures.Future:
+        """Start a synthesis on the shared executor. The future resolves to (path, cache_hit)."""
+        return self.executor.submit(synthesize_cached, text, voice)
+
     def enqueue(self, text: str, voice: str | None = None) -> str:
         jid = uuid.uuid4().hex
         job = {
@@ -41,25 +72,113 @@ class TTSQueue:
             "created_at": time.time(),
             "status": "queued",
         }
-        jpath = self.jobs / f"{jid}.json"
-        with open(jpath, "w", encoding="utf-8") as f:
-            json.dump(job, f)
-        # ensure a status file exists
+        # status first: once the job file exists the loop may already mark it processing
+        self._write_status(jid, job)
+        _write_json(self.jobs / f"{jid}.json", job)
+        return jid
+
+    def adopt(
+        self,
+        fut: concurrent.futures.Future,
+        text: str,
+        voice: str | None = None,
+        created_at: float | None = None,
+        on_billed: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Turn an in-flight `submit` future into a queued job without synthesizing again.
+
+        The job reports "processing" right away and is finished by the future's own
+        completion, writing the same result file a queued job would. `on_billed(text)`
+        is called once the synthesis succeeded upstream (not for a cache hit or an error).
+        """
+        jid = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            "id": jid,
+            "text": text,
+            "voice": voice,
+            "created_at": created_at or now,
+            "started_at": created_at or now,
+            "status": "processing",
+            "adopted": True,
+        }
         self._write_status(jid, job)
+        # runs immediately if the synthesis already finished
+        fut.add_done_callback(lambda f: self._finish_adopted(jid, job, f, on_billed))
         return jid
 
+    def _finish_adopted(self, jid: str, job: dict, fut: concurrent.futures.Future,
+                        on_billed: Optional[Callable[[str], None]] = None):
+        out = self.result_path(jid)
+        try:
+            path, hit = fut.result()
+            materialize(Path(path), str(out))
+            artifacts.register(out, "tts_result", owner=jid)
+            job["status"] = "done"
+            job["cached"] = hit
+            job["result"] = str(out)
+        except Exception as e:
+            job["status"] = "error"
+            job["error"] = str(e)
+        else:
+            if on_billed is not None and not hit:
+                try:
+                    on_billed(job["text"])
+                except Exception:
+                    pass
+        job["finished_at"] = time.time()
+        self._write_status(jid, job)
+
     def status_path(self, jid: str) -> Path:
         return self.results / f"{jid}.status.json"
 
     def result_path(self, jid: str) -> Path:
         return self.results / f"{jid}.mp3"
 
+    def public_status(self, data: dict) -> dict:
+        """Client-facing view of a job status record. If done, includes a relative URL to the audio file."""
+        out = {k: data.get(k) for k in ('id', 'status', 'error', 'created_at', 'started_at', 'finished_at')}
+        out['kind'] = 'tts'
+        if data.get('status') == 'done':
+            out['url'] = f"/data/tts_queue/results/{data.get('id')}.mp3"
+        return out
+
     def _write_status(self, jid: str, data: dict):
-        with open(self.status_path(jid), "w", encoding="utf-8") as f:
-            json.dump(data, f)
+        _write_json(self.status_path(jid), data)
+        artifacts.register(self.status_path(jid), "tts_status", owner=jid)
+        # push the change to long-poll/SSE subscribers
+        job_events.publish(jid, self.public_status(data))
+
+    def _run_job(self, jp: Path, job: dict):
+        jid = job["id"]
+        out = self.result_path(jid)
+        try:
+            # serve from the audio cache when possible; a miss goes through the
+            # unified synth which handles OpenAI/Azure fallback
+            _path, hit = synthesize_cached(job.get("text", ""), voice=job.get("voice"), outfile=str(out))
+            artifacts.register(out, "tts_result", owner=jid)
+            job["status"] = "done"
+            job["cached"] = hit
+            job["result"] = str(out)
+            job["finished_at"] = time.time()
+        except Exception as e:
+            job["status"] = "error"
+            job["error"] = str(e)
+            job["finished_at"] = time.time()
+        # write status and remove job file
+        try:
+            self._write_status(jid, job)
+            jp.unlink(missing_ok=True)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._inflight.discard(jid)
 
     def _loop(self):
-        # Simple loop that scans jobs folder and processes one job at a time
+        # Scan the jobs folder and hand jobs to the shared executor, keeping at most
+        # max_inflight of them in flight so interactive /tts calls aren't starved.
+        limit = self.max_inflight
         while self.running:
             try:
                 jobs = sorted(self.jobs.glob("*.json"))
@@ -67,6 +186,9 @@ class TTSQueue:
                     time.sleep(0.5)
                     continue
                 for jp in jobs:
+                    with self._lock:
+                        if jp.stem in self._inflight or len(self._inflight) >= limit:
+                            continue
                     try:
                         with open(jp, "r", encoding="utf-8") as f:
                             job = json.load(f)
@@ -81,24 +203,9 @@ class TTSQueue:
                     job["status"] = "processing"
                     job["started_at"] = time.time()
                     self._write_status(jid, job)
-                    out = self.result_path(jid)
-                    try:
-                        # attempt to synthesize; reuse unified synth which handles OpenAI/Azure fallback
-                        unified_synthesize(job.get("text", ""), outfile=str(out), voice=job.get("voice"))
-                        job["status"] = "done"
-                        job["result"] = str(out)
-                        job["finished_at"] = time.time()
-                    except Exception as e:
-                        job["status"] = "error"
-                        job["error"] = str(e)
-                        job["finished_at"] = time.time()
-                    # write status and remove job file
-                    self._write_status(jid, job)
-                    try:
-                        jp.unlink(missing_ok=True)
-                    except Exception:
-                        pass
-                    # continue to next job
+                    with self._lock:
+                        self._inflight.add(jid)
+                    self.executor.submit(self._run_job, jp, job)
                 # small sleep to avoid tight loop
                 time.sleep(0.2)
             except Exception:
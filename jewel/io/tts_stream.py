@@ -0,0 +1,115 @@
+"""Sentence-pipelined streaming TTS.
+
+Text is split into sentence chunks. The first chunk is streamed straight from the
+provider (OpenAI's streaming speech response when it is the preferred route) while
+the following chunks are synthesized ahead of time, so time-to-first-audio depends
+on the first sentence rather than the whole paragraph. Chunks are yielded in
+playback order as consecutive mp3 segments.
+"""
+import re
+from collections import deque
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .tts_cache import cache_key, synthesize_cached, tts_cache
+from .tts_openai import resolve_route, stream_openai
+from .tts_queue import synth_executor
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[.!?…][\"')\]])\s+|\n+")
+
+
+def split_sentences(text: str, min_chars: int = 24, max_chars: int = 280) -> List[str]:
+    """Split text into speakable chunks.
+
+    Very short sentences are merged with the next one (tiny requests sound choppy and
+    cost a round-trip each); overly long ones are broken at commas or spaces.
+    """
+    parts = [p.strip() for p in _SENTENCE_END.split(text or "") if p and p.strip()]
+    out: List[str] = []
+    carry = ""
+    for p in parts:
+        p = f"{carry} {p}".strip() if carry else p
+        carry = ""
+        if len(p) < min_chars:
+            carry = p
+            continue
+        while len(p) > max_chars:
+            cut = p.rfind(", ", 0, max_chars)
+            if cut < min_chars:
+                cut = p.rfind(" ", 0, max_chars)
+            if cut < min_chars:
+                # no usable break: hard cut, keeping the chunk at max_chars
+                cut = max_chars - 1
+            out.append(p[:cut + 1].strip())
+            p = p[cut + 1:].strip()
+        if p:
+            out.append(p)
+    if carry:
+        if out and len(out[-1]) + len(carry) < max_chars:
+            out[-1] = f"{out[-1]} {carry}"
+        else:
+            out.append(carry)
+    return out
+
+
+def _sentence_audio(sentence: str, voice: Optional[str]) -> bytes:
+    path, _hit = synthesize_cached(sentence, voice)
+    return Path(path).read_bytes()
+
+
+def _first_chunk(sentence: str, voice: Optional[str]) -> Iterator[bytes]:
+    provider, rvoice, model = resolve_route(voice)
+    key = cache_key(sentence, provider, rvoice, model)
+    hit = tts_cache.lookup(key)
+    if hit is not None:
+        yield hit.read_bytes()
+        return
+    if provider != "openai":
+        # Azure has no streaming REST response; a per-sentence call is the fastest path
+        yield _sentence_audio(sentence, voice)
+        return
+
+    buf = bytearray()
+    try:
+        for chunk in stream_openai(sentence, voice=rvoice, model=model):
+            buf.extend(chunk)
+            yield chunk
+    except Exception:
+        if buf:
+            raise
+        # nothing sent yet: let the unified synth try its fallback provider
+        yield _sentence_audio(sentence, voice)
+        return
+    tmp = tts_cache.temp_path()
+    try:
+        tmp.write_bytes(bytes(buf))
+        tts_cache.put(key, str(tmp), provider, rvoice, model)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def iter_speech(text: str, voice: Optional[str] = None, lookahead: int = 2) -> Iterator[bytes]:
+    """Yield mp3 audio for `text`, synthesizing chunk n+1 while chunk n is being sent."""
+    sentences = split_sentences(text)
+    if not sentences:
+        return
+    pending: deque = deque()
+    nxt = 1
+
+    def fill():
+        nonlocal nxt
+        while nxt < len(sentences) and len(pending) < lookahead:
+            pending.append(synth_executor.submit(_sentence_audio, sentences[nxt], voice))
+            nxt += 1
+
+    try:
+        fill()
+        yield from _first_chunk(sentences[0], voice)
+        while pending:
+            fut = pending.popleft()
+            fill()
+            yield fut.result()
+    finally:
+        # client went away or a chunk failed: don't pay for audio nobody will hear
+        for fut in pending:
+            fut.cancel()
@@ -0,0 +1,225 @@
+"""Energy / zero-crossing voice activity detection over 16-bit mono PCM.
+
+Audio is cut into fixed frames (30 ms by default) and scored with NumPy in one
+vectorized pass: RMS level in dBFS plus zero-crossing rate. A frame is speech if
+it is well above the noise floor, or moderately above it with a high ZCR (unvoiced
+consonants such as "s" and "f" are quiet but noisy). Decisions are smoothed with a
+hangover so short pauses inside a phrase are kept.
+
+`trim_pcm` / `speech_segments` work on a whole buffer (noise floor from the
+buffer's own quiet frames); `VadFilter` works on a live stream (running floor
+estimate). Both drop silence before the recognizer sees it, so decode time
+shrinks with the silence removed.
+"""
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+FRAME_MS = 30
+MARGIN_DB = 10.0  # speech must be this far above the noise floor
+ABS_FLOOR_DB = -55.0  # never call anything quieter than this speech
+ZCR_SPEECH = 0.25  # ZCR above which a frame within 6 dB of the threshold still counts
+FLOOR_MIN_DB = ABS_FLOOR_DB - 20  # quieter frames (digital silence, dropouts) say nothing about the room
+HANGOVER_MS = 300
+LIVE_HANGOVER_MS = 800  # live capture: end the utterance only after a pause longer than between phrases
+PREROLL_MS = 150
+GAP_MS = 250  # silence re-inserted between kept segments so the recognizer still sees a pause
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "audio_seconds_in": 0.0, "audio_seconds_kept": 0.0, "segments": 0, "utterances_capped": 0}
+
+
+def _record(seconds_in: float, seconds_kept: float, segments: int = 0, capped: int = 0):
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["audio_seconds_in"] += seconds_in
+        _stats["audio_seconds_kept"] += seconds_kept
+        _stats["segments"] += segments
+        _stats["utterances_capped"] += capped
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        out = dict(_stats)
+    out["silence_removed_ratio"] = (
+        round(1 - out["audio_seconds_kept"] / out["audio_seconds_in"], 4) if out["audio_seconds_in"] else None
+    )
+    return out
+
+
+def frame_features(samples: np.ndarray, frame_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame (level in dBFS, zero-crossing rate) for int16 `samples`; a trailing partial frame is ignored."""
+    n = len(samples) // frame_len
+    frames = samples[: n * frame_len].reshape(n, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+    db = 20.0 * np.log10(rms + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(frame_len - 1)
+    return db, zcr
+
+
+def _is_speech(db: np.ndarray, zcr: np.ndarray, threshold) -> np.ndarray:
+    return (db > threshold) | ((db > threshold - 6.0) & (zcr > ZCR_SPEECH))
+
+
+def speech_mask(samples: np.ndarray, sample_rate: int = 16000, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """Boolean speech decision per frame, with hangover smoothing."""
+    frame_len = sample_rate * frame_ms // 1000
+    db, zcr = frame_features(samples, frame_len)
+    if not len(db):
+        return np.zeros(0, dtype=bool)
+    floor = np.percentile(db, 10)
+    mask = _is_speech(db, zcr, max(floor + MARGIN_DB, ABS_FLOOR_DB))
+    hang = max(1, HANGOVER_MS // frame_ms)
+    # extend every speech frame forward by `hang` frames
+    return np.convolve(mask.astype(np.int8), np.ones(hang + 1, dtype=np.int8))[: len(mask)] > 0
+
+
+def speech_segments(
+    samples: np.ndarray,
+    sample_rate: int = 16000,
+    frame_ms: int = FRAME_MS,
+    max_utterance_s: Optional[float] = None,
+) -> List[Tuple[int, int]]:
+    """(start, end) sample offsets of speech, padded by the pre-roll and split at `max_utterance_s`."""
+    frame_len = sample_rate * frame_ms // 1000
+    mask = speech_mask(samples, sample_rate, frame_ms)
+    if not mask.any():
+        return []
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame_len
+    ends = np.flatnonzero(edges == -1) * frame_len
+    pre = sample_rate * PREROLL_MS // 1000
+    limit = int(max_utterance_s * sample_rate) if max_utterance_s else None
+    segments = []
+    for s, e in zip(starts, ends):
+        s = max(0, int(s) - pre)
+        e = min(len(samples), int(e))
+        if segments and s <= segments[-1][1]:
+            s = segments[-1][1]
+        while limit and e - s > limit:
+            segments.append((s, s + limit))
+            s += limit
+        if e > s:
+            segments.append((s, e))
+    return segments
+
+
+def trim_pcm(pcm: bytes, sample_rate: int = 16000, max_utterance_s: Optional[float] = None) -> bytes:
+    """Drop silence from a whole PCM buffer, joining speech segments with a short gap."""
+    samples = np.frombuffer(pcm[: len(pcm) // 2 * 2], dtype=np.int16)
+    segments = speech_segments(samples, sample_rate, max_utterance_s=max_utterance_s)
+    gap = np.zeros(sample_rate * GAP_MS // 1000, dtype=np.int16)
+    parts = []
+    for s, e in segments:
+        if parts:
+            parts.append(gap)
+        parts.append(samples[s:e])
+    out = np.concatenate(parts).tobytes() if parts else b""
+    capped = sum(1 for s, e in segments if max_utterance_s and e - s >= int(max_utterance_s * sample_rate))
+    _record(len(samples) / sample_rate, len(out) / (2.0 * sample_rate), len(segments), capped)
+    return out
+
+
+class VadFilter:
+    """Streaming VAD: feed PCM chunks as they arrive, get back only the speech.
+
+    The noise floor follows the quietest recent frames (drops instantly, rises
+    slowly), so it adapts to the room without seeing the whole recording. Frames
+    below FLOOR_MIN_DB are left out of it: a run of digital silence would
+    otherwise pin the floor far below any real room. `utterance_ended` turns true
+    once speech has been followed by `hangover_ms` of silence, or when an
+    utterance hits `max_utterance_s` (it is then cut and a new one starts on the
+    next speech).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = FRAME_MS,
+        max_utterance_s: Optional[float] = None,
+        hangover_ms: int = HANGOVER_MS,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_len * 2
+        self.hang = max(1, hangover_ms // frame_ms)
+        self.max_frames = int(max_utterance_s * 1000 // frame_ms) if max_utterance_s else None
+        self.preroll: List[bytes] = []
+        self.preroll_frames = max(1, PREROLL_MS // frame_ms)
+        self.gap = b"\x00" * (sample_rate * GAP_MS // 1000 * 2)
+        self.floor: Optional[float] = None
+        self.in_speech = False
+        self.silent_run = 0
+        self.utterance_frames = 0
+        self.utterances = 0
+        self.utterance_ended = False
+        self._pending = b""
+        self._in = 0
+        self._kept = 0
+        self._capped = 0
+
+    def feed(self, data: bytes) -> bytes:
+        buf = self._pending + data
+        n = len(buf) // self.frame_bytes
+        self._pending = buf[n * self.frame_bytes:]
+        if not n:
+            return b""
+        samples = np.frombuffer(buf[: n * self.frame_bytes], dtype=np.int16)
+        db, zcr = frame_features(samples, self.frame_len)
+        out = []
+        for i in range(n):
+            frame = buf[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            level = float(db[i])
+            if level >= FLOOR_MIN_DB:
+                if self.floor is None or level < self.floor:
+                    self.floor = level
+                else:
+                    self.floor += 0.02  # ~0.7 dB/s upward drift
+            threshold = ABS_FLOOR_DB if self.floor is None else max(self.floor + MARGIN_DB, ABS_FLOOR_DB)
+            speech = bool(_is_speech(db[i:i + 1], zcr[i:i + 1], threshold)[0])
+            if not self.in_speech:
+                if speech:
+                    self.in_speech = True
+                    self.utterance_ended = False
+                    self.silent_run = 0
+                    self.utterance_frames = len(self.preroll) + 1
+                    if self.utterances:
+                        out.append(self.gap)
+                    out.extend(self.preroll)
+                    out.append(frame)
+                    self.preroll = []
+                else:
+                    self.preroll.append(frame)
+                    del self.preroll[:-self.preroll_frames]
+                continue
+            out.append(frame)
+            self.utterance_frames += 1
+            self.silent_run = 0 if speech else self.silent_run + 1
+            capped = self.max_frames is not None and self.utterance_frames >= self.max_frames
+            if self.silent_run >= self.hang or capped:
+                self.in_speech = False
+                self.utterance_ended = True
+                self.utterances += 1
+                self._capped += int(capped)
+        self._in += n * self.frame_bytes
+        kept = b"".join(out)
+        self._kept += len(kept)
+        return kept
+
+    def filter(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Wrap a PCM chunk iterator, yielding only speech; records stats when exhausted."""
+        try:
+            for chunk in chunks:
+                kept = self.feed(chunk)
+                if kept:
+                    yield kept
+        finally:
+            self.close()
+
+    def close(self):
+        if self.in_speech:
+            self.utterances += 1
+        _record(self._in / (2.0 * self.sample_rate), self._kept / (2.0 * self.sample_rate), self.utterances, self._capped)
+        self._in = self._kept = self._capped = 0
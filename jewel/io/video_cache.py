@@ -0,0 +1,258 @@
+"""Persistent cache for video analysis, keyed by canonical video ID.
+
+The same video reached through different URLs (youtu.be vs watch?v=, tracking
+parameters, mobile hosts) maps to one key such as "youtube:dQw4w9WgXcQ". Per
+key we keep the duration, the transcript, every extracted frame (JPEG
+thumbnail plus its NumPy stats and perceptual hash, per timestamp) and the
+final summary per parameter set. Frames are shared between parameter sets: a
+full run reuses whatever frames a quick run already grabbed near its target
+timestamps and only seeks for the rest.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+from ..config import settings
+from .frame_analysis import FrameInfo
+
+# (platform, pattern with the id as group 1), tried in order
+VIDEO_ID_PATTERNS = [
+    ("youtube", r'(?:youtube(?:-nocookie)?\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/|live/|v/)|youtu\.be/)([0-9A-Za-z_-]{11})'),
+    ("vimeo", r'vimeo\.com/(?:video/|channels/[^/]+/|groups/[^/]+/videos/)?(\d+)'),
+    ("tiktok", r'tiktok\.com/@[^/]+/video/(\d+)'),
+    ("twitter", r'(?:twitter\.com|x\.com)/[^/]+/status(?:es)?/(\d+)'),
+    ("instagram", r'instagram\.com/(?:p|reel|reels|tv)/([0-9A-Za-z_-]+)'),
+    ("twitch", r'twitch\.tv/videos/(\d+)'),
+    ("dailymotion", r'(?:dailymotion\.com/video/|dai\.ly/)([0-9A-Za-z]+)'),
+    ("reddit", r'reddit\.com/r/[^/]+/comments/([0-9a-z]+)'),
+    ("facebook", r'facebook\.com/(?:[^/]+/videos/|watch/?\?v=|reel/)(\d+)'),
+]
+# Query keys that only record where a link was shared from, on any site. Everything
+# else stays in the key: `t`, for one, is a start offset on most players.
+_TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid)$')
+# Share/tracking keys of particular platforms, by host (subdomains included)
+_PLATFORM_TRACKING_PARAMS = {
+    "youtube.com": {"si", "feature", "pp"},
+    "youtu.be": {"si", "feature"},
+    "twitter.com": {"s", "t", "ref_src"},
+    "x.com": {"s", "t", "ref_src"},
+    "tiktok.com": {"is_from_webapp", "sender_device", "_r", "_t"},
+    "instagram.com": {"igsh", "igshid"},
+    "facebook.com": {"mibextid", "rdid"},
+    "reddit.com": {"share_id", "ref", "ref_source"},
+    "vimeo.com": {"share"},
+}
+
+
+def _tracking_keys(host: str) -> frozenset:
+    for domain, keys in _PLATFORM_TRACKING_PARAMS.items():
+        if host == domain or host.endswith("." + domain):
+            return frozenset(keys)
+    return frozenset()
+
+
+def canonical_video_id(url: str) -> str:
+    """Stable cache key for a video URL: '<platform>:<id>' when recognized, else a hash of the cleaned URL."""
+    for platform, pattern in VIDEO_ID_PATTERNS:
+        m = re.search(pattern, url)
+        if m:
+            return f"{platform}:{m.group(1)}"
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    platform_keys = _tracking_keys(host.split(":")[0])
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query)
+        if not _TRACKING_PARAMS.match(k) and k not in platform_keys
+    ))
+    clean = urlunsplit((parts.scheme.lower(), host, parts.path.rstrip("/"), query, ""))
+    return "url:" + hashlib.sha1(clean.encode("utf-8")).hexdigest()[:20]
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+
+class VideoCache:
+    def __init__(self, path: str, max_videos: int = 500):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_videos = max_videos
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._init()
+
+    def _init(self):
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS videos (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                duration REAL,
+                transcript TEXT,
+                scene_times TEXT,
+                created_at REAL,
+                last_access REAL
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS frames (
+                key TEXT,
+                t REAL,
+                jpeg BLOB,
+                stats TEXT,
+                hist BLOB,
+                PRIMARY KEY (key, t)
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT,
+                params TEXT,
+                result TEXT,
+                created_at REAL,
+                PRIMARY KEY (key, params)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def _ensure(self, key: str, url: Optional[str] = None):
+        now = time.time()
+        self.conn.execute(
+            "INSERT INTO videos (key, url, created_at, last_access) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET last_access=excluded.last_access",
+            (key, url, now, now),
+        )
+
+    def video(self, key: str) -> Dict[str, Any]:
+        """Cached metadata: duration, transcript (None = never fetched) and scene_times (None = never scanned)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT duration, transcript, scene_times FROM videos WHERE key=?", (key,)
+            ).fetchone()
+        if not row:
+            return {"duration": None, "transcript": None, "scene_times": None}
+        return {"duration": row[0], "transcript": row[1], "scene_times": json.loads(row[2]) if row[2] else None}
+
+    def set_fields(self, key: str, url: Optional[str] = None, **fields):
+        allowed = {"duration", "transcript", "scene_times"}
+        with self._lock:
+            self._ensure(key, url)
+            for name, value in fields.items():
+                if name not in allowed:
+                    raise ValueError(name)
+                if name == "scene_times":
+                    value = json.dumps(value)
+                self.conn.execute(f"UPDATE videos SET {name}=? WHERE key=?", (value, key))
+            self.conn.commit()
+
+    # ---- frames ----
+
+    def frames_near(self, key: str, timestamps: List[float], tolerance: float) -> Dict[float, Tuple[float, bytes, FrameInfo]]:
+        """For each target timestamp, the closest cached frame within `tolerance` seconds (each frame used once)."""
+        with self._lock:
+            rows = self.conn.execute("SELECT t, jpeg, stats, hist FROM frames WHERE key=? ORDER BY t", (key,)).fetchall()
+        out: Dict[float, Tuple[float, bytes, FrameInfo]] = {}
+        used = set()
+        for target in timestamps:
+            best = None
+            for t, jpeg, stats, hist in rows:
+                d = abs(t - target)
+                if d <= tolerance and t not in used and (best is None or d < best[0]):
+                    best = (d, t, jpeg, stats, hist)
+            if best:
+                _d, t, jpeg, stats, hist = best
+                used.add(t)
+                s = json.loads(stats)
+                info = FrameInfo(
+                    index=0,
+                    timestamp=t,
+                    mean_rgb=tuple(s["mean_rgb"]),
+                    brightness=s["brightness"],
+                    contrast=s["contrast"],
+                    sharpness=s["sharpness"],
+                    hist=np.frombuffer(hist, dtype=np.float32).copy(),
+                    phash=int(s["phash"], 16),
+                )
+                out[target] = (t, jpeg, info)
+        return out
+
+    def put_frames(self, key: str, frames: List[Tuple[float, bytes, FrameInfo]], url: Optional[str] = None):
+        rows = []
+        for t, jpeg, info in frames:
+            stats = {
+                "mean_rgb": list(info.mean_rgb),
+                "brightness": info.brightness,
+                "contrast": info.contrast,
+                "sharpness": info.sharpness,
+                "phash": f"{info.phash:016x}",
+            }
+            rows.append((key, t, jpeg, json.dumps(stats), info.hist.astype(np.float32).tobytes()))
+        with self._lock:
+            self._ensure(key, url)
+            self.conn.executemany("INSERT OR REPLACE INTO frames (key, t, jpeg, stats, hist) VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    # ---- summaries ----
+
+    def summary(self, key: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result FROM summaries WHERE key=? AND params=?", (key, _params_key(params))
+            ).fetchone()
+            if row:
+                self._ensure(key)
+                self.conn.commit()
+        return json.loads(row[0]) if row else None
+
+    def put_summary(self, key: str, params: Dict[str, Any], result: Dict[str, Any], url: Optional[str] = None):
+        with self._lock:
+            self._ensure(key, url)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, params, result, created_at) VALUES (?, ?, ?, ?)",
+                (key, _params_key(params), json.dumps(result), time.time()),
+            )
+            self._prune_locked()
+            self.conn.commit()
+
+    def frame_jpegs(self, key: str, timestamps: List[float]) -> List[bytes]:
+        with self._lock:
+            return [
+                r[0]
+                for t in timestamps
+                for r in self.conn.execute("SELECT jpeg FROM frames WHERE key=? AND t=?", (key, t)).fetchall()
+            ]
+
+    def _prune_locked(self):
+        # keep the most recently used videos; drop everything stored for the rest
+        stale = [
+            r[0]
+            for r in self.conn.execute(
+                "SELECT key FROM videos ORDER BY last_access DESC LIMIT -1 OFFSET ?", (self.max_videos,)
+            ).fetchall()
+        ]
+        for key in stale:
+            for table in ("frames", "summaries", "videos"):
+                self.conn.execute(f"DELETE FROM {table} WHERE key=?", (key,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            videos = self.conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            frames, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(jpeg)), 0) FROM frames").fetchone()
+            summaries = self.conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return {"videos": videos, "frames": frames, "frame_bytes": size, "summaries": summaries}
+
+
+video_cache = VideoCache(str(Path(settings.db_path).parent / "video_cache.db"))
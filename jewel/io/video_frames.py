@@ -0,0 +1,149 @@
+"""Seek-based frame extraction for video analysis.
+
+Instead of downloading a whole video and decoding it end to end, resolve the
+remote stream URL with yt-dlp, probe its duration, choose timestamps, and grab
+each frame with its own `ffmpeg -ss <t> -i <src> -frames:v 1` input seek. An
+input seek jumps to the nearest keyframe (an HTTP range request for remote
+files) and decodes only a few frames, so extraction cost grows with the number
+of frames, not the length of the video. Grabs run concurrently on a shared,
+bounded pool.
+
+Timestamps are either uniform (default) or scene-change based. Scene detection
+decodes keyframes only (`-skip_frame nokey`), which is far cheaper than a full
+decode but still reads the whole stream, so it is opt-in.
+"""
+import concurrent.futures
+import re
+import subprocess
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+# Bounded across all requests so parallel analyses can't spawn unlimited ffmpegs
+frame_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(1, settings.video_frame_workers), thread_name_prefix="video-frame"
+)
+
+# progressive http(s) first: single-file streams seek with range requests
+STREAM_FORMAT = "best[height<=720][protocol^=http][vcodec!=none]/bestvideo[height<=720][protocol^=http]/best[height<=720]/best"
+
+
+def _header_args(headers: Optional[Dict[str, str]]) -> List[str]:
+    if not headers:
+        return []
+    return ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+
+
+def resolve_stream(url: str) -> Dict:
+    """Look up a direct media URL for `url` without downloading. Returns url, headers, duration, id, extractor."""
+    import yt_dlp
+
+    opts = {"format": STREAM_FORMAT, "quiet": True, "no_warnings": True, "skip_download": True}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+    chosen = info.get("requested_formats") or [info]
+    # a merged (video+audio) selection lists both; frames only need the video part
+    video = next((f for f in chosen if f.get("vcodec") not in (None, "none")), chosen[0])
+    return {
+        "url": video.get("url") or info.get("url"),
+        "headers": video.get("http_headers") or info.get("http_headers") or {},
+        "duration": info.get("duration"),
+        "id": info.get("id"),
+        "extractor": info.get("extractor_key") or info.get("extractor"),
+    }
+
+
+def probe_duration(source: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> Optional[float]:
+    cmd = ["ffprobe", "-v", "error", *_header_args(headers), "-show_entries", "format=duration", "-of", "csv=p=0", source]
+    try:
+        out = subprocess.run(cmd, capture_output=True, timeout=timeout, check=True).stdout.decode().strip()
+        return float(out) if out and out != "N/A" else None
+    except Exception:
+        return None
+
+
+def uniform_timestamps(duration: float, count: int, every: Optional[float] = None) -> List[float]:
+    """Up to `count` timestamps spread over the whole video, at least `every` seconds apart."""
+    if count <= 0:
+        return []
+    if not duration or duration <= 0:
+        # unknown length (live or unprobeable): step by `every`; seeks past the end just yield nothing
+        return [round((i + 0.5) * every, 2) for i in range(count)] if every else [0.0]
+    step = duration / count
+    if every:
+        step = max(step, float(every))
+    n = max(1, min(count, int(duration // step)))
+    # spread the n slots over the whole video (n <= duration // step keeps them >= `every`
+    # apart): no unsampled remainder at the end, and a clip shorter than `every` gets its middle
+    step = duration / n
+    # centre of each slot: skips intro black frames and end cards
+    return [round((i + 0.5) * step, 2) for i in range(n)]
+
+
+def scene_timestamps(
+    source: str,
+    count: int,
+    threshold: float = 0.3,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 300,
+) -> List[float]:
+    """Timestamps of scene changes among keyframes, thinned to at most `count` (evenly by rank)."""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostdin", "-skip_frame", "nokey", *_header_args(headers), "-i", source,
+        "-an", "-vf", f"select='gt(scene,{threshold})',showinfo", "-vsync", "vfr", "-f", "null", "-",
+    ]
+    proc = subprocess.run(cmd, capture_output=True, timeout=timeout)
+    times = [float(m) for m in re.findall(rb"pts_time:([0-9.]+)", proc.stderr)]
+    if len(times) > count:
+        times = [times[int(i * len(times) / count)] for i in range(count)]
+    return times
+
+
+def grab_frame(
+    source: str,
+    t: float,
+    max_side: int = 512,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 60,
+) -> Optional[bytes]:
+    """One JPEG frame at `t` seconds via an input seek, scaled to fit `max_side`. None if nothing decoded."""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin",
+        "-ss", f"{t:.3f}", *_header_args(headers), "-i", source,
+        "-frames:v", "1", "-an",
+        "-vf", f"scale='min({max_side},iw)':'min({max_side},ih)':force_original_aspect_ratio=decrease",
+        "-f", "image2pipe", "-vcodec", "mjpeg", "-q:v", "3", "pipe:1",
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, timeout=timeout).stdout
+    except subprocess.TimeoutExpired:
+        return None
+    return out or None
+
+
+def extract_frames(
+    source: str,
+    timestamps: List[float],
+    max_side: int = 512,
+    headers: Optional[Dict[str, str]] = None,
+    on_frame: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> List[Tuple[float, bytes]]:
+    """Grab all timestamps concurrently; returns (t, jpeg) in time order, skipping failed seeks.
+
+    `on_frame(done, total)` is called as grabs finish; setting `cancel` drops grabs not yet started.
+    """
+    futs = {frame_executor.submit(grab_frame, source, t, max_side, headers): t for t in timestamps}
+    got = {}
+    for n, fut in enumerate(concurrent.futures.as_completed(futs), start=1):
+        if cancel is not None and cancel.is_set():
+            for f in futs:
+                f.cancel()
+            break
+        data = None if fut.cancelled() else fut.result()
+        if data:
+            got[futs[fut]] = data
+        if on_frame:
+            on_frame(n, len(futs))
+    return [(t, got[t]) for t in timestamps if t in got]
@@ -0,0 +1,173 @@
+"""Text-to-video prototype: generated frames stitched into an MP4, as a background job.
+
+Frames are generated concurrently on the shared image-generation pool, each
+with its own retries, and streamed to one ffmpeg process over `image2pipe` in
+frame order as soon as the next frame is ready. Nothing but the final MP4 touches disk, and
+wall time is roughly the slowest batch of generations instead of their sum.
+Job state is published on `job_events` (kind "video_gen").
+"""
+import collections
+import concurrent.futures
+import logging
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ..core.job_events import job_events
+from .artifacts import artifacts
+from .image_assets import ImageGenError, generate_image_bytes, image_gen_executor
+
+
+class FrameGenError(Exception):
+    pass
+
+
+def generate_frame(prompt: str, index: int, size: str, model: str = "gpt-image-1") -> bytes:
+    """PNG bytes of frame `index` (retries are handled by `generate_image_bytes`)."""
+    try:
+        return generate_image_bytes(prompt + f" — cinematic frame {index + 1}", size, model)
+    except ImageGenError as e:
+        raise FrameGenError(f"frame {index + 1}: {e}") from e
+
+
+class FrameEncoder:
+    """An ffmpeg process encoding images written to stdin (image2pipe) into an H.264 MP4."""
+
+    def __init__(self, out_path: str, fps: int):
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "image2pipe", "-framerate", str(fps), "-i", "pipe:0",
+            # yuv420p needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+            out_path,
+        ]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        # drain stderr continuously so a chatty ffmpeg can never block on it
+        self._stderr = collections.deque(maxlen=50)
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+
+    def _drain_stderr(self):
+        for line in iter(self.proc.stderr.readline, b""):
+            self._stderr.append(line.decode(errors="ignore").rstrip())
+
+    def write(self, image: bytes) -> None:
+        self.proc.stdin.write(image)
+
+    def finish(self, timeout: float = 120) -> int:
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        rc = self.proc.wait(timeout=timeout)
+        self._stderr_thread.join(timeout=1)
+        return rc
+
+    def error_text(self) -> str:
+        return "\n".join(self._stderr)
+
+    def kill(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+
+
+def render_video(
+    prompt: str,
+    frames: int,
+    size: str,
+    fps: int,
+    out_path: str,
+    on_progress: Optional[Callable[[int, int, int], None]] = None,
+) -> None:
+    """Generate `frames` images concurrently and encode them, in order, into `out_path`.
+
+    `on_progress(generated, encoded, total)` is called as frames arrive. Any frame
+    that still fails after its retries fails the render; the partial file is removed.
+    """
+    encoder = FrameEncoder(out_path, fps)
+    futs = {image_gen_executor.submit(generate_frame, prompt, i, size): i for i in range(frames)}
+    ready: Dict[int, bytes] = {}
+    encoded = 0
+    try:
+        for generated, fut in enumerate(concurrent.futures.as_completed(futs), start=1):
+            ready[futs[fut]] = fut.result()
+            # hand over every frame that is now next in line
+            while encoded in ready:
+                try:
+                    encoder.write(ready.pop(encoded))
+                except BrokenPipeError:
+                    raise RuntimeError(f"ffmpeg failed: {encoder.error_text()}")
+                encoded += 1
+            if on_progress:
+                on_progress(generated, encoded, frames)
+        if encoder.finish() != 0:
+            raise RuntimeError(f"ffmpeg failed: {encoder.error_text()}")
+    except BaseException:
+        for f in futs:
+            f.cancel()
+        encoder.kill()
+        Path(out_path).unlink(missing_ok=True)
+        raise
+
+
+class VideoGenJobs:
+    def __init__(self, out_dir: str = "./data/generated_videos", max_running: int = 2):
+        self.out_dir = Path(out_dir)
+        # renders waiting on their frames hold an ffmpeg each; cap how many run at once
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_running), thread_name_prefix="video-gen")
+
+    def submit(self, prompt: str, frames: int, size: str, fps: int) -> str:
+        jid = uuid.uuid4().hex
+        job = {
+            "id": jid,
+            "kind": "video_gen",
+            "status": "queued",
+            "prompt": prompt,
+            "frames": frames,
+            "size": size,
+            "fps": fps,
+            "created_at": time.time(),
+        }
+        self._publish(job)
+        self.executor.submit(self._run, job)
+        return jid
+
+    def get(self, jid: str) -> Optional[Dict[str, Any]]:
+        # job_events holds the latest state of every recent job
+        ev = job_events.get(jid)
+        return ev[1] if ev else None
+
+    def _publish(self, job: Dict[str, Any]):
+        # push the change to long-poll/SSE subscribers (publish copies the state)
+        job_events.publish(job["id"], job)
+
+    def _run(self, job: Dict[str, Any]):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        vid_id = job["id"][:8]
+        out_path = str(self.out_dir / f"{vid_id}.mp4")
+
+        def progress(generated: int, encoded: int, total: int):
+            job.update(generated=generated, encoded=encoded, progress=round(generated / total, 3))
+            self._publish(job)
+
+        job.update(status="running", started_at=time.time(), generated=0, encoded=0)
+        self._publish(job)
+        try:
+            render_video(job["prompt"], job["frames"], job["size"], job["fps"], out_path, on_progress=progress)
+            artifacts.register(out_path, "generated_video", owner=vid_id)
+            job.update(status="done", url=f"/data/generated_videos/{vid_id}.mp4", file_path=out_path)
+        except FrameGenError as e:
+            job.update(status="error", error=f"Video prototype failed: {e}", http_status=502)
+        except Exception as e:
+            logging.exception("video prototype failed")
+            job.update(status="error", error=str(e), http_status=500)
+        job["finished_at"] = time.time()
+        self._publish(job)
+
+
+video_gen_jobs = VideoGenJobs()
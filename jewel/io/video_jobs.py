@@ -0,0 +1,531 @@
+"""Background jobs for /video_summary.
+
+An analysis runs as explicit stages instead of one long HTTP request:
+
+    probe -> frames (-> download, only when stream seeks yield nothing) -> vision
+    transcript -------------------------------------------------------/
+
+The transcript fetch runs alongside the media chain; the vision call waits for
+both. Every stage's status, timing and progress is written to SQLite and
+published on `job_events`, so clients follow a job through /jobs/{id}/events
+(SSE) or /video_jobs/{id}. Cancelling a job stops it at the next await and
+drops frame seeks that have not started yet. Submitting the same video with the
+same parameters while a job for it is still active joins that job.
+"""
+import asyncio
+import base64
+import io
+import json
+import logging
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..core.job_events import job_events
+from ..tools.summarize import count_tokens, summarize_text
+from .frame_analysis import FrameInfo, analyze_frame, select_frames
+from .media_store import media_store
+from .video_cache import _params_key, canonical_video_id, video_cache
+from . import video_frames
+
+STAGES = ("probe", "transcript", "frames", "download", "vision")
+TRANSCRIPT_TOKENS = 2000  # transcript share of the vision prompt (about the old 8000-char cut)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class VideoJobError(Exception):
+    """A failure with the HTTP status the blocking endpoint should answer with, plus any partial results."""
+
+    def __init__(self, message: str, http_status: int = 500, **partial):
+        super().__init__(message)
+        self.http_status = http_status
+        self.partial = partial
+
+
+def _data_urls(jpegs: List[bytes]) -> List[str]:
+    # inline only for the model; clients get /media URLs
+    return [f"data:image/jpeg;base64,{base64.b64encode(j).decode('utf-8')}" for j in jpegs]
+
+
+def _publish_frames(jpegs: List[bytes]) -> Dict[str, List[str]]:
+    return media_store.put_images(jpegs, "jpg", kind="video_frame")
+
+
+def _fallback_summary(transcript: str, visual_summary: List[str]) -> List[str]:
+    # heuristic stand-in when the model can't be called: first sentences of the
+    # transcript, else the frame descriptions
+    if transcript:
+        parts = [p.strip() for p in re.split(r'[\.\!\?]\s+', transcript) if p.strip()]
+        return [s if len(s) < 400 else s[:400] + '...' for s in parts[:3]]
+    return list(visual_summary[:3])
+
+
+def _is_quota_error(msg: str) -> bool:
+    return 'insufficient_quota' in msg or '429' in msg or 'quota' in msg.lower()
+
+
+class _Media:
+    """Media side of one analysis: stream lookup, timestamps, frame grabs and the download fallback."""
+
+    def __init__(self, key: str, url: str, params: Dict[str, Any], meta: Dict[str, Any]):
+        self.key = key
+        self.url = url
+        self.params = params
+        self.meta = meta
+        self.stream: Dict[str, Any] = {}
+        # Sample more candidates than we send; near-duplicates and blank frames are
+        # dropped before the vision call and the most informative ones kept.
+        self.candidates = min(params["max_frames"] * 3, 30)
+        self.duration = meta["duration"]
+        self.timestamps: List[float] = []
+        self.have: Dict[float, Tuple[float, bytes, FrameInfo]] = {}
+        self.missing: List[float] = []
+        self.new: List[Tuple[float, bytes, FrameInfo]] = []
+        self.frame_source = "cache"
+
+    def source(self) -> Tuple[str, Dict[str, str]]:
+        # resolve the remote stream only if something actually needs it
+        if not self.stream:
+            self.stream.update(video_frames.resolve_stream(self.url))
+        return self.stream["url"], self.stream["headers"]
+
+    def probe(self) -> Dict[str, Any]:
+        """Duration, target timestamps and which of them earlier runs already cover."""
+        if self.duration is None:
+            try:
+                src, headers = self.source()
+                self.duration = self.stream["duration"] or video_frames.probe_duration(src, headers)
+                if self.duration:
+                    video_cache.set_fields(self.key, self.url, duration=self.duration)
+            except Exception:
+                pass
+        timestamps = []
+        if self.params["scenes"]:
+            timestamps = self.meta["scene_times"]
+            if timestamps is None:
+                try:
+                    timestamps = video_frames.scene_timestamps(*self.source(), count=30)
+                    video_cache.set_fields(self.key, self.url, scene_times=timestamps)
+                except Exception:
+                    timestamps = []
+            if len(timestamps) > self.candidates:
+                n = len(timestamps)
+                timestamps = [timestamps[int(i * n / self.candidates)] for i in range(self.candidates)]
+        if not timestamps:
+            timestamps = video_frames.uniform_timestamps(self.duration, self.candidates, self.params["every"])
+        self.timestamps = timestamps
+        # any frame an earlier run (e.g. a quick run) grabbed inside a target's sampling
+        # slot represents that slot just as well; only seek for the empty slots
+        step = self.duration / self.candidates if self.duration else self.params["every"]
+        self.have = video_cache.frames_near(self.key, timestamps, tolerance=step / 2)
+        self.missing = [t for t in timestamps if t not in self.have]
+        return {"duration": self.duration, "targets": len(timestamps), "cached_frames": len(self.have)}
+
+    def grab(self, on_frame, cancel: threading.Event) -> Dict[str, Any]:
+        """Seek straight into the remote stream: cost scales with frames, not video length."""
+        try:
+            src, headers = self.source()
+            raw = video_frames.extract_frames(src, self.missing, 512, headers, on_frame=on_frame, cancel=cancel)
+        except Exception:
+            raw = []
+        if raw:
+            # keep what was grabbed even when cancelled; a later run reuses it
+            self._store(raw)
+            self.frame_source = "stream"
+        if cancel.is_set():
+            raise JobCancelled()
+        return {"grabbed": len(raw), "reused": len(self.have)}
+
+    @property
+    def needs_download(self) -> bool:
+        return bool(self.missing) and not self.new
+
+    def download(self, on_frame, cancel: threading.Event) -> Dict[str, Any]:
+        """Some sites only serve fragmented downloads; fetch the file with yt-dlp and seek locally."""
+        import yt_dlp
+
+        with tempfile.TemporaryDirectory() as td:
+            video_path = Path(td) / "video.mp4"
+            # best quality up to 720p to save bandwidth
+            ydl_opts = {
+                'format': 'best[height<=720]',
+                'outtmpl': str(video_path),
+                'quiet': True,
+                'no_warnings': True,
+            }
+            try:
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    ydl.download([self.url])
+            except Exception as e:
+                if self.have:
+                    return {"error": str(e), "grabbed": 0}
+                raise VideoJobError(f"Could not download video: {e}", 400)
+            if cancel.is_set():
+                raise JobCancelled()
+            missing = self.missing
+            if self.duration is None:
+                self.duration = video_frames.probe_duration(str(video_path))
+                missing = video_frames.uniform_timestamps(self.duration, self.candidates, self.params["every"])
+            raw = video_frames.extract_frames(str(video_path), missing, 512, on_frame=on_frame, cancel=cancel)
+        if cancel.is_set():
+            raise JobCancelled()
+        self._store(raw)
+        self.frame_source = "download"
+        return {"grabbed": len(raw)}
+
+    def _store(self, raw: List[Tuple[float, bytes]]):
+        from PIL import Image
+
+        new = []
+        for t, jpeg in raw:
+            with Image.open(io.BytesIO(jpeg)) as img:
+                img = img.convert("RGB")
+            new.append((t, jpeg, analyze_frame(img, 0, t)))
+        video_cache.put_frames(self.key, new, self.url)
+        self.new = new
+
+    def frames(self) -> List[Tuple[float, bytes, FrameInfo]]:
+        return sorted(list(self.have.values()) + self.new, key=lambda f: f[0])
+
+
+class VideoJobs:
+    def __init__(self, path: str, max_running: int = 2):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_running = max(1, max_running)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # guards the job dicts (stages are updated from worker threads) and the connection
+        self._lock = threading.RLock()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # (video key, params) -> id of the job currently analyzing it
+        self._active: Dict[str, str] = {}
+        self._cancel: Dict[str, threading.Event] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+        self._init()
+
+    def _init(self):
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS video_jobs (
+                id TEXT PRIMARY KEY,
+                key TEXT,
+                status TEXT,
+                state TEXT,
+                created_at REAL,
+                updated_at REAL
+            );
+            """
+        )
+        self.conn.commit()
+
+    def recover(self):
+        """Jobs left queued/running by a previous process can't resume; mark them failed."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT state FROM video_jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        for (state,) in rows:
+            job = json.loads(state)
+            for st in job["stages"].values():
+                if st["status"] in ("pending", "running"):
+                    st["status"] = "cancelled"
+            job.update(status="error", error="interrupted by restart", http_status=503, finished_at=time.time())
+            self._save(job)
+
+    # ---- public API ----
+
+    def submit(self, url: str, params: Dict[str, Any]) -> str:
+        """Start (or join) an analysis of `url`; must be called from the event loop. Returns the job id."""
+        key = canonical_video_id(url)
+        flight = f"{key}|{_params_key(params)}"
+        jid = self._active.get(flight)
+        if jid:
+            self.coalesced += 1
+            return jid
+        jid = uuid.uuid4().hex
+        job = {
+            "id": jid,
+            "kind": "video",
+            "url": url,
+            "key": key,
+            "params": params,
+            "status": "queued",
+            "stages": {name: {"status": "pending"} for name in STAGES},
+            "created_at": time.time(),
+        }
+        self._jobs[jid] = job
+        self._active[flight] = jid
+        self._cancel[jid] = threading.Event()
+        self._save(job)
+        self._tasks[jid] = asyncio.get_running_loop().create_task(self._run(job, flight))
+        return jid
+
+    def get(self, jid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(jid)
+            if job is not None:
+                return json.loads(json.dumps(job))
+            row = self.conn.execute("SELECT state FROM video_jobs WHERE id=?", (jid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def cancel(self, jid: str) -> Optional[Dict[str, Any]]:
+        """Request cancellation; returns the job state (None if unknown)."""
+        if jid in self._cancel:
+            self._cancel[jid].set()
+            task = self._tasks.get(jid)
+            if task is not None:
+                task.cancel()
+        return self.get(jid)
+
+    async def wait(self, jid: str) -> Optional[Dict[str, Any]]:
+        """Wait for a job to finish; a disconnecting caller doesn't cancel it."""
+        task = self._tasks.get(jid)
+        if task is not None:
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+        return self.get(jid)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM video_jobs GROUP BY status").fetchall())
+        return {"jobs": counts, "active": len(self._active), "coalesced": self.coalesced}
+
+    # ---- internals ----
+
+    def _save(self, job: Dict[str, Any]):
+        with self._lock:
+            state = json.dumps(job)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO video_jobs (id, key, status, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job["id"], job["key"], job["status"], state, job["created_at"], time.time()),
+            )
+            self.conn.commit()
+        # push the change to long-poll/SSE subscribers
+        job_events.publish(job["id"], json.loads(state))
+
+    def _stage(self, job: Dict[str, Any], name: str, status: str, **fields):
+        with self._lock:
+            st = job["stages"][name]
+            now = time.time()
+            if status == "running" and st["status"] != "running":
+                st["started_at"] = now
+            elif status in ("done", "error", "cancelled") and "started_at" in st:
+                st["finished_at"] = now
+            st["status"] = status
+            st.update(fields)
+        self._save(job)
+
+    async def _run_stage(self, job: Dict[str, Any], name: str, fn, *args):
+        """Run a blocking stage in a worker thread, recording its status."""
+        if self._cancel[job["id"]].is_set():
+            raise JobCancelled()
+        self._stage(job, name, "running")
+        try:
+            out = await asyncio.to_thread(fn, *args)
+        except (JobCancelled, asyncio.CancelledError):
+            self._stage(job, name, "cancelled")
+            raise
+        except Exception as e:
+            self._stage(job, name, "error", error=str(e))
+            raise
+        if job["stages"][name]["status"] == "running":
+            self._stage(job, name, "done", **(out if isinstance(out, dict) else {}))
+        return out
+
+    def _progress(self, job: Dict[str, Any], name: str):
+        def on_frame(done: int, total: int):
+            self._stage(job, name, "running", progress=round(done / total, 3), done=done, total=total)
+        return on_frame
+
+    async def _run(self, job: Dict[str, Any], flight: str):
+        jid = job["id"]
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_running)
+        try:
+            async with self._sem:
+                job["status"] = "running"
+                job["started_at"] = time.time()
+                self._save(job)
+                job["result"] = await self._pipeline(job)
+            job["status"] = "done"
+        except (JobCancelled, asyncio.CancelledError):
+            job["status"] = "cancelled"
+            job["error"] = "cancelled"
+            job["http_status"] = 499
+        except VideoJobError as e:
+            job.update(status="error", error=str(e), http_status=e.http_status, partial=e.partial)
+        except ImportError as e:
+            job.update(
+                status="error",
+                error=f"Missing dependency: {e}. Run: pip install yt-dlp pillow youtube-transcript-api",
+                http_status=500,
+            )
+        except Exception as e:
+            logging.exception('Video analysis failed')
+            job.update(status="error", error=f"Video analysis failed: {e}", http_status=500)
+        finally:
+            with self._lock:
+                for st in job["stages"].values():
+                    if st["status"] in ("pending", "running"):
+                        st["status"] = "cancelled" if job["status"] != "done" else "skipped"
+            job["finished_at"] = time.time()
+            self._active.pop(flight, None)
+            self._cancel.pop(jid, None)
+            self._tasks.pop(jid, None)
+            self._save(job)
+            # finished jobs are served from SQLite
+            self._jobs.pop(jid, None)
+
+    async def _pipeline(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        key, url, params = job["key"], job["url"], job["params"]
+        cancel = self._cancel[job["id"]]
+
+        # Same video and parameters analyzed before: answer from the cache
+        cached = await asyncio.to_thread(video_cache.summary, key, params)
+        if cached:
+            for name in STAGES:
+                self._stage(job, name, "skipped")
+            jpegs = await asyncio.to_thread(video_cache.frame_jpegs, key, cached.pop("frame_times", []))
+            # re-publishing is idempotent and restores files retention GC may have removed
+            return {**cached, **(await asyncio.to_thread(_publish_frames, jpegs)), "cached": True}
+
+        meta = await asyncio.to_thread(video_cache.video, key)
+        transcript = asyncio.create_task(self._run_stage(job, "transcript", self._transcript, job, key, url, meta))
+        try:
+            media = _Media(key, url, params, meta)
+            await self._run_stage(job, "probe", media.probe)
+            if media.missing:
+                await self._run_stage(job, "frames", media.grab, self._progress(job, "frames"), cancel)
+            else:
+                self._stage(job, "frames", "done", grabbed=0, reused=len(media.have))
+            if media.needs_download:
+                await self._run_stage(job, "download", media.download, self._progress(job, "download"), cancel)
+            else:
+                self._stage(job, "download", "skipped")
+            transcript_text, condensed = await transcript
+        finally:
+            if not transcript.done():
+                transcript.cancel()
+
+        frames = media.frames()
+        jpegs = {}
+        infos = []
+        for idx, (t, jpeg, info) in enumerate(frames, start=1):
+            info.index = idx
+            jpegs[idx] = jpeg
+            infos.append(info)
+        selected = select_frames(infos, params["max_frames"])
+        # frames are already <=512px JPEGs from ffmpeg (keeps image tokens down)
+        frame_jpegs = [jpegs[info.index] for info in selected]
+        visual_summary = [info.describe() for info in selected]
+        if not frame_jpegs:
+            raise VideoJobError("No frames could be extracted from video", 400)
+
+        summary = await self._run_stage(job, "vision", self._vision, frame_jpegs, transcript_text, condensed, visual_summary)
+        result = {
+            "reply": f"📹 Video Analysis ({len(frame_jpegs)} frames):\n\n{summary}",
+            "frames_extracted": len(frame_jpegs),
+            "frames_sampled": len(infos),
+            "frame_source": media.frame_source,
+            "frames_reused": len(media.have),
+            "visual_summary": visual_summary,
+        }
+        await asyncio.to_thread(
+            video_cache.put_summary, key, params, {**result, "frame_times": [info.timestamp for info in selected]}, url
+        )
+        return {**result, **(await asyncio.to_thread(_publish_frames, frame_jpegs)), "cached": False}
+
+    def _transcript(self, job: Dict[str, Any], key: str, url: str, meta: Dict[str, Any]) -> Tuple[str, bool]:
+        """YouTube transcript (optional, cached per video), condensed to fit the vision prompt.
+
+        Returns (text, condensed). Long transcripts are map-reduce summarized over
+        their whole length instead of being cut off after the first few minutes.
+        """
+        text = meta["transcript"]
+        if text is None:
+            if not key.startswith("youtube:"):
+                self._stage(job, "transcript", "skipped")
+                return "", False
+            try:
+                from youtube_transcript_api import YouTubeTranscriptApi
+
+                transcript_list = YouTubeTranscriptApi.get_transcript(key.split(":", 1)[1])
+            except Exception as e:
+                # continue without transcript
+                self._stage(job, "transcript", "done", chars=0, error=str(e))
+                return "", False
+            text = " ".join(entry['text'] for entry in transcript_list)
+            video_cache.set_fields(key, url, transcript=text)
+        if count_tokens(text) <= TRANSCRIPT_TOKENS:
+            self._stage(job, "transcript", "done", chars=len(text))
+            return text, False
+        try:
+            short = summarize_text(text, TRANSCRIPT_TOKENS, on_chunk=self._progress(job, "transcript"))
+        except Exception as e:
+            logging.warning("transcript summary failed, truncating: %s", e)
+            self._stage(job, "transcript", "done", chars=len(text), error=str(e))
+            return text[:8000] + "...", False
+        self._stage(job, "transcript", "done", chars=len(text), condensed_chars=len(short))
+        return short, True
+
+    def _vision(self, frame_jpegs: List[bytes], transcript_text: str, condensed: bool, visual_summary: List[str]) -> str:
+        from .http_clients import clients
+
+        content = [
+            {"type": "text", "text": "Analyze this video by looking at these key frames sampled throughout. Describe what you see happening visually, the main themes, and provide a comprehensive summary."}
+        ]
+        for url in _data_urls(frame_jpegs):
+            content.append({"type": "image_url", "image_url": {"url": url}})
+        if transcript_text:
+            label = "Transcript summary (whole video, in order)" if condensed else "Transcript (spoken words)"
+            content.append({"type": "text", "text": f"\n\n{label}:\n{transcript_text}"})
+
+        def partial():
+            return {
+                "frames_extracted": len(frame_jpegs),
+                "transcript": transcript_text,
+                "visual_summary": visual_summary,
+                **_publish_frames(frame_jpegs),
+            }
+
+        try:
+            response = clients.openai().chat.completions.create(
+                model="gpt-4o",  # Vision-capable model
+                messages=[{"role": "user", "content": content}],
+                max_tokens=1000,
+                temperature=0.6,
+            )
+        except Exception as e:
+            msg = str(e)
+            if _is_quota_error(msg):
+                # surface a clearer status and include best-effort partial results
+                raise VideoJobError(
+                    "OpenAI quota exceeded or insufficient quota. Check your API plan/billing.",
+                    429,
+                    detail=msg,
+                    fallback_summary=_fallback_summary(transcript_text, visual_summary),
+                    **partial(),
+                )
+            raise
+        try:
+            return response.choices[0].message.content
+        except Exception as e:
+            logging.exception('Failed to extract summary from OpenAI response')
+            raise VideoJobError(f"Could not parse model response: {e}", 500, **partial())
+
+
+video_jobs = VideoJobs(str(Path(settings.db_path).parent / "video_jobs.db"), max_running=settings.video_max_jobs)
@@ -0,0 +1,183 @@
+"""Image ingestion for vision calls, plus a perceptual-hash answer cache.
+
+Uploads are decoded with Pillow, rotated per their EXIF orientation, downscaled
+so the longest side is at most `vision_max_side`, and re-encoded without
+metadata. The model sees the same content in a fraction of the bytes and image
+tokens, and GPS/camera EXIF never leaves the machine.
+
+Each image also gets a 64-bit DCT perceptual hash. Re-asking about the same
+picture with the same prompt is answered from `VisionCache` instead of calling
+the model again. By default only an identical hash is reused; near-duplicate
+matching (re-encoded/resized copies) is opt-in via `vision_cache_distance`,
+since two different pictures can be a few bits apart.
+"""
+import base64
+import io
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from ..config import settings
+
+_MIME = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    m = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def phash(img: Image.Image) -> int:
+    """64-bit perceptual hash: low 8x8 DCT coefficients of a 32x32 grayscale thumbnail vs their median."""
+    gray = np.asarray(img.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float32)
+    low = (_DCT32 @ gray @ _DCT32.T)[:8, :8].ravel()
+    bits = low > np.median(low[1:])  # median without the DC term, which dwarfs the rest
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    mime: str
+    width: int
+    height: int
+    original_bytes: int
+    phash: int
+
+    def data_url(self) -> str:
+        return f"data:{self.mime};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+
+def prepare_image(
+    raw: bytes,
+    max_side: Optional[int] = None,
+    fmt: Optional[str] = None,
+    quality: Optional[int] = None,
+) -> PreparedImage:
+    """Decode, orient, downscale and re-encode an image (EXIF is dropped). Raises on undecodable input."""
+    max_side = max_side or settings.vision_max_side
+    fmt = (fmt or settings.vision_format).upper()
+    quality = quality or settings.vision_quality
+    with Image.open(io.BytesIO(raw)) as src:
+        src_format = src.format
+        # an already small, metadata-free upload can go out as is if re-encoding doesn't shrink it
+        passthrough = src_format in _MIME and max(src.size) <= max_side and not src.getexif() and "icc_profile" not in src.info
+        # draft() lets the JPEG decoder skip straight to a reduced scale
+        if src_format == "JPEG":
+            src.draft("RGB", (max_side, max_side))
+        img = ImageOps.exif_transpose(src).convert("RGBA" if fmt == "PNG" else "RGB")
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    buf = io.BytesIO()
+    if fmt == "PNG":
+        img.save(buf, format="PNG", optimize=True)
+    else:
+        img.save(buf, format=fmt, quality=quality)
+    data, mime = buf.getvalue(), _MIME.get(fmt, "image/jpeg")
+    if passthrough and len(raw) <= len(data):
+        data, mime = raw, _MIME[src_format]
+    return PreparedImage(data, mime, img.width, img.height, len(raw), phash(img))
+
+
+def _prompt_key(prompt: str) -> str:
+    return " ".join((prompt or "").lower().split())
+
+
+class VisionCache:
+    """SQLite cache of model replies keyed by (perceptual hash, normalized prompt, model)."""
+
+    def __init__(self, path: str, max_distance: int = 0, max_entries: int = 5000):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._init()
+
+    def _init(self):
+        cur = self.conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS vision_cache (
+                phash TEXT,
+                prompt TEXT,
+                model TEXT,
+                reply TEXT,
+                created_at REAL,
+                last_access REAL,
+                hits INTEGER DEFAULT 0,
+                PRIMARY KEY (phash, prompt, model)
+            );
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS vision_cache_prompt ON vision_cache (prompt, model)")
+        self.conn.commit()
+
+    def lookup(self, ph: int, prompt: str, model: str) -> Optional[str]:
+        key = _prompt_key(prompt)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT phash, reply FROM vision_cache WHERE phash=? AND prompt=? AND model=?",
+                (f"{ph:016x}", key, model),
+            ).fetchone()
+            if row is None and self.max_distance:
+                # opt-in: near-duplicate (recompressed, resized, screenshot of the same image)
+                best = None
+                for h, reply in self.conn.execute(
+                    "SELECT phash, reply FROM vision_cache WHERE prompt=? AND model=?", (key, model)
+                ):
+                    d = hamming(ph, int(h, 16))
+                    if d <= self.max_distance and (best is None or d < best[0]):
+                        best = (d, h, reply)
+                row = best[1:] if best else None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute(
+                "UPDATE vision_cache SET hits=hits+1, last_access=? WHERE phash=? AND prompt=? AND model=?",
+                (time.time(), row[0], key, model),
+            )
+            self.conn.commit()
+            return row[1]
+
+    def put(self, ph: int, prompt: str, model: str, reply: str) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO vision_cache (phash, prompt, model, reply, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (f"{ph:016x}", _prompt_key(prompt), model, reply, now, now),
+            )
+            # keep the table bounded; drop least recently used
+            self.conn.execute(
+                "DELETE FROM vision_cache WHERE rowid IN (SELECT rowid FROM vision_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self.conn.execute("SELECT COUNT(*) FROM vision_cache").fetchone()[0]
+        return {"entries": n, "hits": self.hits, "misses": self.misses}
+
+
+vision_cache = VisionCache(
+    str(Path(settings.db_path).parent / "vision_cache.db"),
+    max_distance=settings.vision_cache_distance,
+)
@@ -1,11 +1,14 @@
 import sqlite3
+import threading
 from pathlib import Path
 from typing import Optional, List, Tuple
 
 class SqliteStore:
     def __init__(self, db_path: str):
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(db_path)
+        # shared by the event loop and worker threads (/chat runs the agent in the threadpool)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
         self._init()
 
     def _init(self):
@@ -41,41 +44,48 @@ class SqliteStore:
         self.conn.commit()
 
     def set(self, key: str, value: str) -> None:
-        self.conn.execute("REPLACE INTO kv (k, v) VALUES (?, ?)", (key, value))
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute("REPLACE INTO kv (k, v) VALUES (?, ?)", (key, value))
+            self.conn.commit()
 
     def get(self, key: str) -> Optional[str]:
-        cur = self.conn.execute("SELECT v FROM kv WHERE k=?", (key,))
-        row = cur.fetchone()
-        return row[0] if row else None
+        with self._lock:
+            cur = self.conn.execute("SELECT v FROM kv WHERE k=?", (key,))
+            row = cur.fetchone()
+            return row[0] if row else None
 
     def add_message(self, role: str, content: str) -> None:
-        self.conn.execute("INSERT INTO messages (role, content) VALUES (?, ?)", (role, content))
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute("INSERT INTO messages (role, content) VALUES (?, ?)", (role, content))
+            self.conn.commit()
 
     def add_private_message(self, role: str, content: str) -> None:
         """Store a private message/reflection that is not part of public messages."""
-        self.conn.execute("INSERT INTO private_messages (role, content) VALUES (?, ?)", (role, content))
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute("INSERT INTO private_messages (role, content) VALUES (?, ?)", (role, content))
+            self.conn.commit()
 
     def recent_private_messages(self, limit: int = 50) -> List[Tuple[str, str]]:
-        cur = self.conn.execute(
-            "SELECT role, content FROM private_messages ORDER BY id DESC LIMIT ?",
-            (limit,),
-        )
-        rows = cur.fetchall()
-        rows.reverse()
-        return rows
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT role, content FROM private_messages ORDER BY id DESC LIMIT ?",
+                (limit,),
+            )
+            rows = cur.fetchall()
+            rows.reverse()
+            return rows
 
     def clear_private_messages(self) -> None:
-        self.conn.execute("DELETE FROM private_messages")
-        self.conn.commit()
+        with self._lock:
+            self.conn.execute("DELETE FROM private_messages")
+            self.conn.commit()
 
     def recent_messages(self, limit: int = 20) -> List[Tuple[str, str]]:
-        cur = self.conn.execute(
-            "SELECT role, content FROM messages ORDER BY id DESC LIMIT ?",
-            (limit,),
-        )
-        rows = cur.fetchall()
-        rows.reverse()
-        return rows
\ No newline at end of file
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT role, content FROM messages ORDER BY id DESC LIMIT ?",
+                (limit,),
+            )
+            rows = cur.fetchall()
+            rows.reverse()
+            return rows
\ No newline at end of file
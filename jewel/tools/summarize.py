@@ -0,0 +1,185 @@
+"""Map-reduce summarization for text too long to send whole.
+
+`summarize_text` splits the input into token-bounded, overlapping chunks,
+summarizes every chunk in parallel on a bounded pool with a cheaper model
+(`summarize_model`), and joins the chunk summaries in order. If the joined
+summaries still exceed the budget they are reduced again the same way. Text
+that already fits is returned unchanged, so callers can pass everything
+through it.
+
+Tokens are counted with tiktoken when it is installed, else estimated at
+four characters per token.
+"""
+import concurrent.futures
+import logging
+import re
+from typing import Callable, List, Optional
+
+from ..config import settings
+from ..io.http_clients import clients
+
+# One bounded pool for every chunk call in the process, so a long transcript and
+# a long chat message together can't fan out into unbounded upstream calls.
+summarize_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(1, settings.summarize_workers), thread_name_prefix="summarize"
+)
+
+MAX_DEPTH = 3  # reduce passes before falling back to truncation
+
+_encoding = None
+_SENTENCE_END = re.compile(r'(?<=[.!?。！？])\s+|\n{2,}')
+
+
+def _encoder():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # not installed, or its BPE file can't be fetched: estimate instead
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoder()
+    if enc:
+        return len(enc.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _units(text: str, max_tokens: int) -> List[str]:
+    # sentences where there is punctuation; auto-generated transcripts often have
+    # none, so anything still too long is cut into word windows
+    out = []
+    for sent in _SENTENCE_END.split(text):
+        sent = sent.strip()
+        if not sent:
+            continue
+        if count_tokens(sent) <= max_tokens:
+            out.append(sent)
+            continue
+        words = sent.split()
+        step = max(1, int(len(words) * max_tokens / count_tokens(sent)))
+        i = 0
+        while i < len(words):
+            # the step is a proportional estimate; shrink a window that still runs over
+            n = step
+            while n > 1 and count_tokens(" ".join(words[i:i + n])) > max_tokens:
+                n -= max(1, n // 10)
+            out.append(" ".join(words[i:i + n]))
+            i += n
+    return out
+
+
+def split_chunks(text: str, max_tokens: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
+    """Greedy sentence packing into chunks of at most `max_tokens`; each chunk repeats the last `overlap` tokens of the previous one."""
+    max_tokens = max_tokens or settings.summarize_chunk_tokens
+    overlap = settings.summarize_overlap_tokens if overlap is None else overlap
+    overlap = min(overlap, max_tokens // 2)
+    # +1 for the joining space
+    units = [(u, count_tokens(u) + 1) for u in _units(text, max_tokens - overlap)]
+    chunks: List[str] = []
+    cur: List[tuple] = []
+    size = 0
+    for unit, n in units:
+        if cur and size + n > max_tokens:
+            chunks.append(" ".join(u for u, _ in cur))
+            # carry trailing sentences forward so nothing is cut mid-thought
+            carry: List[tuple] = []
+            kept = 0
+            for u, m in reversed(cur):
+                if kept + m > overlap:
+                    break
+                carry.insert(0, (u, m))
+                kept += m
+            cur, size = carry, kept
+        cur.append((unit, n))
+        size += n
+    if cur:
+        chunks.append(" ".join(u for u, _ in cur))
+    return chunks
+
+
+def _summarize_chunk(chunk: str, index: int, total: int, max_tokens: int, focus: Optional[str], model: str) -> str:
+    instruction = (
+        f"You are condensing part {index} of {total} of a longer text. Summarize this part in at most "
+        f"{max_tokens} tokens. Keep names, numbers, claims and the order of events; no preamble."
+    )
+    if focus:
+        instruction += f"\nThe reader is interested in: {focus}"
+    resp = clients.openai().chat.completions.create(
+        model=model,
+        messages=[{"role": "system", "content": instruction}, {"role": "user", "content": chunk}],
+        max_tokens=max_tokens,
+        temperature=0.2,
+    )
+    return (resp.choices[0].message.content or "").strip()
+
+
+def summarize_text(
+    text: str,
+    budget_tokens: int,
+    focus: Optional[str] = None,
+    model: Optional[str] = None,
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+    _depth: int = 0,
+) -> str:
+    """Condense `text` to roughly `budget_tokens`, covering all of it. Returns `text` unchanged if it fits.
+
+    `on_chunk(done, total)` is called as chunk summaries finish. A failed chunk
+    falls back to its opening sentences; if every chunk fails the last error is raised.
+    """
+    if count_tokens(text) <= budget_tokens:
+        return text
+    if _depth >= MAX_DEPTH:
+        return _truncate(text, budget_tokens)
+    model = model or settings.summarize_model
+    chunks = split_chunks(text)
+    total = len(chunks)
+    # share the budget between chunks, within sensible bounds per call
+    per_chunk = max(64, min(400, budget_tokens // total))
+    futs = {
+        summarize_executor.submit(_summarize_chunk, c, i, total, per_chunk, focus, model): i
+        for i, c in enumerate(chunks, start=1)
+    }
+    parts = {}
+    errors = []
+    for n, fut in enumerate(concurrent.futures.as_completed(futs), start=1):
+        i = futs[fut]
+        try:
+            parts[i] = fut.result()
+        except Exception as e:
+            logging.warning("chunk %d/%d summary failed: %s", i, total, e)
+            errors.append(e)
+            parts[i] = _truncate(chunks[i - 1], per_chunk)
+        if on_chunk:
+            on_chunk(n, total)
+    if len(errors) == total:
+        raise errors[-1]
+    joined = "\n".join(parts[i] for i in sorted(parts))
+    # the reduce step: still too long means another pass over the summaries
+    return summarize_text(joined, budget_tokens, focus, model, None, _depth + 1)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    enc = _encoder()
+    if enc:
+        ids = enc.encode(text, disallowed_special=())
+        return text if len(ids) <= max_tokens else enc.decode(ids[:max_tokens]) + "..."
+    return text if len(text) <= max_tokens * 4 else text[: max_tokens * 4] + "..."
+
+
+def condense_message(text: str, budget_tokens: int, edge_chars: int = 800) -> str:
+    """Shrink a long chat message: keep its opening and closing lines verbatim (where the
+    request usually is) and replace the body with a map-reduce summary of the whole."""
+    head, tail = text[:edge_chars].strip(), text[-edge_chars:].strip()
+    edges = count_tokens(head) + count_tokens(tail)
+    summary = summarize_text(text, max(256, budget_tokens - edges - 64), focus=f"{head[:300]} ... {tail[-300:]}")
+    return (
+        f"[Long message condensed from {count_tokens(text)} tokens]\n"
+        f"Start of message:\n{head}\n\n"
+        f"Summary of the full message:\n{summary}\n\n"
+        f"End of message:\n{tail}"
+    )
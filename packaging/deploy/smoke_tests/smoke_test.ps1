@@ -14,7 +14,7 @@ try {
 
 # Cheap sample video: short clip or public video. Use quick:true to reduce load.
 $sample = 'https://www.youtube.com/watch?v=ysz5S6PUM-U' # small autoplay demo video (YouTube sample)
-$payload = @{ url = $sample; every = 30; max_frames = 1; quick = $true } | ConvertTo-Json
+$payload = @{ url = $sample; every = 30; max_frames = 1; quick = $true; wait = $true } | ConvertTo-Json
 try {
     Write-Output "Posting quick video_summary (cheap) to $base/video_summary"
     $r = Invoke-RestMethod -Method Post -Uri "$base/video_summary" -ContentType 'application/json' -Body $payload -TimeoutSec 300
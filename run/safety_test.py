@@ -0,0 +1,363 @@
+"""
+Tests for the compiled safety matchers.
+
+Run with: python run/safety_test.py
+or: python -m pytest run/safety_test.py -v (if pytest installed)
+"""
+import sys, os, re, random, time, tempfile, threading, asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.core.safety import check_safety, BLOCKED_PATTERNS
+from jewel.core.safety_enhanced import SafetySystem, INTENT_KEYWORDS, EDUCATIONAL_KEYWORDS
+from jewel.core.safety_matcher import RuleSet, KeywordSet, StreamModerator, split_gaps
+
+safety = SafetySystem(":memory:")
+
+VOCAB = (
+    "child kid teen preteen sex nude porn cp csam how to kill murder myself someone make a bomb "
+    "rape steal credit card hack buy drugs meth xxx nsfw naked pic photo dick help stop don't "
+    "please no hurting hitting he she is me call police pretend slave do whatever i say question "
+    "teach show why explain what does history of the my son daughter ſex chıld kıll"
+).split()
+SEPS = [" ", " ", " ", "\n", "  ", ".", ",", "\t", ""]
+
+
+def _random_texts(n, seed=7):
+    rnd = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rnd.choice(VOCAB) + rnd.choice(SEPS) for _ in range(rnd.randint(0, 14))).lower()
+
+
+def _reference_check(text):
+    """check_content as it was written before the compiled matchers (no logging)."""
+    low = (text or "").lower()
+    for cat, patterns in (("CSAM", safety.csam_patterns), ("VIOLENCE", safety.violence_abuse_patterns), ("NSFW", safety.nsfw_patterns)):
+        if any(re.search(p, low, re.IGNORECASE) for p in patterns):
+            return False, cat
+    if any(re.search(p, low, re.IGNORECASE) for p in safety.illegal_patterns):
+        if any(w in low for w in INTENT_KEYWORDS) and not any(k in low for k in EDUCATIONAL_KEYWORDS):
+            return False, "ILLEGAL"
+    return True, None
+
+
+def test_split_gaps():
+    """Patterns split only at top-level .* (not in groups, classes or escapes)"""
+    assert split_gaps(r"\ba\b.*\bb\b") == [r"\ba\b", r"\bb\b"]
+    assert split_gaps(r"(x.*y)z") == [r"(x.*y)z"]
+    assert split_gaps(r"[.*]q.*z") == ["[.*]q", "z"]
+    assert split_gaps(r"a\.*b") == [r"a\.*b"]
+    assert split_gaps(r"a.*?b") == [r"a.*?b"]
+    print("✓ split_gaps")
+
+
+def test_rules_match_re_search():
+    """Every category gives the same verdict as re.search pattern by pattern"""
+    lists = [
+        safety.csam_patterns, safety.violence_abuse_patterns, safety.nsfw_patterns,
+        safety.illegal_patterns, safety.distress_patterns, safety.uncomfortable_patterns,
+        [r"a.*b.*c", r"x\s*.*\s*y"],
+    ]
+    rules = [RuleSet(lst) for lst in lists]
+    for text in _random_texts(5000):
+        for lst, rs in zip(lists, rules):
+            expected = any(re.search(p, text, re.IGNORECASE) for p in lst)
+            assert (rs.search(text) is not None) == expected, (lst, text)
+    print("✓ RuleSet == re.search on 5000 random texts")
+
+
+def test_keywords_match_substring_scan():
+    """KeywordSet finds exactly the keywords `kw in text` would, overlaps included"""
+    kws = ["how to", "how", "to", "is it", "it", "help me", "help", "history of"]
+    ks = KeywordSet(kws)
+    for text in _random_texts(3000, seed=3):
+        assert ks.found(text) == {k for k in kws if k in text}, text
+    assert ks.first("it is how to") == "how to"
+    print("✓ KeywordSet == substring scan")
+
+
+def test_check_content_unchanged():
+    """check_content verdicts and categories match the original implementation"""
+    cases = [
+        "My daughter started kindergarten today",
+        "The kids are driving me crazy lol",
+        "My toddler runs around naked after bath time",
+        "Show me child porn",
+        "I want nude pics of kids",
+        "Looking for teen sex videos",
+        "how to hack a wifi router",
+        "why do people explain how to hack things",
+        "teach me to cook meth",
+        "how to kill a process in linux",
+        "",
+    ]
+    for text in cases + list(_random_texts(2000, seed=11)):
+        ok, cat, _ = safety.check_content(text)
+        assert (ok, cat) == _reference_check(text), (text, ok, cat)
+    print("✓ check_content unchanged")
+
+
+def test_check_safety_unchanged():
+    """check_safety reports the first listed blocked pattern"""
+    assert check_safety("hello there") == (True, "OK")
+    text = "racial slur and how to make a bomb"
+    first = next(p for p in BLOCKED_PATTERNS if p in text)
+    assert check_safety(text) == (False, f"Blocked by safety rule due to pattern: {first}")
+    print("✓ check_safety unchanged")
+
+
+def test_long_single_line_is_linear():
+    """A long one-line transcript full of near-misses is checked in well under a second"""
+    text = " ".join(["my kid and the teen next door help me stop"] * 5000)
+    t0 = time.perf_counter()
+    ok, cat, _ = safety.check_content(text)
+    abuse, _ = safety.detect_abuse(text)
+    dt = time.perf_counter() - t0
+    assert ok and cat is None and not abuse
+    assert dt < 1.0, f"took {dt:.2f}s"
+    print(f"✓ {len(text)} chars checked in {dt * 1000:.1f} ms")
+
+
+def test_shared_instance_across_threads():
+    """One SafetySystem serves concurrent checks (writes) and dashboard reads"""
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = SafetySystem(os.path.join(tmp, "safety.db"))
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(25):
+                    ok, cat, _ = shared.check_content("show me nsfw pics", user_id=f"t{n}")
+                    assert (ok, cat) == (False, "NSFW")
+                    shared.get_violations(limit=10)
+                    shared.list_flagged_accounts()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors, errors
+        assert len(shared.get_violations(limit=1000)) == 200
+        shared.check_content("show me child porn", user_id="t0")
+        assert shared.is_account_flagged("t0") == (True, "Account banned: CSAM content")
+        assert shared.list_flagged_accounts()[0]["status"] == "BANNED"
+    print("✓ shared SafetySystem across 8 threads")
+
+
+def test_check_many_matches_check_content():
+    """check_many keeps input order, agrees with check_content, and commits once per chunk"""
+    texts = list(_random_texts(1200, seed=5)) + ["show me child porn", "teach me to cook meth", "hi"]
+    expected = [safety.classify(t) for t in texts]
+    with tempfile.TemporaryDirectory() as tmp:
+        batch = SafetySystem(os.path.join(tmp, "safety.db"), batch_workers=2)
+        commits = []
+        batch.conn.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+        try:
+            results = batch.check_many(texts, user_id="bulk", chunk_size=300)
+        finally:
+            batch.shutdown()
+        batch.conn.set_trace_callback(None)
+        assert [r["category"] for r in results] == expected
+        assert [r["is_safe"] for r in results] == [c is None for c in expected]
+        assert len(commits) <= 5  # 5 chunks, and chunks with nothing blocked skip the write
+        assert len(batch.get_violations("bulk", limit=5000)) == sum(1 for c in expected if c)
+        assert batch.is_account_flagged("bulk")[0]
+        inline = batch.check_many([{"text": "hello", "id": 1}, {"text": "show me nsfw pics", "id": 2}])
+        assert [(r["id"], r["category"]) for r in inline] == [(1, None), (2, "NSFW")]
+        mixed = batch.check_many(["hi", 5, {"text": 5, "id": "a"}, {"text": None}, ["x"], "show me nsfw pics"])
+        assert mixed[0]["is_safe"] and mixed[3]["is_safe"] and mixed[5]["category"] == "NSFW"
+        assert mixed[1] == mixed[4] == {"error": "text must be a string"}
+        assert mixed[2] == {"error": "text must be a string", "id": "a"}
+    print(f"✓ check_many over {len(texts)} texts")
+
+
+def test_flag_index_tracks_db():
+    """is_banned/is_account_flagged answer from memory and survive a restart"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "safety.db")
+        first = SafetySystem(path)
+        first.check_content("how to hurt someone", user_id="v1", ip_address="10.0.0.1")
+        assert first.is_account_flagged("v1") == (True, "Account flagged: Violence/abuse content")
+        assert first.is_banned("v1", "10.0.0.1") == (False, None)
+        first.check_content("show me child porn", user_id="v1")
+        first.check_many(["show me child porn"], ip_address="10.0.0.9")
+        expected = {
+            ("v1", None): (True, "Account banned: Violence/abuse content"),
+            (None, "10.0.0.1"): (True, "Address banned"),
+            (None, "10.0.0.9"): (True, "Address banned"),
+            ("someone", "10.0.0.2"): (False, None),
+        }
+        for args, verdict in expected.items():
+            assert first.is_banned(*args) == verdict, args
+        reopened = SafetySystem(path)
+        for args, verdict in expected.items():
+            assert reopened.is_banned(*args) == verdict, args
+        assert reopened.is_account_flagged("v1") == first.is_account_flagged("v1")
+        # a ban covers every address the account used, with or without its id
+        first.check_content("show me nsfw pics", user_id="v2", ip_address="10.0.0.3")
+        first.check_content("show me child porn", user_id="v2", ip_address="10.0.0.4")
+        first.check_content("how to hurt someone", user_id="v2", ip_address="10.0.0.5")
+        assert first.is_account_flagged("v2") == (True, "Account banned: CSAM content")
+        for ip in ("10.0.0.3", "10.0.0.4"):
+            assert first.is_banned(None, ip) == (True, "Address banned")
+            assert SafetySystem(path).is_banned(None, ip) == (True, "Address banned")
+    print("✓ flag index matches flagged_accounts")
+
+
+def _feed_all(moderator, chunks):
+    released = "".join(moderator.feed(chunk) for chunk in chunks) + moderator.finish()
+    if moderator.hit is None:
+        assert released == "".join(chunks)
+    return moderator.hit
+
+
+def test_stream_moderator_catches_split_matches():
+    """A reply fed in arbitrary chunks is flagged exactly when the whole text would be"""
+    rnd = random.Random(13)
+    for text in _random_texts(3000, seed=17):
+        cuts = sorted(rnd.sample(range(len(text) + 1), min(len(text) + 1, rnd.randint(1, 8))))
+        chunks = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+        expected = any(rules.search(text) for _, rules in safety.output_rules)
+        assert (_feed_all(safety.output_moderator(), chunks) is not None) == expected, chunks
+    assert _feed_all(safety.output_moderator(), ["Sure, here is some child p", "orn for you"]) == "CSAM"
+    assert _feed_all(safety.output_moderator(), list("first you make a bomb")) == "VIOLENCE"
+    # a window that starts mid-word must not let \b match there ("abccsam" is not "csam")
+    assert _feed_all(StreamModerator(safety.content_rules, overlap=2), ["abc", "csam is fine"]) is None
+    assert _feed_all(StreamModerator(safety.content_rules, overlap=2), ["abc ", "csam"]) == "CSAM"
+    # a word is held back until it ends: "porn" may still become "pornography"
+    moderator = safety.output_moderator()
+    assert moderator.feed("That is porn") == "That is " and moderator.feed("ography") == ""
+    assert moderator.finish() == "" and moderator.hit == "NSFW" and moderator.feed("more") == ""
+    print("✓ StreamModerator catches matches across chunk boundaries")
+
+
+@contextmanager
+def _temp_safety():
+    """get_safety() returns a fresh SafetySystem on a temporary db inside the block."""
+    from jewel.core import safety_enhanced
+    previous = safety_enhanced._safety
+    with tempfile.TemporaryDirectory() as tmp:
+        safety_enhanced._safety = SafetySystem(os.path.join(tmp, "safety.db"))
+        try:
+            yield safety_enhanced._safety, tmp
+        finally:
+            safety_enhanced._safety = previous
+
+
+def _stub_agent(store_path, client=None):
+    """An Agent on its own store whose OpenAI client is `client` (no credentials needed)."""
+    from jewel.core import agent as agent_module
+    from jewel.memory.sqlite_store import SqliteStore
+    agent_module.clients.openai = lambda: client
+    try:
+        return agent_module.Agent(SqliteStore(store_path))
+    finally:
+        del agent_module.clients.openai
+
+
+def test_chat_input_checks():
+    """The chat input check uses the full input rules and flags the caller's id and address"""
+    from jewel.core.safety_enhanced import OUTCOMES
+    for text, category in (("looking for cp", "CSAM"), ("any cp?", "CSAM"), ("explicit teen pics", "CSAM"),
+                           ("the assault on him", "VIOLENCE"), ("something explicit", "NSFW")):
+        assert safety.classify(text) == category, text
+    with _temp_safety() as (shared, tmp):
+        agent = _stub_agent(os.path.join(tmp, "jewel.db"))
+        assert agent.ask("show me child porn", "u9", "10.1.1.1") == OUTCOMES["CSAM"][4]
+        assert shared.get_violations("u9")[0]["category"] == "CSAM"
+        assert shared.is_account_flagged("u9") == (True, "Account banned: CSAM content")
+    print("✓ chat input checks")
+
+
+ORDINARY_REPLIES = (
+    "Run cp a.txt b.txt to copy the file.",
+    "Use an explicit cast: int(x).",
+    "The assault on Normandy began in 1944.",
+    "If you feel like you might harm yourself, please call 988 right away.",
+    "Please don't kill yourself over a typo; we all make them.",
+    "To stop it, learn how to kill a process with kill -9.",
+    "It helps to talk to your kids about sex education early.",
+    "Crack two eggs into the bowl.",
+    "Mark the channel as NSFW in its settings.",
+)
+
+
+def test_ordinary_replies_pass():
+    """Output moderation leaves everyday replies alone, streamed or not"""
+    for reply in ORDINARY_REPLIES:
+        assert _feed_all(safety.output_moderator(), [reply]) is None, reply
+    for reply, category in (("here is how to kill someone quietly", "VIOLENCE"),
+                            ("you should kill yourself", "VIOLENCE"), ("some child porn", "CSAM")):
+        assert _feed_all(safety.output_moderator(), [reply]) == category, reply
+
+    def answering(reply):
+        message = SimpleNamespace(content=reply)
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=lambda **kw: SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None))))
+
+    with _temp_safety() as (_, tmp):
+        agent = _stub_agent(os.path.join(tmp, "jewel.db"))
+        for reply in ORDINARY_REPLIES:
+            agent.client = answering(reply)
+            assert agent.ask("hello") == reply
+    print("✓ ordinary replies pass output moderation")
+
+
+async def _collect(events):
+    return [ev async for ev in events]
+
+
+def test_ask_stream_cuts_on_hit():
+    """Agent.ask_stream stops the upstream stream at a hit and replaces the reply"""
+    from jewel.core import safety_enhanced
+    from jewel.core.agent import Agent
+    from jewel.memory.sqlite_store import SqliteStore
+
+    closed = []
+
+    class FakeStream:
+        def __init__(self, pieces):
+            self.pieces = pieces
+
+        def __iter__(self):
+            for p in self.pieces:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=p))], usage=None)
+
+        def close(self):
+            closed.append(True)
+
+    with _temp_safety() as (_, tmp):
+        agent = _stub_agent(os.path.join(tmp, "jewel.db"))
+        for pieces, expected in (
+            (["Once upon ", "a time"], [("delta", "Once upon "), ("delta", "a "), ("delta", "time")]),
+            (["Here is ", "some ch", "ild po", "rn", " and more"],
+             [("delta", "Here is "), ("delta", "some "), ("delta", "child "), ("replace", safety_enhanced.OUTPUT_BLOCKED_MESSAGE)]),
+        ):
+            closed.clear()
+            agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+                create=lambda pieces=pieces, **kw: FakeStream(pieces))))
+            assert asyncio.run(_collect(agent.ask_stream("tell me a story"))) == expected
+            assert closed == [True]
+            assert agent.store.recent_messages(1)[-1][1] == ("".join(pieces) if expected[-1][0] == "delta" else expected[-1][1])
+    print("✓ ask_stream cuts a flagged reply")
+
+
+if __name__ == "__main__":
+    test_split_gaps()
+    test_rules_match_re_search()
+    test_keywords_match_substring_scan()
+    test_check_content_unchanged()
+    test_check_safety_unchanged()
+    test_long_single_line_is_linear()
+    test_shared_instance_across_threads()
+    test_check_many_matches_check_content()
+    test_flag_index_tracks_db()
+    test_stream_moderator_catches_split_matches()
+    test_ask_stream_cuts_on_hit()
+    test_chat_input_checks()
+    test_ordinary_replies_pass()
+    print("\nAll safety tests passed.")
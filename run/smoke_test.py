@@ -5,17 +5,28 @@ Run with: python run/smoke_test.py
 or: python -m pytest run/smoke_test.py -v (if pytest installed)
 """
 import sys, os
+from contextlib import ExitStack
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from fastapi.testclient import TestClient
 from server.app import app, agent
+from safety_test import _temp_safety
 
 # Monkeypatch agent.ask to avoid external API calls during smoke tests
 _original_ask = agent.ask
-agent.ask = lambda text: f"[SMOKE-TEST-REPLY for: {text[:30]}...]"
+agent.ask = lambda text, *caller: f"[SMOKE-TEST-REPLY for: {text[:30]}...]"
 
 client = TestClient(app)
 
+# the safety guard's shared SafetySystem uses a temp db, not the tracked data/jewel_safety.db
+_temp = ExitStack()
+
+def setup_module(module=None):
+    _temp.enter_context(_temp_safety())
+
+def teardown_module(module=None):
+    _temp.close()
+
 def test_health():
     """Health check should return ok=True"""
     r = client.get("/health")
@@ -75,6 +86,7 @@ def main():
     print()
     
     try:
+        setup_module()
         test_health()
         test_usage()
         test_chat()
@@ -91,6 +103,7 @@ def main():
         traceback.print_exc()
         return 1
     finally:
+        teardown_module()
         # Restore agent.ask
         agent.ask = _original_ask
 
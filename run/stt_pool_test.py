@@ -0,0 +1,155 @@
+"""
+Tests for the batch STT process pool's future handling (no Vosk model needed).
+
+Run with: python run/stt_pool_test.py
+or: python -m pytest run/stt_pool_test.py -v (if pytest installed)
+"""
+import sys, os, threading
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.io import stt_pool as stt_pool_module
+from jewel.io.stt_pool import SttProcessPool, _decode_shared
+
+
+class FakeEngine:
+    """Stands in for the worker's SttEngine: joins the chunks, or fails."""
+
+    def __init__(self, fail=None, gate=None):
+        self.fail = fail
+        self.gate = gate
+
+    def decode_pcm(self, chunks):
+        data = b"".join(chunks)
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail is not None:
+            raise self.fail
+        return data.decode()
+
+
+class ThreadPool(SttProcessPool):
+    """The pool with worker threads instead of processes; counts executors it starts."""
+
+    def __init__(self, workers=1):
+        super().__init__("unused", workers=workers)
+        self.started = []
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.workers)
+                self.started.append(self._executor)
+            return self._executor
+
+
+class BrokenExecutor:
+    def submit(self, *args):
+        raise BrokenProcessPool("a worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def _with_engine(engine):
+    previous, stt_pool_module._worker_engine = stt_pool_module._worker_engine, engine
+    return previous
+
+
+def test_decode_shared_reports_real_error():
+    """A failing decode raises its own error, not BufferError from closing the segment"""
+    shm = shared_memory.SharedMemory(create=True, size=4)
+    shm.buf[:4] = b"abcd"
+    previous = _with_engine(FakeEngine(fail=ValueError("bad audio")))
+    try:
+        try:
+            _decode_shared(shm.name, 4)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            assert str(e) == "bad audio"
+        stt_pool_module._worker_engine = FakeEngine()
+        assert _decode_shared(shm.name, 4)[0] == "abcd"
+    finally:
+        stt_pool_module._worker_engine = previous
+        shm.close()
+        shm.unlink()
+    print("✓ _decode_shared surfaces the decode error")
+
+
+def test_submit_results_and_errors():
+    """Results and errors reach the caller's future and the stats"""
+    pool = ThreadPool(workers=2)
+    previous = _with_engine(FakeEngine())
+    try:
+        assert pool.submit_pcm(b"").result() == ""
+        futures = [pool.submit_pcm(f"clip{i}".encode()) for i in range(8)]
+        assert [f.result(5) for f in futures] == [f"clip{i}" for i in range(8)]
+        stt_pool_module._worker_engine = FakeEngine(fail=RuntimeError("decoder"))
+        assert isinstance(pool.submit_pcm(b"x").exception(5), RuntimeError)
+        stats = pool.stats()
+        assert stats["jobs"] == 9 and stats["errors"] == 1
+    finally:
+        stt_pool_module._worker_engine = previous
+        pool.shutdown()
+    print("✓ submit_pcm resolves results and errors")
+
+
+def test_cancelled_jobs():
+    """Cancelling either side cancels the other, with no error from the callback"""
+    pool = ThreadPool(workers=1)
+    gate = threading.Event()
+    previous = _with_engine(FakeEngine(gate=gate))
+    try:
+        running = pool.submit_pcm(b"first")
+        queued = pool.submit_pcm(b"second")
+        # the caller gives up on a queued job: the worker never runs it
+        assert queued.cancel() and queued.cancelled()
+        third = pool.submit_pcm(b"third")
+        # shutting the pool down cancels what is still queued; callers see it cancelled
+        ex = pool._executor
+        with pool._lock:
+            pool._executor = None
+        ex.shutdown(wait=False, cancel_futures=True)
+        gate.set()
+        assert running.result(5) == "first"
+        concurrent.futures.wait([third], 5)
+        assert third.cancelled()
+        assert pool.stats()["jobs"] == 1 and pool.stats()["errors"] == 0
+    finally:
+        gate.set()
+        stt_pool_module._worker_engine = previous
+        pool.shutdown()
+    print("✓ cancelled jobs propagate both ways")
+
+
+def test_broken_pool_is_replaced():
+    """A broken executor is dropped and the next job runs on a fresh one"""
+    pool = ThreadPool()
+    previous = _with_engine(FakeEngine())
+    try:
+        # broken before submit: retried once on a new executor
+        pool._executor = BrokenExecutor()
+        assert pool.submit_pcm(b"hello").result(5) == "hello"
+        assert len(pool.started) == 1
+        # broken while the job ran: the caller gets the error, the next submit a new pool
+        stt_pool_module._worker_engine = FakeEngine(fail=BrokenProcessPool("worker died"))
+        assert isinstance(pool.submit_pcm(b"x").exception(5), BrokenProcessPool)
+        assert pool._executor is None
+        stt_pool_module._worker_engine = FakeEngine()
+        assert pool.submit_pcm(b"again").result(5) == "again"
+        assert len(pool.started) == 2
+    finally:
+        stt_pool_module._worker_engine = previous
+        pool.shutdown()
+    print("✓ broken pools are replaced")
+
+
+if __name__ == "__main__":
+    test_decode_shared_reports_real_error()
+    test_submit_results_and_errors()
+    test_cancelled_jobs()
+    test_broken_pool_is_replaced()
+    print("\nAll STT pool tests passed.")
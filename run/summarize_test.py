@@ -0,0 +1,166 @@
+"""
+Tests for transcript chunking and map-reduce summarization (no API calls).
+
+Run with: python run/summarize_test.py
+or: python -m pytest run/summarize_test.py -v (if pytest installed)
+"""
+import sys, os, random, threading, time, asyncio
+from types import SimpleNamespace
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.tools import summarize
+from jewel.tools.summarize import count_tokens, split_chunks, summarize_text
+
+
+def _transcript(n_sentences, seed=3, punctuated=True):
+    rnd = random.Random(seed)
+    words = "we then went to the market and bought some fresh bread before heading home again".split()
+    # every word is numbered, so a chunk's repeated prefix can be found unambiguously
+    count = iter(range(10 ** 6))
+    sentences = [
+        " ".join(f"{rnd.choice(words)}_{next(count)}" for _ in range(rnd.randint(3, 30))) + f" s{i}"
+        for i in range(n_sentences)
+    ]
+    return (". " if punctuated else " ").join(sentences) + ("." if punctuated else "")
+
+
+def _words_in_order(chunks, overlap):
+    """The chunks' words, with each chunk's repeated prefix (the overlap) removed."""
+    out = []
+    for chunk in chunks:
+        words = chunk.split()
+        # find where this chunk stops repeating the end of what came before
+        skip = 0
+        for k in range(min(len(words), len(out)), 0, -1):
+            if out[-k:] == words[:k]:
+                skip = k
+                break
+        if not overlap:
+            skip = 0
+        out.extend(words[skip:])
+    return out
+
+
+def test_chunks_cover_text_within_budget():
+    """Every word appears, in order; no chunk exceeds max_tokens"""
+    for punctuated in (True, False):
+        text = _transcript(300, punctuated=punctuated)
+        for max_tokens, overlap in ((200, 0), (200, 40), (64, 16)):
+            chunks = split_chunks(text, max_tokens, overlap)
+            assert len(chunks) > 1
+            assert all(count_tokens(c) <= max_tokens for c in chunks), max(count_tokens(c) for c in chunks)
+            assert _words_in_order(chunks, overlap) == text.split(), (punctuated, max_tokens, overlap)
+    print("✓ split_chunks covers the text within budget")
+
+
+def test_chunks_overlap():
+    """With overlap, each chunk opens with the trailing sentences of the previous one"""
+    text = _transcript(200)
+    chunks = split_chunks(text, 200, 50)
+    carried = 0
+    for prev, cur in zip(chunks, chunks[1:]):
+        at = prev.rfind(cur.split(". ")[0])
+        if at >= 0:
+            # whole trailing sentences of prev, within the overlap
+            tail = prev[at:]
+            assert cur.startswith(tail) and count_tokens(tail) <= 50
+            carried += 1
+        else:
+            # nothing carried: prev's last sentence alone is over the overlap
+            assert count_tokens(prev.split(". ")[-1]) + 1 > 50
+    assert carried
+    no_overlap = split_chunks(text, 200, 0)
+    assert sum(map(len, no_overlap)) < sum(map(len, chunks))
+    assert split_chunks("short text.", 200, 50) == ["short text."] and split_chunks("", 200, 50) == []
+    print("✓ split_chunks overlap")
+
+
+def test_summarize_map_reduce():
+    """Chunk summaries are joined in order, reduced until they fit, and failures fall back"""
+    calls = []
+    lock = threading.Lock()
+
+    def create(model, messages, max_tokens, temperature):
+        chunk = messages[1]["content"]
+        with lock:
+            calls.append(chunk)
+        if "s13." in chunk.split():
+            raise RuntimeError("upstream timeout")
+        # a summary that names the chunk's first marker, so the order can be checked
+        marker = next(w for w in chunk.split() if w.startswith("s") and w[1:].rstrip(".").isdigit())
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"part {marker.rstrip('.')}"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    summarize.clients.openai = lambda: client
+    try:
+        text = _transcript(400)
+        assert summarize_text("fits already", 100) == "fits already" and not calls
+        progress = []
+        out = summarize_text(text, 300, on_chunk=lambda done, total: progress.append((done, total)))
+        assert count_tokens(out) <= 300 and any("s13." in c.split() for c in calls)
+        total = progress[0][1]
+        assert progress == [(n, total) for n in range(1, total + 1)]
+        markers = [int(w[1:]) for w in out.replace(".", " ").split() if w.startswith("s") and w[1:].isdigit()]
+        assert markers == sorted(markers)
+    finally:
+        del summarize.clients.openai
+    print("✓ summarize_text map-reduce")
+
+
+def test_condense_runs_off_the_event_loop():
+    """A long streamed chat message is condensed in a worker thread; the loop keeps running"""
+    from jewel.config import settings
+    from jewel.core import agent as agent_module
+    from safety_test import _temp_safety, _stub_agent
+
+    threads, sent = [], []
+
+    def slow_condense(text, budget_tokens):
+        threads.append(threading.current_thread() is threading.main_thread())
+        time.sleep(0.5)
+        return "condensed"
+
+    class FakeStream:
+        def __iter__(self):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="ok"))], usage=None)
+
+        def close(self):
+            pass
+
+    def create(**kw):
+        sent.append(kw["messages"][-1]["content"])
+        return FakeStream()
+
+    async def run(agent, text):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.02)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        events = [ev async for ev in agent.ask_stream(text)]
+        task.cancel()
+        return events, ticks
+
+    previous, agent_module.condense_message = agent_module.condense_message, slow_condense
+    try:
+        with _temp_safety() as (_, tmp):
+            agent = _stub_agent(os.path.join(tmp, "jewel.db"))
+            agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+            events, ticks = asyncio.run(run(agent, "word " * (settings.chat_max_input_tokens * 5)))
+    finally:
+        agent_module.condense_message = previous
+    assert events == [("delta", "ok")] and sent == ["condensed"]
+    assert threads == [False] and ticks >= 10, (threads, ticks)
+    print("✓ condensing runs off the event loop")
+
+
+if __name__ == "__main__":
+    test_chunks_cover_text_within_budget()
+    test_chunks_overlap()
+    test_summarize_map_reduce()
+    test_condense_runs_off_the_event_loop()
+    print("\nAll summarize tests passed.")
@@ -0,0 +1,131 @@
+"""
+Tests for the TTS job queue's use of the shared synthesis pool (no TTS provider needed).
+
+Run with: python run/tts_queue_test.py
+or: python -m pytest run/tts_queue_test.py -v (if pytest installed)
+"""
+import sys, os, json, tempfile, threading, time, zlib
+import concurrent.futures
+from contextlib import contextmanager
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.io import tts_queue as tts_queue_module
+from jewel.io.artifacts import ArtifactManager
+from jewel.io.tts_queue import TTSQueue
+
+
+class FakeSynth:
+    """Replaces synthesize_cached: writes the text as the 'audio', blocking until released."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self, text, voice=None, outfile=None):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            self.gate.wait(10)
+            if text == "boom":
+                raise RuntimeError("provider down")
+            path = outfile or os.path.join(tempfile.gettempdir(), f"tts_queue_test_{zlib.crc32(text.encode())}.mp3")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            return path, text.startswith("cached")
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@contextmanager
+def _queue(workers, **kw):
+    """A started TTSQueue on a temp dir with its own pool of `workers` and a FakeSynth."""
+    synth = FakeSynth()
+    saved = tts_queue_module.synthesize_cached, tts_queue_module.artifacts
+    executor = concurrent.futures.ThreadPoolExecutor(workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        tts_queue_module.synthesize_cached = synth
+        tts_queue_module.artifacts = ArtifactManager(os.path.join(tmp, "artifacts.db"))
+        q = TTSQueue(os.path.join(tmp, "queue"), executor=executor, **kw)
+        q.start()
+        try:
+            yield q, synth
+        finally:
+            synth.gate.set()
+            q.stop()
+            executor.shutdown(wait=True)
+            tts_queue_module.synthesize_cached, tts_queue_module.artifacts = saved
+
+
+def _status(q, jid):
+    with open(q.status_path(jid), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _wait(pred, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if pred():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_queue_leaves_a_worker_for_interactive_calls():
+    """With the queue backed up, an interactive submit still gets a worker right away"""
+    with _queue(3, max_inflight=2) as (q, synth):
+        jids = [q.enqueue(f"queued {i}") for i in range(6)]
+        assert _wait(lambda: synth.running == 2)
+        time.sleep(0.5)
+        assert synth.running == 2 and len(q._inflight) == 2
+        fut = q.submit("interactive")
+        assert _wait(lambda: synth.running == 3)
+        synth.gate.set()
+        assert open(fut.result(5)[0], encoding="utf-8").read() == "interactive"
+        assert _wait(lambda: all(_status(q, j)["status"] == "done" for j in jids))
+        assert synth.peak == 3
+        assert all(q.result_path(j).read_text() == f"queued {i}" for i, j in enumerate(jids))
+    print("✓ queued jobs leave a worker free")
+
+
+def test_default_reserves_one_worker():
+    """By default the queue may use all but one of tts_max_workers (at least one)"""
+    saved = tts_queue_module.settings.tts_max_workers
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers, expected in ((4, 3), (2, 1), (1, 1)):
+                tts_queue_module.settings.tts_max_workers = workers
+                assert TTSQueue(tmp).max_inflight == expected
+    finally:
+        tts_queue_module.settings.tts_max_workers = saved
+    print("✓ default in-flight limit")
+
+
+def test_adopt_and_errors():
+    """An adopted future finishes as a job (billed only if synthesized upstream); failures are errors"""
+    with _queue(2, max_inflight=1) as (q, synth):
+        synth.gate.set()
+        billed = []
+        jid = q.adopt(q.submit("adopted"), "adopted", on_billed=billed.append)
+        hit = q.adopt(q.submit("cached phrase"), "cached phrase", on_billed=billed.append)
+        failed = q.adopt(q.submit("boom"), "boom", on_billed=billed.append)
+        bad = q.enqueue("boom")
+        assert _wait(lambda: _status(q, jid)["status"] == "done")
+        assert q.result_path(jid).read_text() == "adopted"
+        assert _wait(lambda: _status(q, hit)["status"] == "done" and _status(q, failed)["status"] == "error")
+        assert billed == ["adopted"] and _status(q, hit)["cached"] is True
+        assert _wait(lambda: _status(q, bad)["status"] == "error")
+        assert _status(q, bad)["error"] == "provider down"
+        # the status is written before the job file is removed
+        assert _wait(lambda: not list(q.jobs.glob("*.json")) and not q._inflight)
+    print("✓ adopted jobs and errors")
+
+
+if __name__ == "__main__":
+    test_queue_leaves_a_worker_for_interactive_calls()
+    test_default_reserves_one_worker()
+    test_adopt_and_errors()
+    print("\nAll TTS queue tests passed.")
@@ -0,0 +1,65 @@
+"""
+Tests for sentence splitting in the pipelined TTS stream.
+
+Run with: python run/tts_stream_test.py
+or: python -m pytest run/tts_stream_test.py -v (if pytest installed)
+"""
+import sys, os, random
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.io.tts_stream import split_sentences
+
+WORDS = "the a quick brown fox jumps over lazy dog well, so Dr. hello world supercalifragilistic".split()
+ENDS = [" ", " ", " ", ". ", "! ", "? ", "… ", ".\" ", ", ", "\n", "\n\n", ""]
+
+
+def _random_texts(n, seed=11):
+    rnd = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rnd.choice(WORDS) + rnd.choice(ENDS) for _ in range(rnd.randint(0, 120)))
+
+
+def test_split_examples():
+    """Sentences are split at end punctuation and newlines; short ones are merged"""
+    assert split_sentences("") == [] and split_sentences("   \n ") == []
+    assert split_sentences("Hi.") == ["Hi."]
+    assert split_sentences("This is the first sentence. And this is the second one!") == [
+        "This is the first sentence.", "And this is the second one!",
+    ]
+    # "Hi." and "Ok." are too short to send alone: they ride along with what follows
+    assert split_sentences('Hi. Ok. This is a longer sentence here.\n\nShe said "go." Then it was over, finally.') == [
+        "Hi. Ok. This is a longer sentence here.", 'She said "go." Then it was over, finally.',
+    ]
+    # a short tail joins the previous chunk
+    assert split_sentences("This is the first sentence here. Bye.") == ["This is the first sentence here. Bye."]
+    print("✓ split_sentences examples")
+
+
+def test_long_sentences_are_cut():
+    """Overlong sentences break at a comma, else a space, else hard at max_chars"""
+    text = "alpha beta gamma delta, " * 20
+    chunks = split_sentences(text, max_chars=100)
+    assert all(len(c) <= 100 for c in chunks) and all(c.endswith(",") for c in chunks[:-1])
+    chunks = split_sentences("word " * 100, max_chars=60)
+    assert all(len(c) <= 60 for c in chunks) and all(not c.startswith(" ") for c in chunks)
+    chunks = split_sentences("x" * 700, max_chars=280)
+    assert [len(c) for c in chunks] == [280, 280, 140]
+    print("✓ long sentences are cut within max_chars")
+
+
+def test_split_properties():
+    """No text is lost or reordered, and every chunk fits within max_chars"""
+    for text in _random_texts(2000):
+        for min_chars, max_chars in ((24, 280), (10, 40), (1, 30)):
+            chunks = split_sentences(text, min_chars, max_chars)
+            assert "".join("".join(chunks).split()) == "".join(text.split()), text
+            assert all(c and c == c.strip() for c in chunks)
+            assert all(len(c) <= max_chars for c in chunks), (text, chunks)
+    print("✓ split_sentences keeps all text within bounds")
+
+
+if __name__ == "__main__":
+    test_split_examples()
+    test_long_sentences_are_cut()
+    test_split_properties()
+    print("\nAll TTS stream tests passed.")
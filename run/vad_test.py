@@ -0,0 +1,114 @@
+"""
+Tests for the energy / zero-crossing VAD on synthetic audio.
+
+Run with: python run/vad_test.py
+or: python -m pytest run/vad_test.py -v (if pytest installed)
+"""
+import sys, os
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.io.vad import (
+    VadFilter, speech_segments, trim_pcm, FLOOR_MIN_DB, GAP_MS, HANGOVER_MS, LIVE_HANGOVER_MS, PREROLL_MS,
+)
+
+RATE = 16000
+rnd = np.random.default_rng(5)
+
+
+def silence(ms):
+    return np.zeros(RATE * ms // 1000, dtype=np.int16)
+
+
+def noise(ms, db=-45.0):
+    """Room noise at about `db` dBFS."""
+    return (rnd.standard_normal(RATE * ms // 1000) * 32768 * 10 ** (db / 20)).astype(np.int16)
+
+
+def tone(ms, db=-20.0, hz=220):
+    """A voiced-sounding tone at about `db` dBFS (RMS)."""
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (np.sin(2 * np.pi * hz * t) * 32768 * 10 ** (db / 20) * np.sqrt(2)).astype(np.int16)
+
+
+def _feed(vad, samples, chunk=3200):
+    pcm = samples.tobytes()
+    return b"".join(vad.feed(pcm[i:i + chunk]) for i in range(0, len(pcm), chunk))
+
+
+def test_segments_find_speech():
+    """Whole-buffer VAD keeps each burst (plus pre-roll) and drops the silence around it"""
+    samples = np.concatenate([noise(1000), tone(600), noise(1500), tone(900), noise(1000)])
+    segments = speech_segments(samples, RATE)
+    assert len(segments) == 2, segments
+    pre = RATE * PREROLL_MS // 1000
+    for (s, e), (start, length) in zip(segments, ((1000, 600), (3100, 900))):
+        assert abs(s - (start * RATE // 1000 - pre)) <= 480, (s, start)
+        # the hangover extends the end past the burst
+        assert 0 <= e - (start + length) * RATE // 1000 <= RATE * (HANGOVER_MS + 60) // 1000, (e, start)
+    kept = trim_pcm(samples.tobytes(), RATE)
+    assert len(kept) == sum(e - s for s, e in segments) * 2 + RATE * GAP_MS // 1000 * 2
+    assert speech_segments(noise(2000), RATE) == [] and trim_pcm(b"", RATE) == b""
+    print("✓ speech_segments / trim_pcm")
+
+
+def test_segments_are_capped():
+    """An utterance longer than max_utterance_s is split into pieces of at most that length"""
+    samples = np.concatenate([noise(500), tone(5000), noise(500)])
+    segments = speech_segments(samples, RATE, max_utterance_s=2.0)
+    assert len(segments) == 3 and all(e - s <= 2 * RATE for s, e in segments), segments
+    assert all(a[1] == b[0] for a, b in zip(segments, segments[1:]))
+    print("✓ long utterances are capped")
+
+
+def test_filter_ignores_digital_silence_for_floor():
+    """A dropout of exact zeros doesn't drag the floor down and let room noise through"""
+    vad = VadFilter(RATE)
+    assert _feed(vad, silence(3000)) == b""
+    assert vad.floor is None
+    kept = _feed(vad, noise(3000))
+    assert kept == b"" and vad.floor is not None and vad.floor > FLOOR_MIN_DB
+    assert not vad.in_speech
+    assert len(_feed(vad, np.concatenate([tone(600), noise(1000)]))) > RATE * 600 // 1000 * 2
+    assert vad.utterance_ended
+    vad.close()
+    print("✓ VadFilter floor skips digital silence")
+
+
+def test_filter_hangover():
+    """A 500 ms pause ends an utterance with the default hangover but not with the live one"""
+    speech = np.concatenate([noise(1000), tone(800), noise(500), tone(800), noise(1500)])
+    ends = []
+    for hangover in (HANGOVER_MS, LIVE_HANGOVER_MS):
+        vad = VadFilter(RATE, hangover_ms=hangover)
+        pcm = speech.tobytes()
+        count = 0
+        for i in range(0, len(pcm), 960):
+            was = vad.utterances
+            vad.feed(pcm[i:i + 960])
+            count += vad.utterances - was
+        vad.close()
+        ends.append(count)
+    assert ends == [2, 1], ends
+    print("✓ live hangover keeps phrases together")
+
+
+def test_filter_matches_chunking():
+    """The output doesn't depend on how the stream is chunked"""
+    samples = np.concatenate([noise(800), tone(500), noise(900), tone(400, db=-30), noise(600)])
+    outs = []
+    for chunk in (962, 3200, 17):
+        vad = VadFilter(RATE, max_utterance_s=1.0)
+        outs.append(_feed(vad, samples, chunk))
+        vad.close()
+    assert outs[0] and outs[0] == outs[1] == outs[2]
+    print("✓ VadFilter is chunking-independent")
+
+
+if __name__ == "__main__":
+    test_segments_find_speech()
+    test_segments_are_capped()
+    test_filter_ignores_digital_silence_for_floor()
+    test_filter_hangover()
+    test_filter_matches_chunking()
+    print("\nAll VAD tests passed.")
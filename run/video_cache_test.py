@@ -0,0 +1,83 @@
+"""
+Tests for video URL canonicalization (the video analysis cache key).
+
+Run with: python run/video_cache_test.py
+or: python -m pytest run/video_cache_test.py -v (if pytest installed)
+"""
+import sys, os, tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.config import settings
+
+# importing the module opens the shared VideoCache next to settings.db_path; keep it in a temp dir
+_tmp = tempfile.TemporaryDirectory()
+_db_path, settings.db_path = settings.db_path, os.path.join(_tmp.name, "jewel.db")
+try:
+    from jewel.io.video_cache import canonical_video_id
+finally:
+    settings.db_path = _db_path
+
+
+def test_known_platforms():
+    """Every URL form of a known platform's video maps to '<platform>:<id>'"""
+    cases = {
+        "youtube:dQw4w9WgXcQ": [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://youtube.com/watch?feature=share&v=dQw4w9WgXcQ&si=abc",
+            "https://youtu.be/dQw4w9WgXcQ?t=42",
+            "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+            "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+            "https://m.youtube.com/live/dQw4w9WgXcQ?si=xyz",
+        ],
+        "vimeo:76979871": ["https://vimeo.com/76979871", "https://player.vimeo.com/video/76979871?h=1"],
+        "tiktok:7234567890123456789": ["https://www.tiktok.com/@someone/video/7234567890123456789?is_from_webapp=1"],
+        "twitter:1234567890": ["https://twitter.com/user/status/1234567890", "https://x.com/user/status/1234567890?s=20"],
+        "instagram:Cx1AbC_dE-f": ["https://www.instagram.com/reel/Cx1AbC_dE-f/?igsh=abc"],
+        "reddit:abc123": ["https://www.reddit.com/r/videos/comments/abc123/some_title/"],
+    }
+    for expected, urls in cases.items():
+        for url in urls:
+            assert canonical_video_id(url) == expected, url
+    print("✓ known platforms")
+
+
+def test_generic_urls_drop_only_tracking():
+    """Tracking keys and cosmetic differences don't change the key; anything else does"""
+    base = canonical_video_id("https://example.com/media/clip.mp4?quality=hd")
+    for url in (
+        "https://www.example.com/media/clip.mp4?quality=hd",
+        "HTTPS://Example.com/media/clip.mp4/?quality=hd#comments",
+        "https://example.com/media/clip.mp4?utm_source=news&quality=hd&fbclid=x1",
+        "https://example.com/media/clip.mp4?gclid=1&quality=hd&utm_campaign=spring",
+    ):
+        assert canonical_video_id(url) == base, url
+    # `t` is a start offset and `s` can be anything on an unknown site: both stay in the key
+    for url in (
+        "https://example.com/media/clip.mp4?quality=hd&t=30",
+        "https://example.com/media/clip.mp4?quality=hd&s=2",
+        "https://example.com/media/clip.mp4?quality=sd",
+        "https://example.com/media/other.mp4?quality=hd",
+    ):
+        assert canonical_video_id(url) != base, url
+    assert canonical_video_id("https://example.com/v?a=1&b=2") == canonical_video_id("https://example.com/v?b=2&a=1")
+    print("✓ generic URLs drop only tracking keys")
+
+
+def test_platform_tracking_keys_are_scoped():
+    """A platform's share keys are dropped on that platform's hosts only"""
+    assert canonical_video_id("https://twitter.com/i/broadcasts/1Abc?s=20&t=xyz") == \
+        canonical_video_id("https://twitter.com/i/broadcasts/1Abc")
+    assert canonical_video_id("https://mobile.twitter.com/i/broadcasts/1Abc?t=xyz") == \
+        canonical_video_id("https://mobile.twitter.com/i/broadcasts/1Abc")
+    assert canonical_video_id("https://www.youtube.com/playlist?list=PL1&si=abc") == \
+        canonical_video_id("https://www.youtube.com/playlist?list=PL1")
+    assert canonical_video_id("https://notyoutube.com/watch?si=abc") != canonical_video_id("https://notyoutube.com/watch")
+    assert canonical_video_id("https://cdn.example.org/live.m3u8?t=120") != canonical_video_id("https://cdn.example.org/live.m3u8")
+    print("✓ platform tracking keys are scoped to their hosts")
+
+
+if __name__ == "__main__":
+    test_known_platforms()
+    test_generic_urls_drop_only_tracking()
+    test_platform_tracking_keys_are_scoped()
+    print("\nAll video cache tests passed.")
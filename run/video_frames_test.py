@@ -0,0 +1,56 @@
+"""
+Tests for frame timestamp selection (no ffmpeg needed).
+
+Run with: python run/video_frames_test.py
+or: python -m pytest run/video_frames_test.py -v (if pytest installed)
+"""
+import sys, os, random
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.io.video_frames import uniform_timestamps
+
+
+def test_uniform_examples():
+    """Timestamps sit at the centre of equal slots over the whole video"""
+    assert uniform_timestamps(100, 4) == [12.5, 37.5, 62.5, 87.5]
+    # `every` wins over count when the slots would be closer than that
+    assert uniform_timestamps(100, 10, every=25) == [12.5, 37.5, 62.5, 87.5]
+    assert uniform_timestamps(100, 2, every=5) == [25.0, 75.0]
+    # 100 s doesn't divide into 30 s steps: the 3 slots widen to cover the whole video
+    assert uniform_timestamps(100, 10, every=30) == [16.67, 50.0, 83.33]
+    # shorter than one `every` step: still one frame, from the middle
+    assert uniform_timestamps(3, 5, every=10) == [1.5]
+    assert uniform_timestamps(100, 0) == [] and uniform_timestamps(100, -1) == []
+    print("✓ uniform_timestamps examples")
+
+
+def test_unknown_duration():
+    """Without a duration, frames step by `every` (or a single frame at the start)"""
+    assert uniform_timestamps(None, 3, every=4) == [2.0, 6.0, 10.0]
+    assert uniform_timestamps(0, 3) == [0.0]
+    print("✓ uniform_timestamps with unknown duration")
+
+
+def test_uniform_properties():
+    """At most count frames, increasing, spaced at least `every` apart across the video"""
+    rnd = random.Random(9)
+    for _ in range(3000):
+        duration = round(rnd.uniform(0.5, 7200), 2)
+        count = rnd.randint(1, 60)
+        every = rnd.choice([None, 0.5, 1, 5, 30, 600])
+        ts = uniform_timestamps(duration, count, every)
+        assert 1 <= len(ts) <= count
+        assert ts == sorted(ts) and len(set(ts)) == len(ts)
+        if every and len(ts) > 1:
+            assert min(b - a for a, b in zip(ts, ts[1:])) >= every - 0.02, (duration, count, every)
+        assert all(0 < t < duration for t in ts), (duration, count, every, ts)
+        # covers the whole video, not just its start
+        assert ts[-1] >= duration * (len(ts) - 1) / len(ts) - 0.01
+    print("✓ uniform_timestamps properties")
+
+
+if __name__ == "__main__":
+    test_uniform_examples()
+    test_unknown_duration()
+    test_uniform_properties()
+    print("\nAll video frame tests passed.")
@@ -0,0 +1,78 @@
+"""Benchmark per-call client overhead: fresh clients vs the shared registry.
+
+Starts a local keep-alive stub server and times the same calls made the old way
+(bare requests.post / new OpenAI(...) per call) and through jewel.io.http_clients.
+The stub is plain HTTP, so the numbers exclude the TLS handshake that pooled
+connections also save against the real endpoints.
+
+Run with: python scripts/bench_http_clients.py [calls]
+"""
+import sys, os, json, time, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+from openai import OpenAI
+from jewel.io.http_clients import ClientRegistry
+
+CHAT_REPLY = json.dumps({
+    "id": "bench", "object": "chat.completion", "created": 0, "model": "stub",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+}).encode()
+
+
+class Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(CHAT_REPLY)))
+        self.end_headers()
+        self.wfile.write(CHAT_REPLY)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(label, fn, calls):
+    fn()  # warm up imports / first connection
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    per_call = (time.perf_counter() - t0) / calls * 1000
+    print(f"  {label:<34} {per_call:8.3f} ms/call")
+    return per_call
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    registry = ClientRegistry(openai_base_url=f"{base}/v1", openai_api_key="bench")
+    msgs = [{"role": "user", "content": "hi"}]
+
+    print(f"requests ({calls} calls)")
+    old = timed("bare requests.post", lambda: requests.post(f"{base}/tts", data=b"x", timeout=10), calls)
+    new = timed("registry session", lambda: registry.session().post(f"{base}/tts", data=b"x", timeout=10), calls)
+    print(f"  saved {old - new:.3f} ms/call ({old / new:.1f}x)")
+
+    print(f"openai chat.completions ({calls} calls)")
+    def fresh():
+        c = OpenAI(api_key="bench", base_url=f"{base}/v1")
+        c.chat.completions.create(model="stub", messages=msgs)
+        c.close()
+    old = timed("new OpenAI(...) per call", fresh, calls)
+    new = timed("registry openai()", lambda: registry.openai().chat.completions.create(model="stub", messages=msgs), calls)
+    print(f"  saved {old - new:.3f} ms/call ({old / new:.1f}x)")
+
+    print("registry stats:", json.dumps(registry.stats(), indent=2))
+    registry.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
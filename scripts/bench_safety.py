@@ -0,0 +1,109 @@
+"""Benchmark the safety checks on long inputs: per-pattern re.search vs the compiled matchers.
+
+Builds a transcript-like text of `words` words (one long line, the way
+auto-generated transcripts arrive, and the same text split into sentences on
+separate lines), then times SafetySystem.check_content + detect_abuse against
+the previous pattern-by-pattern implementation, checking they agree.
+
+Then streams a model-reply-sized text through the output StreamModerator in
+token-sized deltas and reports the cost per delta, next to re-checking the
+whole reply so far at every delta.
+
+Run with: python scripts/bench_safety.py [words] [repeats]
+"""
+import sys, os, re, time, random
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.core.safety_enhanced import SafetySystem, INTENT_KEYWORDS, EDUCATIONAL_KEYWORDS
+
+# everyday talk, including the words that start many rules (kid, teen, help, call...)
+WORDS = (
+    "so today we talked to the kids about school and the teen club then my son asked for help "
+    "with his homework we had to stop and call grandma about the video she sent it was a photo "
+    "of the old house and how to get there the weather was nice we learned about history and "
+    "science please remember to like and subscribe thanks for watching see you next time"
+).split()
+
+
+def previous_check(safety, text):
+    """check_content (verdict only) + detect_abuse's transcript scan, as implemented before."""
+    low = text.lower()
+    for cat, patterns in (("CSAM", safety.csam_patterns), ("VIOLENCE", safety.violence_abuse_patterns), ("NSFW", safety.nsfw_patterns)):
+        for p in patterns:
+            if re.search(p, low, re.IGNORECASE):
+                return cat, None
+    verdict = None
+    for p in safety.illegal_patterns:
+        if re.search(p, low, re.IGNORECASE):
+            if any(w in low for w in INTENT_KEYWORDS) and not any(k in low for k in EDUCATIONAL_KEYWORDS):
+                verdict = "ILLEGAL"
+            break
+    distress = any(re.search(p, low, re.IGNORECASE) for p in safety.distress_patterns)
+    return verdict, distress
+
+
+def current_check(safety, text):
+    ok, cat, _ = safety.check_content(text)
+    if cat in ("CSAM", "VIOLENCE", "NSFW"):
+        return cat, None
+    return cat, safety.detect_abuse(text)[0]
+
+
+def timed(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    words = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rnd = random.Random(1)
+    tokens = [rnd.choice(WORDS) for _ in range(words)]
+    one_line = " ".join(tokens)
+    lines = "\n".join(" ".join(tokens[i:i + 12]) + "." for i in range(0, words, 12))
+    safety = SafetySystem(":memory:")
+    for label, text in (("one line", one_line), ("12 words/line", lines)):
+        before, a = timed(lambda: previous_check(safety, text), repeats)
+        after, b = timed(lambda: current_check(safety, text), repeats)
+        assert a == b, (a, b)
+        print(f"{label:<14} {len(text) / 1024:7.1f} KiB  before {before * 1000:9.1f} ms  after {after * 1000:7.2f} ms  ({before / after:,.0f}x)")
+    stream_overhead(safety, rnd)
+
+
+def stream_overhead(safety, rnd, tokens=400, repeats=5):
+    """Per-delta cost of output moderation for a `tokens`-token streamed reply."""
+    # deltas the size of model tokens: a word or a piece of one, most with a leading space
+    deltas = []
+    for w in (rnd.choice(WORDS) for _ in range(tokens)):
+        cut = rnd.randint(1, len(w)) if len(w) > 6 else len(w)
+        deltas += [" " + w[:cut]] + ([w[cut:]] if w[cut:] else [])
+
+    def incremental():
+        moderator = safety.output_moderator()
+        for d in deltas:
+            moderator.feed(d)
+        moderator.finish()
+        return moderator.hit
+
+    def whole_reply():
+        so_far = ""
+        for d in deltas:
+            so_far += d
+            low = so_far.lower()
+            if any(rules.search(low) for _, rules in safety.content_rules):
+                return True
+        return None
+
+    inc, hit = timed(incremental, repeats)
+    full, _ = timed(whole_reply, repeats)
+    assert hit is None
+    n = len(deltas)
+    print(f"stream         {n} deltas  per delta {inc / n * 1e6:6.1f} us  (re-checking the whole reply: {full / n * 1e6:6.1f} us)")
+
+
+if __name__ == '__main__':
+    main()
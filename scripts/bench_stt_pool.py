@@ -0,0 +1,49 @@
+"""Benchmark batch transcription throughput: one in-process engine vs the process pool.
+
+Decodes the same 16 kHz mono 16-bit WAV `copies` times, first sequentially with a
+single SttEngine and then through SttProcessPool at each worker count, and prints
+audio seconds decoded per wall-clock second.
+
+Run with: python scripts/bench_stt_pool.py <vosk-model-dir> <clip.wav> [copies] [max-workers]
+"""
+import sys, os, time, wave
+import concurrent.futures
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jewel.io.stt_engine import SttEngine
+from jewel.io.stt_pool import SttProcessPool
+
+
+def main():
+    model, clip = sys.argv[1], sys.argv[2]
+    copies = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    max_workers = int(sys.argv[4]) if len(sys.argv) > 4 else (os.cpu_count() or 1)
+    with wave.open(clip, 'rb') as wf:
+        if wf.getframerate() != 16000 or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            sys.exit('clip must be 16 kHz mono 16-bit PCM (ffmpeg -i in -ac 1 -ar 16000 clip.wav)')
+        pcm = wf.readframes(wf.getnframes())
+    audio_s = copies * len(pcm) / 32000.0
+
+    eng = SttEngine(model)
+    eng.preload()
+    t0 = time.perf_counter()
+    for _ in range(copies):
+        eng.decode_pcm([pcm[i:i + 8000] for i in range(0, len(pcm), 8000)])
+    base = time.perf_counter() - t0
+    print(f"in-process x1: {audio_s / base:8.1f} audio s/s")
+
+    workers = 1
+    while workers <= max_workers:
+        pool = SttProcessPool(model, workers=workers)
+        # warm up: every worker loads the model before timing starts
+        concurrent.futures.wait([pool.submit_pcm(pcm[:32000]) for _ in range(workers)])
+        t0 = time.perf_counter()
+        concurrent.futures.wait([pool.submit_pcm(pcm) for _ in range(copies)])
+        dt = time.perf_counter() - t0
+        print(f"pool x{workers:<2}     : {audio_s / dt:8.1f} audio s/s  ({base / dt:.2f}x)")
+        pool.shutdown()
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
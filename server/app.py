@@ -1,14 +1,18 @@
-from fastapi import FastAPI, UploadFile, File, Form, Request, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Request, HTTPException, WebSocket, WebSocketDisconnect, Depends
 import json
-from fastapi.responses import JSONResponse, FileResponse, RedirectResponse
+from fastapi.responses import JSONResponse, FileResponse, RedirectResponse, StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from pathlib import Path
 import subprocess, tempfile, os, shutil
-import concurrent.futures
+import asyncio
+import itertools
+import threading
+import time
 import base64
 import uuid
-from typing import Optional
+from typing import List, Optional
 
 from jewel.config import settings
 from jewel.memory.sqlite_store import SqliteStore
@@ -16,7 +20,13 @@ from jewel.core.agent import Agent
 from jewel.core.scheduler import Scheduler
 from jewel.core.persona import Persona
 from jewel.core.emotion import EmotionState
+from jewel.core.job_events import job_events
 from jewel.io.tts_queue import queue_manager
+from jewel.io.http_clients import clients
+from jewel.io.artifacts import artifacts
+from jewel.io.stt_engine import get_engine
+from jewel.io.stt_pool import stt_pool
+from jewel.io.vad import VadFilter, trim_pcm, stats as vad_stats
 from datetime import datetime, timezone
 from fastapi import Request
 
@@ -42,6 +52,30 @@ async def debug_logs():
 async def health():
     return {"ok": True}
 
+
+@app.get("/debug/http_clients")
+async def http_client_stats():
+    """Connection reuse counters for the shared outbound HTTP clients."""
+    return clients.stats()
+
+@app.get("/artifacts/stats")
+async def artifact_stats():
+    """Disk usage of generated files by kind plus GC counters (reclaimed bytes/files)."""
+    try:
+        return artifacts.stats()
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.middleware("http")
+async def _touch_artifacts(request: Request, call_next):
+    # Record access to generated files so GC evicts the least recently used ones first
+    response = await call_next(request)
+    path = request.url.path
+    if path.startswith("/data/") and response.status_code == 200:
+        artifacts.touch(data_dir / path[len("/data/"):])
+    return response
+
 # Serve static web UI under /ui
 static_dir = Path(__file__).resolve().parent.parent / "run" / "static"
 app.mount("/ui", StaticFiles(directory=str(static_dir), html=True), name="ui")
@@ -50,6 +84,22 @@ data_dir = Path(__file__).resolve().parent.parent / "data"
 app.mount("/data", StaticFiles(directory=str(data_dir), html=False), name="data")
 
 
+@app.get("/media/{name}")
+async def media_file(name: str, request: Request):
+    """Content-addressed media (video frames, thumbnails). Immutable: strong ETag, cached for a year, 304 on revalidation."""
+    from jewel.io.media_store import media_store, CACHE_CONTROL
+    path = media_store.path(name)
+    if path is None or not path.is_file():
+        return JSONResponse(status_code=404, content={"error": "not found"})
+    artifacts.touch(path)
+    etag = media_store.etag(name)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    inm = request.headers.get("if-none-match")
+    if inm and (inm.strip() == "*" or etag in [t.strip().removeprefix("W/") for t in inm.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_store.media_type(name), headers=headers)
+
+
 @app.get("/")
 async def root():
 	# Send users to the enhanced chat by default
@@ -89,6 +139,30 @@ async def _startup():
         queue_manager.start()
     except Exception:
         pass
+    if settings.vosk_preload and settings.vosk_model_path:
+        # load the STT model in the background so startup isn't held up by it
+        threading.Thread(target=get_engine().preload, daemon=True).start()
+    try:
+        # index files generated before the artifact manager existed, then start GC
+        artifacts.adopt_untracked(queue_manager.results, "tts_result", "*.mp3")
+        artifacts.adopt_untracked(queue_manager.results, "tts_status", "*.status.json")
+        artifacts.adopt_untracked(data_dir / "generated_images", "generated_image")
+        artifacts.adopt_untracked(data_dir / "generated_videos", "generated_video")
+        artifacts.start()
+    except Exception:
+        pass
+    try:
+        # video jobs can't survive a restart; fail the ones left running
+        from jewel.io.video_jobs import video_jobs
+        video_jobs.recover()
+    except Exception:
+        pass
+    try:
+        # open the safety database and compile its patterns before the first request
+        from jewel.core.safety_enhanced import get_safety
+        get_safety()
+    except Exception:
+        pass
 
 
 @app.on_event("shutdown")
@@ -101,21 +175,76 @@ async def _shutdown():
         queue_manager.stop()
     except Exception:
         pass
+    try:
+        artifacts.stop()
+    except Exception:
+        pass
+    try:
+        stt_pool.shutdown()
+    except Exception:
+        pass
+    try:
+        from jewel.core.safety_enhanced import get_safety
+        get_safety().shutdown()
+    except Exception:
+        pass
+    try:
+        # close pooled keep-alive connections (requests + OpenAI sync/async)
+        await clients.aclose()
+    except Exception:
+        pass
+
+
+async def safety_guard(request: Request):
+    """Refuse banned users (X-User-Id header) and addresses before any upstream spend.
+
+    The header is the client's to omit, so the address is what the guard relies
+    on: every violation is logged with the caller's address, and a ban covers all
+    the addresses the account's violations came from. The check is an in-memory
+    lookup kept in step with the safety db, so it costs no db round trip. Behind a
+    reverse proxy, run uvicorn with --proxy-headers so the client address is the
+    caller's rather than the proxy's.
+    """
+    from jewel.core.safety_enhanced import get_safety
+    banned, reason = get_safety().is_banned(*_caller(request))
+    if banned:
+        raise HTTPException(status_code=403, detail=reason)
 
 
 class ChatIn(BaseModel):
 	text: str
 
 
-@app.post("/chat")
-async def chat(body: ChatIn):
+def _caller(request: Request) -> tuple:
+	# (user id, client address) for the safety log; see safety_guard
+	return request.headers.get("x-user-id"), (request.client.host if request.client else None)
+
+
+@app.post("/chat", dependencies=[Depends(safety_guard)])
+async def chat(body: ChatIn, request: Request):
 	try:
-		reply = agent.ask(body.text)
+		# off the event loop: a long message is condensed with several blocking model calls
+		reply = await run_in_threadpool(agent.ask, body.text, *_caller(request))
 		return {"reply": reply}
 	except Exception as e:
 		return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.post("/chat/stream", dependencies=[Depends(safety_guard)])
+async def chat_stream(body: ChatIn, request: Request):
+	"""Server-Sent Events: "delta" events carry the reply as it is generated, then "done".
+
+	The reply is moderated as it streams; a "replace" event means it was cut off and its
+	text should be shown instead of what arrived so far.
+	"""
+	async def events():
+		async for kind, text in agent.ask_stream(body.text, *_caller(request)):
+			yield f"event: {kind}\ndata: {json.dumps({'text': text})}\n\n"
+		yield "event: done\ndata: {}\n\n"
+
+	return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 class ScheduleIn(BaseModel):
     run_at: str
     payload: dict | None = None
@@ -282,50 +411,102 @@ class TTSIn(BaseModel):
 	voice: str | None = None
 
 
-@app.post("/tts")
-async def tts(body: TTSIn):
-    from jewel.io.tts_openai import synthesize as tts_synthesize
+def _record_tts_chars(text: str | None):
+    try:
+        ym = datetime.utcnow().strftime("%Y%m")
+        key = f"usage_{ym}_tts_chars"
+        cur = int(store.get(key) or "0")
+        store.set(key, str(cur + len(text or "")))
+    except Exception:
+        pass
+
 
+@app.post("/tts", dependencies=[Depends(safety_guard)])
+async def tts(body: TTSIn):
     voice = body.voice or settings.azure_tts_voice
-    out_dir = Path("./data")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_mp3 = out_dir / "tts_output.mp3"
 
-    # Try a short synchronous TTS call (in thread) to return audio quickly when possible.
-    # If synthesis is slow (timeout) or fails transiently, enqueue and return 202 with a status URL.
+    # Run the synthesis on the shared, bounded TTS executor and wait up to the deadline
+    # to return audio directly. Repeated phrases are answered from the audio cache.
+    # If synthesis is slow, the in-flight call is adopted as a queued job (no second
+    # upstream request) and a 202 with a status URL goes out at the deadline.
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
-            fut = ex.submit(tts_synthesize, body.text, str(out_mp3), voice)
-            try:
-                path = fut.result(timeout=8)
-                # success within timeout
+        started = time.time()
+        fut = queue_manager.submit(body.text, voice)
+        try:
+            # shield so the timeout doesn't cancel the synthesis we are about to hand over
+            path, hit = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), timeout=8)
+            # success within timeout; cache hits cost nothing upstream
+            if not hit:
+                _record_tts_chars(body.text)
+            ext = Path(path).suffix.lower()
+            ctype = "audio/mpeg" if ext == ".mp3" else "audio/wav"
+            return FileResponse(path, media_type=ctype, filename=Path(path).name, headers={"X-TTS-Cache": "hit" if hit else "miss"})
+        except asyncio.TimeoutError:
+            # long-running synth: let the queue own the in-flight call
+            # billed by the job itself, once it is known to be an upstream synthesis
+            jid = queue_manager.adopt(fut, body.text, voice, created_at=started, on_billed=_record_tts_chars)
+            status_url = f"/tts/status/{jid}"
+            return JSONResponse(status_code=202, content={"status":"queued","id":jid,"status_url":status_url})
+        except Exception as e:
+            # If immediate failure (rate limit / token) attempt fallback behavior in unified synthesize
+            msg = str(e)
+            if '429' in msg or 'Too Many Requests' in msg or 'issueToken' in msg or 'token request failed' in msg.lower():
+                # Try enqueueing so background worker can retry with fallback
                 try:
-                    ym = datetime.utcnow().strftime("%Y%m")
-                    key = f"usage_{ym}_tts_chars"
-                    cur = int(store.get(key) or "0")
-                    store.set(key, str(cur + len(body.text or "")))
+                    jid = queue_manager.enqueue(body.text, voice)
+                    status_url = f"/tts/status/{jid}"
+                    return JSONResponse(status_code=202, content={"status":"queued","id":jid,"status_url":status_url})
                 except Exception:
-                    pass
-                ext = Path(path).suffix.lower()
-                ctype = "audio/mpeg" if ext == ".mp3" else "audio/wav"
-                return FileResponse(path, media_type=ctype, filename=Path(path).name)
-            except concurrent.futures.TimeoutError:
-                # long-running synth: enqueue for async processing
-                jid = queue_manager.enqueue(body.text, voice)
-                status_url = f"/tts/status/{jid}"
-                return JSONResponse(status_code=202, content={"status":"queued","id":jid,"status_url":status_url})
-            except Exception as e:
-                # If immediate failure (rate limit / token) attempt fallback behavior in unified synthesize
-                msg = str(e)
-                if '429' in msg or 'Too Many Requests' in msg or 'issueToken' in msg or 'token request failed' in msg.lower():
-                    # Try enqueueing so background worker can retry with fallback
-                    try:
-                        jid = queue_manager.enqueue(body.text, voice)
-                        status_url = f"/tts/status/{jid}"
-                        return JSONResponse(status_code=202, content={"status":"queued","id":jid,"status_url":status_url})
-                    except Exception:
-                        return JSONResponse(status_code=429, content={"error": msg})
-                return JSONResponse(status_code=200, content={"error": msg})
+                    return JSONResponse(status_code=429, content={"error": msg})
+            return JSONResponse(status_code=200, content={"error": msg})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+async def _tts_stream_response(text: str, voice: str | None):
+    from jewel.io.tts_stream import iter_speech
+
+    gen = iter_speech(text, voice or settings.azure_tts_voice)
+    # Produce the first chunk before committing to a 200 so upstream failures still
+    # surface as a JSON error instead of a truncated audio stream.
+    try:
+        first = await run_in_threadpool(next, gen, b"")
+    except Exception as e:
+        gen.close()
+        return JSONResponse(status_code=502, content={"error": str(e)})
+    if not first:
+        return JSONResponse(status_code=400, content={"error": "nothing to speak"})
+    # Count every character up front; cached sentences make this an upper bound
+    _record_tts_chars(text)
+
+    def body_iter():
+        try:
+            yield first
+            yield from gen
+        finally:
+            gen.close()
+
+    return StreamingResponse(body_iter(), media_type="audio/mpeg", headers={"Cache-Control": "no-store"})
+
+
+@app.post("/tts/stream", dependencies=[Depends(safety_guard)])
+async def tts_stream(body: TTSIn):
+    """Stream speech as it is synthesized, one sentence chunk at a time, in playback order."""
+    return await _tts_stream_response(body.text, body.voice)
+
+
+@app.get("/tts/stream", dependencies=[Depends(safety_guard)])
+async def tts_stream_get(text: str, voice: str | None = None):
+    """GET variant so an <audio src=...> element can play the stream progressively."""
+    return await _tts_stream_response(text, voice)
+
+
+@app.get('/tts/cache')
+async def tts_cache_stats():
+    """Return size and hit counters for the TTS audio cache."""
+    from jewel.io.tts_cache import tts_cache
+    try:
+        return tts_cache.stats()
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
@@ -334,96 +515,289 @@ async def tts(body: TTSIn):
 async def tts_status(job_id: str):
     """Return status for an enqueued TTS job. If done, includes a relative URL to the audio file."""
     try:
+        # jobs created by this process are answered from memory; the status file
+        # only matters for jobs from before a restart
+        ev = job_events.get(job_id)
+        if ev is not None:
+            return ev[1]
         st = queue_manager.status_path(job_id)
         if not st.exists():
             return JSONResponse(status_code=404, content={"error": "job not found"})
         with open(st, 'r', encoding='utf-8') as f:
             j = json.load(f)
-        out = {k: j.get(k) for k in ('id', 'status', 'error', 'created_at', 'started_at', 'finished_at')}
-        if j.get('status') == 'done':
-            # expose a relative path clients can fetch
-            out['url'] = f"/data/tts_queue/results/{job_id}.mp3"
-        return out
+        return queue_manager.public_status(j)
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+# ---------- Background job status (push instead of polling) ----------
+
+@app.get('/jobs/{job_id}')
+async def job_status(job_id: str):
+    """Latest known state of any background job (TTS, video, image...)."""
+    ev = job_events.get(job_id)
+    if ev is None:
+        return JSONResponse(status_code=404, content={"error": "job not found"})
+    version, state = ev
+    return {**state, "version": version}
+
+
+@app.get('/jobs/{job_id}/wait')
+async def job_wait(job_id: str, since: int = 0, timeout: float = 25.0):
+    """Long-poll: respond as soon as the job's version exceeds `since` (204 if nothing changed before `timeout`)."""
+    if job_events.get(job_id) is None:
+        return JSONResponse(status_code=404, content={"error": "job not found"})
+    ev = await job_events.wait(job_id, since=since, timeout=max(0.0, min(timeout, 60.0)))
+    if ev is None:
+        return Response(status_code=204)
+    version, state = ev
+    return {**state, "version": version}
+
+
+@app.get('/jobs/{job_id}/events')
+async def job_event_stream(job_id: str, request: Request):
+    """Server-Sent Events stream of a job's state changes; closes after the final state."""
+    if job_events.get(job_id) is None:
+        return JSONResponse(status_code=404, content={"error": "job not found"})
+    try:
+        since = int(request.headers.get('last-event-id') or 0)
+    except ValueError:
+        since = 0
+
+    async def gen():
+        async for ev in job_events.stream(job_id, since=since):
+            if await request.is_disconnected():
+                return
+            if ev is None:
+                yield ": ping\n\n"
+                continue
+            version, state = ev
+            yield f"id: {version}\nevent: status\ndata: {json.dumps(state)}\n\n"
+
+    return StreamingResponse(gen(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @app.post("/audio")
-async def transcribe_audio(file: UploadFile = File(...)):
-	# Transcribe uploaded audio (webm) using Vosk if available
-	model_path = settings.vosk_model_path
-	if not model_path:
+async def transcribe_audio(request: Request):
+	# Transcribe uploaded audio (webm/ogg/wav/...) using the shared Vosk engine if available.
+	# Accepts either a multipart form with a "file" field or the raw audio as the request body;
+	# a raw body is streamed straight from the socket into ffmpeg and the recognizer.
+	from jewel.io.audio_ingest import stream_to_pcm, upload_chunks, UploadTooLarge
+
+	stt = get_engine()
+	if not stt.configured:
 		return JSONResponse(status_code=200, content={"error": "STT not configured (VOSK_MODEL_PATH missing)"})
 
+	max_bytes = settings.stt_max_upload_mb * 1024 * 1024
 	try:
-		with tempfile.TemporaryDirectory() as td:
-			src = Path(td) / file.filename
-			with src.open("wb") as f:
-				f.write(await file.read())
-
-			wav = Path(td) / "audio.wav"
-			# Convert to 16k mono PCM using ffmpeg
-			cmd = [
-				"ffmpeg",
-				"-y",
-				"-i",
-				str(src),
-				"-ac",
-				"1",
-				"-ar",
-				"16000",
-				str(wav),
-			]
-			try:
-				subprocess.run(cmd, check=True, capture_output=True)
-			except Exception as e:
-				return JSONResponse(status_code=200, content={"error": f"ffmpeg conversion failed: {e}"})
-
-			# Feed into Vosk recognizer
-			import vosk, wave, json
-			rec = vosk.KaldiRecognizer(vosk.Model(model_path), 16000)
-			with wave.open(str(wav), "rb") as wf:
-				while True:
-					data = wf.readframes(4000)
-					if len(data) == 0:
-						break
-					rec.AcceptWaveform(data)
-			res = json.loads(rec.FinalResult())
-			return {"text": res.get("text", "")}
+		if int(request.headers.get("content-length") or 0) > max_bytes:
+			return JSONResponse(status_code=413, content={"error": f"audio upload larger than {settings.stt_max_upload_mb} MB"})
+	except ValueError:
+		pass
+
+	try:
+		if request.headers.get("content-type", "").startswith("multipart/form-data"):
+			form = await request.form()
+			file = form.get("file")
+			if file is None or not hasattr(file, "read"):
+				return JSONResponse(status_code=400, content={"error": "missing 'file' upload"})
+			chunks = upload_chunks(file)
+		else:
+			chunks = request.stream()
+		# ffmpeg decodes whatever container arrived to 16 kHz mono PCM on a pipe; a worker
+		# thread feeds that PCM to a pooled recognizer as it arrives
+		decode = stt.decode_pcm
+		if settings.stt_vad:
+			# drop silence before it reaches the recognizer
+			decode = lambda pcm: stt.decode_pcm(VadFilter(max_utterance_s=settings.stt_max_utterance_s).filter(pcm))
+		text = await stream_to_pcm(chunks, decode, max_bytes=max_bytes)
+		return {"text": text}
+	except UploadTooLarge:
+		return JSONResponse(status_code=413, content={"error": f"audio upload larger than {settings.stt_max_upload_mb} MB"})
+	except FileNotFoundError:
+		return JSONResponse(status_code=200, content={"error": "ffmpeg not found on PATH"})
 	except Exception as e:
 		return JSONResponse(status_code=200, content={"error": str(e)})
 
 
-@app.post("/vision")
+@app.post("/audio/batch")
+async def transcribe_audio_batch(files: List[UploadFile] = File(...)):
+	# Transcribe many recordings at once across the STT worker processes (one model per core).
+	# ffmpeg conversions run concurrently, bounded to the pool size; results keep upload order.
+	from jewel.io.audio_ingest import stream_to_pcm, upload_chunks, UploadTooLarge
+
+	if not settings.vosk_model_path:
+		return JSONResponse(status_code=200, content={"error": "STT not configured (VOSK_MODEL_PATH missing)"})
+
+	max_bytes = settings.stt_max_upload_mb * 1024 * 1024
+	convert_slots = asyncio.Semaphore(stt_pool.workers)
+
+	async def one(f: UploadFile):
+		try:
+			async with convert_slots:
+				pcm = await stream_to_pcm(upload_chunks(f), b"".join, max_bytes=max_bytes)
+			if settings.stt_vad:
+				pcm = await run_in_threadpool(trim_pcm, pcm, 16000, settings.stt_max_utterance_s)
+			text = await asyncio.wrap_future(stt_pool.submit_pcm(pcm))
+			return {"filename": f.filename, "text": text}
+		except UploadTooLarge:
+			return {"filename": f.filename, "error": f"larger than {settings.stt_max_upload_mb} MB"}
+		except FileNotFoundError:
+			return {"filename": f.filename, "error": "ffmpeg not found on PATH"}
+		except Exception as e:
+			return {"filename": f.filename, "error": str(e)}
+
+	t0 = time.perf_counter()
+	results = await asyncio.gather(*(one(f) for f in files))
+	return {"results": results, "seconds": round(time.perf_counter() - t0, 3), "workers": stt_pool.workers}
+
+
+# MediaRecorder container -> ffmpeg demuxer name for /ws/stt
+_WS_STT_FORMATS = {"webm": "matroska", "ogg": "ogg", "opus": "ogg"}
+
+
+async def _ws_stt_pcm(ws: WebSocket, stt, sample_rate: int):
+	with stt.stream(sample_rate) as s:
+		while True:
+			msg = await ws.receive()
+			if msg["type"] == "websocket.disconnect":
+				return
+			if msg.get("bytes"):
+				res = await run_in_threadpool(s.accept, msg["bytes"])
+				if res:
+					await ws.send_json(res)
+			elif msg.get("text") and json.loads(msg["text"]).get("eof"):
+				await ws.send_json(await run_in_threadpool(s.finish))
+				await ws.close()
+				return
+
+
+async def _ws_stt_container(ws: WebSocket, stt, fmt: str):
+	# Compressed frames go into a long-lived ffmpeg; a reader thread decodes its PCM output
+	# and hands results back to the event loop for sending.
+	from jewel.io.audio_ingest import PcmPipe
+
+	loop = asyncio.get_running_loop()
+	out: asyncio.Queue = asyncio.Queue()
+	pipe = PcmPipe(input_format=_WS_STT_FORMATS[fmt], live=True)
+
+	def pump():
+		try:
+			with stt.stream() as s:
+				for pcm in pipe.pcm_chunks(3200):
+					res = s.accept(pcm)
+					if res:
+						loop.call_soon_threadsafe(out.put_nowait, res)
+				loop.call_soon_threadsafe(out.put_nowait, s.finish())
+		except Exception as e:
+			loop.call_soon_threadsafe(out.put_nowait, {"error": str(e)})
+		finally:
+			loop.call_soon_threadsafe(out.put_nowait, None)
+
+	async def sender():
+		while True:
+			res = await out.get()
+			if res is None:
+				return
+			await ws.send_json(res)
+
+	threading.Thread(target=pump, daemon=True).start()
+	send_task = asyncio.create_task(sender())
+	try:
+		while True:
+			msg = await ws.receive()
+			if msg["type"] == "websocket.disconnect":
+				return
+			if msg.get("bytes"):
+				try:
+					await run_in_threadpool(pipe.write, msg["bytes"])
+				except (BrokenPipeError, ConnectionResetError):
+					pipe.close_input()
+					break
+			elif msg.get("text") and json.loads(msg["text"]).get("eof"):
+				pipe.close_input()
+				break
+		# drain: ffmpeg flushes, the reader emits the last final result and stops
+		await send_task
+		if pipe.proc.poll() not in (None, 0):
+			await ws.send_json({"error": f"ffmpeg conversion failed: {pipe.error_text()}"})
+		await ws.close()
+	finally:
+		pipe.kill()
+		send_task.cancel()
+
+
+@app.websocket("/ws/stt")
+async def ws_stt(ws: WebSocket, format: str = "pcm", sample_rate: int = 16000):
+	# Live speech recognition. Send binary frames (16-bit mono PCM at `sample_rate`, or
+	# MediaRecorder chunks with format=webm/ogg) and {"eof": true} to finish. Replies are
+	# {"partial": ...} while the user speaks and {"text": ..., "final": true} at each endpoint.
+	await ws.accept()
+	stt = get_engine()
+	if not stt.configured:
+		await ws.send_json({"error": "STT not configured (VOSK_MODEL_PATH missing)"})
+		await ws.close()
+		return
+	if format != "pcm" and format not in _WS_STT_FORMATS:
+		await ws.send_json({"error": f"unsupported format: {format}"})
+		await ws.close()
+		return
+	try:
+		# the first connection may have to load the model; keep that off the event loop
+		await run_in_threadpool(stt.preload)
+		if format == "pcm":
+			await _ws_stt_pcm(ws, stt, sample_rate)
+		else:
+			await _ws_stt_container(ws, stt, format)
+	except WebSocketDisconnect:
+		pass
+	except FileNotFoundError:
+		await ws.send_json({"error": "ffmpeg not found on PATH"})
+		await ws.close()
+	except Exception as e:
+		try:
+			await ws.send_json({"error": str(e)})
+			await ws.close()
+		except Exception:
+			pass
+
+
+@app.get("/stt/stats")
+async def stt_stats():
+	"""Model load time and per-request decode timings for the STT engine and batch pool, plus VAD savings."""
+	return {**get_engine().stats(), "batch_pool": stt_pool.stats(), "vad": vad_stats()}
+
+
+@app.post("/vision", dependencies=[Depends(safety_guard)])
 async def vision(file: UploadFile = File(...), prompt: str = Form("")):
-    """Analyze an image using OpenAI Vision API (gpt-4o supports vision)."""
-    import base64
-    from openai import OpenAI
-    
+    """Analyze an image using OpenAI Vision API (gpt-4o supports vision).
+
+    The upload is downscaled and re-encoded without EXIF before sending; replies are
+    cached by perceptual hash + prompt so asking again about the same picture is free.
+    """
+    from jewel.io.vision_pipeline import prepare_image, vision_cache
+
     if not prompt:
         prompt = "Describe this image in detail."
-    
+    model = "gpt-4o"
+
     try:
-        # Read and encode image
-        image_data = await file.read()
-        base64_image = base64.b64encode(image_data).decode('utf-8')
-        
-        # Determine mime type from filename
-        ext = Path(file.filename).suffix.lower()
-        mime_map = {
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.gif': 'image/gif',
-            '.webp': 'image/webp'
-        }
-        mime_type = mime_map.get(ext, 'image/jpeg')
-        
-        client = OpenAI(api_key=settings.openai_api_key)
-        
+        try:
+            image = await run_in_threadpool(prepare_image, await file.read())
+        except Exception as e:
+            return JSONResponse(status_code=400, content={"error": f"Could not read image: {e}"})
+        meta = {"width": image.width, "height": image.height, "bytes_in": image.original_bytes, "bytes_sent": len(image.data)}
+
+        cached = await run_in_threadpool(vision_cache.lookup, image.phash, prompt, model)
+        if cached is not None:
+            return {"reply": cached, "cached": True, "image": meta}
+
+        client = clients.openai()
+
         # Use gpt-4o which supports vision
-        response = client.chat.completions.create(
-            model="gpt-4o",
+        response = await run_in_threadpool(
+            client.chat.completions.create,
+            model=model,
             messages=[
                 {
                     "role": "user",
@@ -432,7 +806,7 @@ async def vision(file: UploadFile = File(...), prompt: str = Form("")):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:{mime_type};base64,{base64_image}"
+                                "url": image.data_url()
                             }
                         }
                     ]
@@ -440,267 +814,162 @@ async def vision(file: UploadFile = File(...), prompt: str = Form("")):
             ],
             max_tokens=500
         )
-        
+
         reply = response.choices[0].message.content
-        return {"reply": reply}
-        
+        if reply:
+            await run_in_threadpool(vision_cache.put, image.phash, prompt, model, reply)
+        return {"reply": reply, "cached": False, "image": meta}
+
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Vision analysis failed: {str(e)}"})
+
+
+@app.get("/vision/cache")
+async def vision_cache_stats():
+    """Entries and hit/miss counters for the /vision reply cache."""
+    from jewel.io.vision_pipeline import vision_cache
+    return vision_cache.stats()
+
+
 class VideoIn(BaseModel):
     url: str
     every: int | None = None
     max_frames: int | None = None
     quick: bool | None = False
+    # pick frames at scene changes (keyframe scan of the whole stream) instead of uniformly
+    scenes: bool | None = False
+    # block until the analysis finishes instead of returning a job id
+    wait: bool | None = False
+
+
+def _video_params(body: VideoIn) -> dict:
+    # If quick mode requested, force a very small frame count for a cheap run
+    return {
+        "max_frames": 1 if body.quick else (body.max_frames or 6),
+        "every": body.every or 30,  # Default: at most 1 frame per 30 seconds
+        "scenes": bool(body.scenes),
+    }
 
 
-@app.post("/video_summary")
+@app.post("/video_summary", dependencies=[Depends(safety_guard)])
 async def video_summary(body: VideoIn):
-    """Analyze any video (YouTube, Twitter, TikTok, etc.) by extracting frames and audio, then summarizing both visual and spoken content."""
-    try:
-        import re
-        import base64
-        import io
-        from openai import OpenAI
-        from youtube_transcript_api import YouTubeTranscriptApi
-        import yt_dlp
-        from PIL import Image
-        
-        # Try to get YouTube transcript if it's a YouTube URL (optional)
-        transcript_text = ""
-        video_id = None
-        yt_patterns = [
-            r'(?:v=|/)([0-9A-Za-z_-]{11}).*',
-            r'(?:embed/)([0-9A-Za-z_-]{11})',
-            r'(?:watch\?v=)([0-9A-Za-z_-]{11})'
-        ]
-        for pattern in yt_patterns:
-            match = re.search(pattern, body.url)
-            if match:
-                video_id = match.group(1)
-                break
-        
-        if video_id:
-            try:
-                transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-                transcript_text = " ".join([entry['text'] for entry in transcript_list])
-                if len(transcript_text) > 8000:
-                    transcript_text = transcript_text[:8000] + "..."
-            except Exception:
-                pass  # Continue without transcript
-        
-        # Download video and extract frames
-        with tempfile.TemporaryDirectory() as td:
-            video_path = Path(td) / "video.mp4"
-            
-            # Download with yt-dlp (best quality up to 720p to save bandwidth)
-            ydl_opts = {
-                'format': 'best[height<=720]',
-                'outtmpl': str(video_path),
-                'quiet': True,
-                'no_warnings': True,
-            }
-            
-            try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([body.url])
-            except Exception as e:
-                return JSONResponse(status_code=400, content={"error": f"Could not download video: {str(e)}"})
-            
-            # Extract frames using ffmpeg (every N seconds)
-            frame_interval = body.every or 30  # Default: 1 frame per 30 seconds
-            # If quick mode requested, force a very small frame count for a cheap run
-            if getattr(body, 'quick', False):
-                max_frames = 1
-            else:
-                max_frames = body.max_frames or 6
-            frames_dir = Path(td) / "frames"
-            frames_dir.mkdir()
-            
-            try:
-                cmd = [
-                    "ffmpeg", "-i", str(video_path),
-                    "-vf", f"fps=1/{frame_interval}",
-                    "-frames:v", str(max_frames),
-                    str(frames_dir / "frame_%03d.jpg")
-                ]
-                subprocess.run(cmd, check=True, capture_output=True)
-            except Exception as e:
-                return JSONResponse(status_code=400, content={"error": f"Frame extraction failed: {str(e)}"})
-            
-            # Encode frames as base64 and compute a simple visual summary (avg color)
-            frame_data = []
-            visual_summary = []
-            for idx, frame_file in enumerate(sorted(frames_dir.glob("*.jpg"))[:max_frames], start=1):
-                with Image.open(frame_file) as img:
-                    # Resize to save tokens (max 512px on longest side)
-                    img.thumbnail((512, 512))
-                    # Compute average color
-                    try:
-                        pixels = list(img.getdata())
-                        if len(pixels) > 0:
-                            r = sum(p[0] for p in pixels) // len(pixels)
-                            g = sum(p[1] for p in pixels) // len(pixels)
-                            b = sum(p[2] for p in pixels) // len(pixels)
-                            visual_summary.append(f"Frame {idx}: avg_color=rgb({r},{g},{b})")
-                        else:
-                            visual_summary.append(f"Frame {idx}: no_pixels")
-                    except Exception:
-                        visual_summary.append(f"Frame {idx}: could not compute color")
-                    # Use an in-memory buffer to avoid Windows file-locking issues
-                    buf = io.BytesIO()
-                    img.save(buf, format='JPEG', quality=85)
-                    b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-                    frame_data.append(b64)
-            
-            if not frame_data:
-                return JSONResponse(status_code=400, content={"error": "No frames could be extracted from video"})
-            
-            # Build vision API request with all frames
-            client = OpenAI(api_key=settings.openai_api_key)
-            
-            content = [
-                {"type": "text", "text": "Analyze this video by looking at these key frames sampled throughout. Describe what you see happening visually, the main themes, and provide a comprehensive summary."}
-            ]
-            
-            for b64_frame in frame_data:
-                content.append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{b64_frame}"}
-                })
-            
-            if transcript_text:
-                content.append({
-                    "type": "text",
-                    "text": f"\n\nTranscript (spoken words):\n{transcript_text}"
-                })
-            
-            response = client.chat.completions.create(
-                model="gpt-4o",  # Vision-capable model
-                messages=[{"role": "user", "content": content}],
-                max_tokens=1000,
-                temperature=0.6
-            )
-            
-            try:
-                summary = response.choices[0].message.content
-                # Return the textual reply plus lightweight metadata (frames count, visual summary, and small frame thumbnails)
-                return {
-                    "reply": f"📹 Video Analysis ({len(frame_data)} frames):\n\n{summary}",
-                    "frames_extracted": len(frame_data),
-                    "visual_summary": visual_summary,
-                    "frames": [f"data:image/jpeg;base64,{b64}" for b64 in frame_data]
-                }
-            except Exception as e:
-                # If we couldn't read the model response, return partial info
-                import logging, traceback
-                logging.exception('Failed to extract summary from OpenAI response')
-                return JSONResponse(status_code=500, content={
-                    "error": f"Could not parse model response: {str(e)}",
-                    "frames_extracted": len(frame_data),
-                    "transcript": transcript_text,
-                    "visual_summary": visual_summary,
-                    "frames": [f"data:image/jpeg;base64,{b64}" for b64 in frame_data]
-                })
-        
-    except ImportError as e:
-        return JSONResponse(status_code=500, content={"error": f"Missing dependency: {str(e)}. Run: pip install yt-dlp pillow youtube-transcript-api"})
-    except Exception as e:
-        # If OpenAI returns a quota/429 style error, surface a clearer status and include partial results
-        import logging, traceback
-        logging.exception('Video analysis failed')
-        msg = str(e)
-        if 'insufficient_quota' in msg or '429' in msg or 'quota' in msg.lower():
-            # Build a lightweight heuristic summary from transcript or visual summary
-            fallback_summary = []
-            try:
-                t = locals().get('transcript_text') or ""
-                if t:
-                    # simple heuristic: split into sentences and pick first 3 non-empty pieces
-                    import re
-                    parts = [p.strip() for p in re.split(r'[\.\!\?]\s+', t) if p.strip()]
-                    for s in parts[:3]:
-                        fallback_summary.append(s if len(s) < 400 else s[:400] + '...')
-                else:
-                    # if no transcript, summarize visual info
-                    vs = locals().get('visual_summary') or []
-                    if vs:
-                        fallback_summary.extend(vs[:3])
-            except Exception:
-                fallback_summary = []
-
-            return JSONResponse(status_code=429, content={
-                "error": "OpenAI quota exceeded or insufficient quota. Check your API plan/billing.",
-                "detail": msg,
-                # include best-effort partial results if available
-                "frames_extracted": locals().get('frame_data') and len(frame_data) or 0,
-                "transcript": locals().get('transcript_text') or "",
-                "visual_summary": locals().get('visual_summary') or [],
-                "frames": [f"data:image/jpeg;base64,{b64}" for b64 in (locals().get('frame_data') or [])],
-                "fallback_summary": fallback_summary
-            })
-        return JSONResponse(status_code=500, content={"error": f"Video analysis failed: {str(e)}"})
-@app.post('/generate_image')
+    """Analyze any video (YouTube, Twitter, TikTok, etc.) by extracting frames and audio, then summarizing both visual and spoken content.
+
+    Runs as a background job and answers 202 with its id right away; follow it at
+    /video_jobs/{id} or /jobs/{id}/events. Pass "wait": true to block until the
+    result is ready instead.
+    """
+    from jewel.io.video_jobs import video_jobs
+
+    jid = video_jobs.submit(body.url, _video_params(body))
+    if not body.wait:
+        job = video_jobs.get(jid)
+        return JSONResponse(status_code=202, content={
+            "job_id": jid,
+            "status": job["status"],
+            "status_url": f"/video_jobs/{jid}",
+            "events_url": f"/jobs/{jid}/events",
+        })
+    job = await video_jobs.wait(jid)
+    if job["status"] == "done":
+        return job["result"]
+    return JSONResponse(status_code=job.get("http_status") or 500, content={
+        "error": job.get("error"), "job_id": jid, **(job.get("partial") or {})
+    })
+
+
+@app.get("/video_jobs/{job_id}")
+async def video_job_status(job_id: str):
+    """Status of a video analysis job: overall status, per-stage progress and, once done, the result."""
+    from jewel.io.video_jobs import video_jobs
+    job = await run_in_threadpool(video_jobs.get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "job not found"})
+    return job
+
+
+@app.delete("/video_jobs/{job_id}")
+async def video_job_cancel(job_id: str):
+    """Cancel a queued or running video analysis job."""
+    from jewel.io.video_jobs import video_jobs
+    job = video_jobs.cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "job not found"})
+    return job
+
+
+@app.get("/video_summary/cache")
+async def video_summary_cache():
+    """Size of the per-video analysis cache and video job counters."""
+    from jewel.io.video_cache import video_cache
+    from jewel.io.video_jobs import video_jobs
+    return {**video_cache.stats(), **video_jobs.stats()}
+
+
+# how long a "wait": true request blocks before answering 202 with the job instead
+_JOB_WAIT_S = 300.0
+
+
+def _job_accepted(jid: str, status: str) -> JSONResponse:
+    return JSONResponse(status_code=202, content={
+        "job_id": jid, "status": status, "status_url": f"/jobs/{jid}", "events_url": f"/jobs/{jid}/events",
+    })
+
+
+@app.post('/generate_image', dependencies=[Depends(safety_guard)])
 async def generate_image(body: dict):
     """Generate an image from a text prompt using the configured OpenAI Images API.
-    Saves the image into ./data/generated_images and returns a relative URL.
+
+    Images are stored per (model, prompt, size, seed): a repeat request returns the
+    stored asset at once (PNG plus WebP and thumbnail URLs) without an API call. A
+    miss is queued as a job and answers 202 with its id (follow /jobs/{id}), or
+    blocks until ready with "wait": true (for up to five minutes, then 202). "seed"
+    is not passed to the model (the Images API has none); change it to get a new
+    image instead of the stored one.
     """
+    from jewel.io.image_assets import image_assets
     try:
         prompt = (body.get('prompt') if isinstance(body, dict) else None) or ''
         size = (body.get('size') if isinstance(body, dict) else None) or '512x512'
-        n = int(body.get('n') or 1)
+        n = max(1, min(int(body.get('n') or 1), 4))
+        model = body.get('model') or 'gpt-image-1'
+        seed = int(body.get('seed') or 0)
         if not prompt:
             return JSONResponse(status_code=400, content={"error": "prompt is required"})
 
-        from openai import OpenAI
-        client = OpenAI(api_key=settings.openai_api_key)
-
-        # Try to be compatible with different OpenAI client versions.
-        resp = None
-        try:
-            if hasattr(client.images, 'generate'):
-                # Newer SDK: images.generate
-                resp = client.images.generate(model='gpt-image-1', prompt=prompt, size=size, n=n)
-            elif hasattr(client.images, 'create'):
-                # older naming: images.create
-                resp = client.images.create(prompt=prompt, size=size, n=n)
-            else:
-                # fallback to old module-style API
-                import openai as oai
-                resp = oai.Image.create(prompt=prompt, size=size, n=n)
-        except Exception as e:
-            return JSONResponse(status_code=500, content={"error": f"Image generation failed: {str(e)}"})
-
-        # Extract base64-encoded image data from response in common fields
-        b64_data = None
-        try:
-            # Some SDKs return an object with .data
-            if hasattr(resp, 'data') and resp.data:
-                item = resp.data[0]
-                # try several common keys
-                b64_data = getattr(item, 'b64_json', None) or getattr(item, 'b64', None) or (item.get('b64_json') if isinstance(item, dict) else None)
-            elif isinstance(resp, dict) and resp.get('data'):
-                item = resp['data'][0]
-                b64_data = item.get('b64_json') or item.get('b64')
-        except Exception:
-            b64_data = None
-
-        if not b64_data:
-            return JSONResponse(status_code=500, content={"error": "Image generation returned no image data"})
-
-        img_bytes = base64.b64decode(b64_data)
-        out_dir = Path('./data/generated_images')
-        out_dir.mkdir(parents=True, exist_ok=True)
-        fid = uuid.uuid4().hex
-        fname = f"{fid}.png"
-        path = out_dir / fname
-        with open(path, 'wb') as f:
-            f.write(img_bytes)
-
-        return {"url": f"/data/generated_images/{fname}", "id": fid}
+        state = await run_in_threadpool(image_assets.request, prompt, size, n, model, seed)
+        if state["status"] == "done":
+            return {**state["images"][0], "images": state["images"]}
+        jid = state["id"]
+        if not body.get('wait'):
+            return _job_accepted(jid, state["status"])
+        since, status = 0, state["status"]
+        deadline = time.monotonic() + _JOB_WAIT_S
+        while (left := deadline - time.monotonic()) > 0:
+            ev = await job_events.wait(jid, since=since, timeout=min(left, 60.0))
+            if ev is None:
+                if job_events.get(jid) is None:
+                    return JSONResponse(status_code=404, content={"error": "job not found"})
+                continue
+            since, job = ev
+            status = job["status"]
+            if status == "done":
+                return {**job["images"][0], "images": job["images"]}
+            if status == "error":
+                return JSONResponse(status_code=job.get("http_status") or 500, content={"error": job.get("error")})
+        # still running: hand back the job so the caller can follow it
+        return _job_accepted(jid, status)
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.get('/generate_image/cache')
+async def generate_image_cache():
+    """Stored generated images and hit/miss counters."""
+    from jewel.io.image_assets import image_assets
+    return await run_in_threadpool(image_assets.stats)
+
+
 # ---------- Simple Text→Video Prototype (stitched frames) ----------
 
 class VideoGenRequest(BaseModel):
@@ -708,12 +977,8 @@ class VideoGenRequest(BaseModel):
     frames: Optional[int] = 6            # keep small for cost + speed
     size: Optional[str] = "512x512"
     fps: Optional[int] = 6
-
-
-class VideoGenResponse(BaseModel):
-    url: str
-    file_path: str
-    frame_paths: list[str]
+    # block until the video is ready instead of returning a job id
+    wait: Optional[bool] = False
 
 
 def _basic_prompt_guard(p: str) -> bool:
@@ -722,62 +987,39 @@ def _basic_prompt_guard(p: str) -> bool:
     return not any(term in p.lower() for term in banned)
 
 
-@app.post("/prototype_video", response_model=VideoGenResponse)
-def prototype_video(req: VideoGenRequest):
+@app.post("/prototype_video", dependencies=[Depends(safety_guard)])
+async def prototype_video(req: VideoGenRequest):
+    """Generate frames for `prompt` and stitch them into an MP4.
+
+    Runs as a background job: answers 202 with a job id, follow it at /jobs/{id}
+    or /jobs/{id}/events. Pass "wait": true to block until the video is ready
+    (for up to five minutes, then 202).
+    """
+    from jewel.io.video_gen import video_gen_jobs
+
     if req.frames < 3 or req.frames > 24:
         raise HTTPException(status_code=400, detail="frames must be between 3 and 24.")
     if not _basic_prompt_guard(req.prompt):
         raise HTTPException(status_code=400, detail="Prompt rejected by safety filter.")
 
-    tmpdir = tempfile.mkdtemp(prefix="jewel_frames_")
-    frame_paths = []
-    try:
-        # Generate N independent frames (will have some flicker; this is just a prototype)
-        from openai import OpenAI
-        client = OpenAI(api_key=settings.openai_api_key)
-
-        for i in range(req.frames):
-            gen = client.images.generate(
-                model="gpt-image-1",
-                prompt=req.prompt + f" — cinematic frame {i+1}",
-                size=req.size,
-            )
-            b64 = gen.data[0].b64_json
-            img_bytes = base64.b64decode(b64)
-            path = os.path.join(tmpdir, f"{i:03d}.png")
-            with open(path, "wb") as f:
-                f.write(img_bytes)
-            frame_paths.append(path)
-
-        # Ensure output dir exists
-        out_dir = Path('./data/generated_videos')
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        # Stitch with ffmpeg
-        vid_id = str(uuid.uuid4())[:8]
-        out_path = os.path.join(str(out_dir), f"{vid_id}.mp4")
-        cmd = [
-            "ffmpeg", "-y",
-            "-framerate", str(req.fps),
-            "-i", os.path.join(tmpdir, "%03d.png"),
-            "-c:v", "libx264",
-            "-pix_fmt", "yuv420p",
-            out_path
-        ]
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        return VideoGenResponse(
-            url=f"/data/generated_videos/{vid_id}.mp4",
-            file_path=out_path,
-            frame_paths=frame_paths,
-        )
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"ffmpeg failed: {e.stderr.decode(errors='ignore')}")
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Video prototype failed: {e}")
-    finally:
-        shutil.rmtree(tmpdir, ignore_errors=True)
-
+    jid = video_gen_jobs.submit(req.prompt, req.frames, req.size, req.fps)
+    if not req.wait:
+        return _job_accepted(jid, "queued")
+    since, status = 0, "queued"
+    deadline = time.monotonic() + _JOB_WAIT_S
+    while (left := deadline - time.monotonic()) > 0:
+        ev = await job_events.wait(jid, since=since, timeout=min(left, 60.0))
+        if ev is None:
+            if job_events.get(jid) is None:
+                raise HTTPException(status_code=404, detail="job not found")
+            continue
+        since, job = ev
+        status = job["status"]
+        if status == "done":
+            return {"url": job["url"], "file_path": job["file_path"], "frames": job["frames"], "job_id": jid}
+        if status in ("error", "cancelled"):
+            raise HTTPException(status_code=job.get("http_status") or 500, detail=job.get("error"))
+    return _job_accepted(jid, status)
 
 
 @app.get("/usage")
@@ -1003,45 +1245,27 @@ async def get_conversation_context():
     return {'context': context}
 
 # ==================== SAFETY ENDPOINTS ====================
+# All routes share the one SafetySystem from get_safety() (created at startup).
 
 @app.get('/safety/violations')
-async def get_violations():
-    '''Get all safety violations (for admin dashboard).'''
-    from jewel.core.safety_enhanced import SafetySystem
-    safety = SafetySystem(str(Path(settings.db_path).parent / 'jewel_safety.db'))
-    violations = safety.get_violations(limit=100)
+async def get_violations(user_id: str = None, limit: int = 100):
+    '''Get safety violations, optionally for one user (for admin dashboard).'''
+    from jewel.core.safety_enhanced import get_safety
+    violations = get_safety().get_violations(user_id, limit)
     return JSONResponse({'violations': violations})
 
 @app.get('/safety/flagged')
-async def get_flagged_accounts():
+async def get_flagged_accounts(limit: int = 100):
     '''Get all flagged/banned accounts.'''
-    from jewel.core.safety_enhanced import SafetySystem
-    import sqlite3
-    safety = SafetySystem(str(Path(settings.db_path).parent / 'jewel_safety.db'))
-    
-    cur = safety.conn.execute(
-        '''SELECT user_id, ip_address, status, severity, reason, flagged_at 
-           FROM flagged_accounts ORDER BY id DESC LIMIT 100'''
-    )
-    accounts = []
-    for row in cur.fetchall():
-        accounts.append({
-            'user_id': row[0],
-            'ip_address': row[1],
-            'status': row[2],
-            'severity': row[3],
-            'reason': row[4],
-            'flagged_at': row[5]
-        })
-    
+    from jewel.core.safety_enhanced import get_safety
+    accounts = get_safety().list_flagged_accounts(limit)
     return JSONResponse({'accounts': accounts})
 
 @app.get('/safety/emergencies')
-async def get_emergencies():
+async def get_emergencies(limit: int = 100):
     '''Get all emergency events (abuse detection).'''
-    from jewel.core.safety_enhanced import SafetySystem
-    safety = SafetySystem(str(Path(settings.db_path).parent / 'jewel_safety.db'))
-    events = safety.get_emergency_events(limit=100)
+    from jewel.core.safety_enhanced import get_safety
+    events = get_safety().get_emergency_events(limit)
     return JSONResponse({'events': events})
 
 @app.post('/safety/check')
@@ -1051,10 +1275,9 @@ async def check_content_safety(
     ip_address: str = Form(None)
 ):
     '''Check if content is safe (for frontend validation).'''
-    from jewel.core.safety_enhanced import SafetySystem
-    safety = SafetySystem(str(Path(settings.db_path).parent / 'jewel_safety.db'))
+    from jewel.core.safety_enhanced import get_safety
     
-    is_safe, category, reason = safety.check_content(text, user_id, ip_address)
+    is_safe, category, reason = get_safety().check_content(text, user_id, ip_address)
     
     return JSONResponse({
         'is_safe': is_safe,
@@ -1062,6 +1285,64 @@ async def check_content_safety(
         'reason': reason
     })
 
+@app.post('/safety/check_batch')
+async def check_content_batch(request: Request, user_id: str = None, ip_address: str = None):
+    '''Check many texts at once (bulk moderation).
+
+    JSON body: {"texts": [...]} or {"items": [{"text", "user_id", "ip_address", "id"}, ...]},
+    optionally with "user_id"/"ip_address" defaults; returns {"results": [...]} in input order.
+    An application/x-ndjson body (one text or item per line) is answered as NDJSON, one
+    result per input line, streamed as each chunk is checked.
+    '''
+    from jewel.core.safety_enhanced import get_safety
+    safety = get_safety()
+    ctype = request.headers.get('content-type', '')
+    if 'ndjson' not in ctype and 'jsonl' not in ctype:
+        try:
+            body = await request.json()
+        except Exception:
+            raise HTTPException(status_code=400, detail='Expected a JSON body')
+        items = body.get('items', body.get('texts')) if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail='Provide "texts" or "items" as a list')
+        results = await run_in_threadpool(
+            safety.check_many, items, body.get('user_id', user_id), body.get('ip_address', ip_address)
+        )
+        blocked = sum(1 for r in results if r.get('is_safe') is False)
+        return JSONResponse({'results': results, 'checked': len(results), 'blocked': blocked})
+
+    # Spool the body first: the response can't start reading the request stream
+    # once it is streaming (Starlette listens for the disconnect on it meanwhile).
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+
+    async def results():
+        try:
+            lines = filter(None, (raw.strip() for raw in spool))
+            while True:
+                batch = []
+                # several chunks per round so check_many can spread them over its workers
+                for raw in itertools.islice(lines, 2000):
+                    try:
+                        batch.append((True, json.loads(raw)))
+                    except ValueError:
+                        batch.append((False, None))
+                if not batch:
+                    break
+                # check_many answers items of the wrong shape with an error object of its own
+                parsed = [item for ok, item in batch if ok]
+                checked = iter(await run_in_threadpool(safety.check_many, parsed, user_id, ip_address))
+                yield ''.join(
+                    json.dumps(next(checked) if ok else {'error': 'invalid JSON line'}) + '\n'
+                    for ok, _ in batch
+                )
+        finally:
+            spool.close()
+
+    return StreamingResponse(results(), media_type='application/x-ndjson')
+
 @app.post('/safety/check_abuse')
 async def check_abuse(
     audio_transcript: str = Form(...),
@@ -1069,10 +1350,9 @@ async def check_abuse(
     user_id: str = Form(None)
 ):
     '''Check for abuse/distress (smart glasses integration).'''
-    from jewel.core.safety_enhanced import SafetySystem
-    safety = SafetySystem(str(Path(settings.db_path).parent / 'jewel_safety.db'))
+    from jewel.core.safety_enhanced import get_safety
     
-    abuse_detected, emergency_info = safety.detect_abuse(
+    abuse_detected, emergency_info = get_safety().detect_abuse(
         audio_transcript,
         video_context,
         user_id
@@ -1082,99 +1362,3 @@ async def check_abuse(
         'abuse_detected': abuse_detected,
         'emergency_info': emergency_info
     })
-
-
-# 
-# Safety System Endpoints
-# 
-
-@app.get("/safety/violations")
-async def get_safety_violations(user_id: str = None, limit: int = 100):
-    from jewel.core.safety_enhanced import SafetySystem
-    from pathlib import Path
-    data_dir = Path(settings.db_path).parent
-    safety = SafetySystem(str(data_dir / "jewel_safety.db"))
-    violations = safety.get_violations(user_id, limit)
-    return {"violations": violations}
-
-@app.get("/safety/flagged")
-async def get_flagged_accounts(limit: int = 100):
-    from jewel.core.safety_enhanced import SafetySystem
-    from pathlib import Path
-    import sqlite3
-    data_dir = Path(settings.db_path).parent
-    safety_db = str(data_dir / "jewel_safety.db")
-    conn = sqlite3.connect(safety_db)
-    cursor = conn.cursor()
-    cursor.execute("SELECT user_id, ip_address, reason, severity, status, flagged_at, banned_at FROM flagged_accounts ORDER BY flagged_at DESC LIMIT ?", (limit,))
-    rows = cursor.fetchall()
-    conn.close()
-    accounts = [{"user_id": r[0], "ip_address": r[1], "reason": r[2], "severity": r[3], "status": r[4], "flagged_at": r[5], "banned_at": r[6]} for r in rows]
-    return {"accounts": accounts}
-
-@app.get("/safety/emergencies")
-async def get_emergency_events(limit: int = 100):
-    from jewel.core.safety_enhanced import SafetySystem
-    from pathlib import Path
-    data_dir = Path(settings.db_path).parent
-    safety = SafetySystem(str(data_dir / "jewel_safety.db"))
-    events = safety.get_emergency_events(limit)
-    return {"events": events}
-
-@app.post("/safety/check")
-async def check_content_safety(request: dict):
-    from jewel.core.safety_enhanced import SafetySystem
-    from pathlib import Path
-    data_dir = Path(settings.db_path).parent
-    safety = SafetySystem(str(data_dir / "jewel_safety.db"))
-    text = request.get("text", "")
-    user_id = request.get("user_id")
-    ip_address = request.get("ip_address")
-    is_safe, category, reason = safety.check_content(text, user_id, ip_address)
-    return {"is_safe": is_safe, "category": category, "reason": reason}
-
-@app.post("/safety/check_abuse")
-async def check_abuse(request: dict):
-    from jewel.core.safety_enhanced import SafetySystem
-    from pathlib import Path
-    data_dir = Path(settings.db_path).parent
-    safety = SafetySystem(str(data_dir / "jewel_safety.db"))
-    audio_transcript = request.get("audio_transcript")
-    video_context = request.get("video_context")
-    user_id = request.get("user_id")
-    abuse_detected, emergency_info = safety.detect_abuse(audio_transcript, video_context, user_id)
-    return {"abuse_detected": abuse_detected, "emergency_info": emergency_info}
-
-@app.get("/safety/violations")
-async def get_violations(user_id: str = None, limit: int = 100):
-    from jewel.core.safety_enhanced import SafetySystem
-    from pathlib import Path
-    data_dir = Path(settings.db_path).parent
-    safety = SafetySystem(str(data_dir / "jewel_safety.db"))
-    violations = safety.get_violations(user_id, limit)
-    return {"violations": violations}
-
-@app.get("/safety/flagged")
-async def get_flagged(limit: int = 100):
-    from jewel.core.safety_enhanced import SafetySystem
-    from pathlib import Path
-    import sqlite3
-    data_dir = Path(settings.db_path).parent
-    safety = SafetySystem(str(data_dir / "jewel_safety.db"))
-    conn = sqlite3.connect(str(data_dir / "jewel_safety.db"))
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM flagged_accounts ORDER BY flagged_at DESC LIMIT ?", (limit,))
-    rows = cursor.fetchall()
-    accounts = [dict(row) for row in rows]
-    conn.close()
-    return {"accounts": accounts}
-
-@app.get("/safety/emergencies")
-async def get_emergencies(limit: int = 100):
-    from jewel.core.safety_enhanced import SafetySystem
-    from pathlib import Path
-    data_dir = Path(settings.db_path).parent
-    safety = SafetySystem(str(data_dir / "jewel_safety.db"))
-    events = safety.get_emergency_events(limit)
-    return {"events": events}